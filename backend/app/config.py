@@ -15,13 +15,139 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./steam_priority_picker.db"
+    database_profile: str = "tuned"  # "tuned" or "default" (SQLAlchemy defaults), see app/db/engine_profiles.py
+    # SQLite (tuned profile)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"  # durable across app crashes, may lose the last commits on power loss
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 64 * 1024
+    sqlite_mmap_size_mb: int = 256
+    # PostgreSQL (tuned profile)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30
+    db_pool_recycle_seconds: int = 1800
+    db_statement_timeout_ms: int = 15000
+    db_prepared_statement_cache_size: int = 256  # asyncpg, per connection; 0 behind PgBouncer transaction pooling
+    # Read replica (optional): read-only endpoints use it, see app/services/read_routing.py
+    database_read_url: str = ""
+    read_your_writes_seconds: float = 5.0  # after a write, the user's reads stay on the primary at least this long
+    replica_max_lag_seconds: float = 30.0  # a replica further behind than this gets no reads
+    replica_lag_check_seconds: float = 5.0
+    write_log_check_seconds: float = 0.5  # how often a worker re-reads the other workers' recent writes
+    seed_catalog_on_startup: bool = False  # load data/games.json into an empty games table
+    seed_catalog_path: str = ""  # alternative dump to seed from
     
     # APIs
     steam_api_key: str = ""
+    # Upstream base URLs (point them at benchmarks/stub_upstream.py for offline benchmarks)
+    steam_api_base_url: str = "https://api.steampowered.com"
+    steam_store_base_url: str = "https://store.steampowered.com"
+    hltb_base_url: str = ""  # empty = real HowLongToBeat through howlongtobeatpy
+    steam_openid_url: str = "https://steamcommunity.com/openid/login"
+    
+    # Outgoing HTTP (shared client pool, one client per upstream host)
+    http_max_connections_per_host: int = 20
+    http_max_keepalive_per_host: int = 10
+    http_keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    http_timeout: float = 10.0
+    http2_enabled: bool = False  # requires the optional 'h2' package
+    http_prewarm_connections: bool = True  # open one connection per upstream on startup
+    http_prewarm_timeout: float = 3.0
+    http_user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    
+    # Local state shared by all workers and scripts (rate limits, caches)
+    cache_dir: str = str(Path(__file__).parent.parent / ".cache")
+    
+    # Adaptive rate limiting for Steam Store endpoints (per host, requests/second)
+    rate_limit_shared: bool = True  # share bucket state across workers via cache_dir
+    rate_limit_initial_rps: float = 5.0
+    rate_limit_min_rps: float = 0.5
+    rate_limit_max_rps: float = 20.0
+    rate_limit_burst: float = 10.0
+    rate_limit_increase_step: float = 0.05  # added to the rate after each success
+    rate_limit_decrease_factor: float = 0.5  # rate multiplier after a 429/403
+    rate_limit_decrease_cooldown: float = 2.0  # seconds between two decreases
+    
+    # Persistent Steam Store response cache (in cache_dir, TTLs in seconds)
+    response_cache_enabled: bool = True
+    response_cache_max_bytes: int = 256 * 1024 * 1024
+    response_cache_ttl_appdetails: float = 7 * 24 * 3600
+    response_cache_ttl_appreviews: float = 24 * 3600
+    response_cache_ttl_default: float = 24 * 3600
+    response_cache_negative_ttl: float = 24 * 3600  # delisted apps, games without reviews
+    
+    # HowLongToBeat lookup cache (in cache_dir, TTLs in seconds)
+    hltb_cache_ttl: float = 30 * 24 * 3600
+    hltb_cache_negative_ttl: float = 7 * 24 * 3600  # titles HLTB has no match for
+    
+    # Enrichment (fetching info for games missing from the catalog)
+    steam_store_concurrency: int = 10  # concurrent appdetails/appreviews calls
+    hltb_concurrency: int = 5  # concurrent HowLongToBeat lookups
+    delisted_refresh_seconds: float = 300  # how often the in-memory delisted set is reloaded
+    delisted_recheck_base_hours: float = 24  # first recheck of a delisted game, doubled after each miss
+    delisted_recheck_max_hours: float = 30 * 24  # backoff cap
+    delisted_recheck_per_hour: int = 60  # process-wide recheck budget
+    delisted_recheck_batch: int = 5  # max rechecks piggybacked on one enrichment batch
+    enrichment_mode: str = "inline"  # "inline" (in /my-games) or "worker" (queued for python -m app.worker)
+    
+    # Enrichment worker (python -m app.worker)
+    worker_concurrency: int = 2  # batches processed in parallel per worker process
+    worker_batch_size: int = 20  # jobs claimed per batch
+    worker_poll_seconds: float = 2.0  # idle wait between claims when the queue is empty
+    worker_lease_seconds: float = 120  # a job whose lease expires is claimed again
+    worker_heartbeat_seconds: float = 30  # lease extension interval while a batch runs
+    enrichment_job_max_attempts: int = 5
+    enrichment_job_retry_base_seconds: float = 30  # doubled after each failed attempt
+    
+    # Background catalog refresher (stale scores, names and HLTB data)
+    catalog_refresh_enabled: bool = True
+    catalog_refresh_interval_seconds: float = 300
+    catalog_stale_after_hours: float = 7 * 24  # rows not updated for this long get refreshed
+    catalog_refresh_budget_per_hour: int = 360  # upstream calls per hour (3 per game)
+    catalog_refresh_batch_max: int = 50  # max games per tick
+    
+    # Background Steam profile refresher (usernames/avatars, 100 users per GetPlayerSummaries call)
+    profile_refresh_enabled: bool = True
+    profile_refresh_interval_seconds: float = 6 * 3600
+    profile_refresh_users_per_run: int = 10000  # the next run continues where this one stopped
+    profile_refresh_concurrency: int = 4  # GetPlayerSummaries calls in flight
+    
+    # Circuit breakers for upstreams (Steam Store, Steam Web API, HowLongToBeat)
+    circuit_breakers_enabled: bool = True
+    circuit_window_seconds: float = 60  # sliding window for error rate
+    circuit_min_calls: int = 10  # calls in the window before the breaker can open
+    circuit_failure_threshold: float = 0.5  # failed-or-slow fraction that opens the breaker
+    circuit_slow_call_seconds: float = 5.0  # calls slower than this count as failures
+    circuit_open_seconds: float = 30  # how long an open breaker fails fast before probing
+    circuit_half_open_calls: int = 2  # concurrent probe calls while half-open
     
     # JWT
     jwt_secret_key: str = "your-secret-key-change-in-production"
     
+    # Verified-token cache for the auth dependency (per worker, revocations shared via cache_dir)
+    auth_token_cache_enabled: bool = True
+    auth_token_cache_ttl_seconds: float = 60  # how long a verified token skips the sessions/users lookups
+    auth_token_cache_max_entries: int = 10000
+    auth_revocation_check_seconds: float = 1.0  # how stale another worker's logout can be
+    
+    # Per-worker preferences cache (write-through, invalidated across workers by version stamps in cache_dir)
+    preferences_cache_enabled: bool = True
+    preferences_cache_ttl_seconds: float = 300
+    preferences_cache_max_entries: int = 10000
+    preferences_version_check_seconds: float = 1.0  # how often a cached entry's stamp is re-read
+    
+    # Per-user materialized search-with-preferences results (per worker, see app/services/library_views.py)
+    library_views_enabled: bool = True
+    library_views_max_ids: int = 5_000_000  # ids over all views; least recently used users are evicted
+    library_views_played_check_seconds: float = 1.0  # how often a view's played stamp is re-read
+    
+    # Background purge of expired and logged-out sessions
+    session_purge_enabled: bool = True
+    session_purge_interval_seconds: float = 3600
+    session_purge_batch_size: int = 1000  # rows deleted per statement
+    session_purge_max_batches: int = 50  # per run, the rest waits for the next run
+    
     # CORS
     cors_origins: list = ["*"]
     
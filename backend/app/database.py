@@ -1,13 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .db.engine_profiles import create_profiled_engine, create_profiled_async_engine
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-    echo=False  # Set to True to see SQL queries
-)
+# Create database engine (pool/pragma settings come from DATABASE_PROFILE)
+engine = create_profiled_engine(settings.database_url)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -20,3 +18,49 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async drivers for the same databases (aiosqlite / asyncpg)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> URL:
+    """DATABASE_URL with its driver swapped for the async one"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    if "sslmode" in parsed.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed
+
+
+# Async engine for routes that await their queries instead of blocking the event loop
+async_engine = create_profiled_async_engine(async_database_url(settings.database_url))
+
+# Objects stay usable after commit, since async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+async def get_async_db():
+    """Dependency to get an async database session for API endpoints"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Optional read replica (DATABASE_READ_URL); routes pick it per request via routes.auth.get_read_db
+read_async_engine = (
+    create_profiled_async_engine(async_database_url(settings.database_read_url))
+    if settings.database_read_url else None
+)
+AsyncReadSessionLocal = (
+    async_sessionmaker(read_async_engine, expire_on_commit=False)
+    if read_async_engine is not None else AsyncSessionLocal
+)
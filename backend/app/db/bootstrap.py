@@ -0,0 +1,35 @@
+"""
+Database bootstrap shared by every process that touches the database
+
+Creates missing tables and runs the idempotent startup migrations. Called on
+import by the API (app.main) and at startup by the enrichment worker
+(app.worker), so whichever process starts first brings the schema up to date.
+"""
+import logging
+from ..database import engine
+from ..models import Base
+from .migration_delisted_backoff import migrate_delisted_backoff
+from .migration_session_token_hash import migrate_session_token_hash
+from .migration_user_game_uniqueness import migrate_user_game_uniqueness
+
+logger = logging.getLogger(__name__)
+
+
+def init_database():
+    """Create tables and add columns/indexes introduced after they were first created"""
+    Base.metadata.create_all(bind=engine)
+
+    try:
+        migrate_delisted_backoff()
+    except Exception as e:
+        logger.error(f"❌ delisted_games migration failed: {e}")
+    try:
+        migrate_session_token_hash()
+    except Exception as e:
+        logger.error(f"❌ sessions token_hash migration failed: {e}")
+    try:
+        # Bulk played/library writes rely on these indexes to skip duplicates
+        migrate_user_game_uniqueness()
+    except Exception as e:
+        logger.error(f"❌ user_games/user_played_games unique index migration failed: {e} - "
+                     f"run python -m app.db.migration_user_game_uniqueness")
@@ -0,0 +1,79 @@
+"""
+Dialect-aware bulk write helpers.
+
+SQLite and PostgreSQL both support ``INSERT ... ON CONFLICT``, so bulk inserts
+can skip duplicates in a single statement instead of querying row by row.
+"""
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+
+def _dialect_insert(db: Session, model):
+    """Return an INSERT construct for the session's dialect"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(model)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(model)
+    return None
+
+
+def insert_ignore(db: Session, model, rows: Iterable[dict]) -> int:
+    """Bulk insert rows, silently skipping ones that violate a unique constraint
+
+    Duplicates are only skipped where the table has a matching unique index.
+    Does not commit. Returns the number of rows actually inserted.
+    """
+    rows: List[dict] = list(rows)
+    if not rows:
+        return 0
+
+    # A Core insert on the table (not the ORM bulk path) so the result carries a rowcount
+    stmt = _dialect_insert(db, model.__table__)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_nothing()
+    else:
+        stmt = insert(model.__table__)
+
+    result = db.execute(stmt, rows)
+    # Drivers that can't count executemany rows report -1
+    return result.rowcount if result.rowcount >= 0 else len(rows)
+
+
+def upsert(
+    db: Session,
+    model,
+    rows: Iterable[dict],
+    index_elements: List[str],
+    update_columns: List[str],
+    fill_columns: Optional[Dict[str, object]] = None,
+) -> int:
+    """Bulk insert rows, updating `update_columns` of rows that already exist
+
+    `fill_columns` maps columns to their "empty" value (None for NULL); those
+    are only written where the existing row has no value yet, so data that
+    is already there is never replaced.
+
+    Conflicts are detected on the unique `index_elements`. Does not commit.
+    Falls back to insert_ignore on dialects without ON CONFLICT support.
+    """
+    rows: List[dict] = list(rows)
+    if not rows:
+        return 0
+
+    stmt = _dialect_insert(db, model)
+    if stmt is None:
+        return insert_ignore(db, model, rows)
+
+    table = model.__table__
+    set_ = {column: stmt.excluded[column] for column in update_columns}
+    for column, empty in (fill_columns or {}).items():
+        existing = table.c[column] if empty is None else func.nullif(table.c[column], empty)
+        set_[column] = func.coalesce(existing, stmt.excluded[column])
+
+    stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    db.execute(stmt, rows)
+    return len(rows)
@@ -0,0 +1,105 @@
+"""
+Engine profiles: pool, driver and session settings per database backend.
+
+DATABASE_PROFILE selects one:
+
+    default  SQLAlchemy defaults (how engines were created before profiles existed)
+    tuned    SQLite: WAL journal, synchronous=NORMAL, mmap, a bigger page cache
+             and busy_timeout on every connection, so readers don't block on
+             the /my-games writer.
+             PostgreSQL: sized pool with pre-ping and recycle, a server-side
+             statement_timeout and, on the async engine, asyncpg's prepared
+             statement cache (set DB_PREPARED_STATEMENT_CACHE_SIZE=0 behind
+             PgBouncer in transaction mode). psycopg2 has no server-side
+             prepared statements, so the sync engine relies on SQLAlchemy's
+             compiled-statement cache.
+
+benchmarks/bench_db_profiles.py compares the profiles on concurrent read/write mixes.
+"""
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from ..config import settings
+
+PROFILES = ("default", "tuned")
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas() -> list:
+    """PRAGMAs run on every new SQLite connection of the tuned profile"""
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}",  # negative = KiB
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_mb) * 1024 * 1024}",
+    ]
+
+
+def _install_sqlite_pragmas(engine: Engine):
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def engine_options(url, profile: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine/create_async_engine"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}' (choose from {', '.join(PROFILES)})")
+
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options = {"echo": False}
+    connect_args = {}
+
+    if backend == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+    elif backend == "postgresql" and profile == "tuned":
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+            pool_pre_ping=True,
+        )
+        timeout_ms = int(settings.db_statement_timeout_ms)
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+            connect_args["prepared_statement_cache_size"] = settings.db_prepared_statement_cache_size
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def create_profiled_engine(url: str, profile: Optional[str] = None) -> Engine:
+    """Sync engine for `url` with the given (or configured) profile"""
+    profile = profile or settings.database_profile
+    engine = create_engine(url, **engine_options(url, profile))
+    if profile == "tuned" and _is_sqlite_file(engine.url):
+        _install_sqlite_pragmas(engine)
+    return engine
+
+
+def create_profiled_async_engine(url, profile: Optional[str] = None) -> AsyncEngine:
+    """Async engine for `url` (already using an async driver) with the given (or configured) profile"""
+    profile = profile or settings.database_profile
+    engine = create_async_engine(url, **engine_options(url, profile, is_async=True))
+    if profile == "tuned" and _is_sqlite_file(engine.url):
+        # Pool events live on the sync facade of the async engine
+        _install_sqlite_pragmas(engine.sync_engine)
+    return engine
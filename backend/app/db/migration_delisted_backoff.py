@@ -0,0 +1,64 @@
+"""
+Migration script to add per-game recheck backoff columns to delisted_games.
+
+This script:
+1. Adds recheck_count and next_check_at if they are missing
+2. Schedules the first recheck of existing rows one base interval after their last check
+
+It's safe to call multiple times - it checks for existing columns. It runs
+automatically on app startup.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from ..database import engine as default_engine
+from ..config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_delisted_backoff(engine: Engine = None) -> dict:
+    """Add the backoff columns to delisted_games if they don't exist yet"""
+    if engine is None:
+        engine = default_engine
+
+    inspector = inspect(engine)
+    if "delisted_games" not in inspector.get_table_names():
+        return {"added": []}
+
+    existing = {column["name"] for column in inspector.get_columns("delisted_games")}
+    added = []
+
+    with engine.begin() as conn:
+        if "recheck_count" not in existing:
+            conn.execute(text("ALTER TABLE delisted_games ADD COLUMN recheck_count INTEGER DEFAULT 0"))
+            added.append("recheck_count")
+        if "next_check_at" not in existing:
+            conn.execute(text("ALTER TABLE delisted_games ADD COLUMN next_check_at TIMESTAMP"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_delisted_games_next_check_at ON delisted_games (next_check_at)"))
+            added.append("next_check_at")
+
+    if "next_check_at" in added:
+        # Spread the first recheck of existing rows instead of making them all due at once
+        base_seconds = int(settings.delisted_recheck_base_hours * 3600)
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(
+                    "UPDATE delisted_games SET next_check_at = checked_at + make_interval(secs => :s) WHERE next_check_at IS NULL"
+                ), {"s": base_seconds})
+            else:
+                conn.execute(text(
+                    "UPDATE delisted_games SET next_check_at = datetime(checked_at, :offset) WHERE next_check_at IS NULL"
+                ), {"offset": f"+{base_seconds} seconds"})
+
+    if added:
+        logger.info(f"Added delisted_games columns: {', '.join(added)}")
+    return {"added": added}
+
+
+if __name__ == "__main__":
+    """Run migration when executed directly"""
+    logging.basicConfig(level=logging.INFO)
+    result = migrate_delisted_backoff()
+    print(f"Migration result: {result}")
@@ -0,0 +1,86 @@
+"""
+Migration script to store session token digests instead of full JWTs.
+
+This script:
+1. Adds sessions.token_hash (and an expires_at index for the purger) if missing
+2. Backfills token_hash = sha256(token) for existing rows in small batches
+3. Drops the legacy token column and its unique index
+
+Existing sessions keep working: clients still send the same JWT, which is
+looked up by its digest. It's safe to call multiple times - it checks for
+existing columns. It runs automatically on app startup.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from ..database import engine as default_engine
+from ..services.token_cache import hash_token
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_token_hashes(engine: Engine, batch_size: int = 1000) -> int:
+    """Fill token_hash from the legacy token column in batches"""
+    filled = 0
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, token FROM sessions WHERE token_hash IS NULL LIMIT :batch_size"
+            ), {"batch_size": batch_size}).fetchall()
+
+            if not rows:
+                break
+
+            conn.execute(
+                text("UPDATE sessions SET token_hash = :token_hash WHERE id = :id"),
+                [{"id": row.id, "token_hash": hash_token(row.token)} for row in rows]
+            )
+            filled += len(rows)
+
+        logger.info(f"sessions: hashed {filled} tokens so far")
+
+    return filled
+
+
+def migrate_session_token_hash(engine: Engine = None) -> dict:
+    """Replace sessions.token with sessions.token_hash"""
+    if engine is None:
+        engine = default_engine
+
+    inspector = inspect(engine)
+    if "sessions" not in inspector.get_table_names():
+        return {"hashed": 0, "dropped_token": False}
+
+    columns = {column["name"] for column in inspector.get_columns("sessions")}
+    indexes = {index["name"] for index in inspector.get_indexes("sessions")}
+
+    with engine.begin() as conn:
+        if "token_hash" not in columns:
+            conn.execute(text("ALTER TABLE sessions ADD COLUMN token_hash VARCHAR(64)"))
+        if "ix_sessions_expires_at" not in indexes:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)"))
+
+    if "token" not in columns:
+        return {"hashed": 0, "dropped_token": False}
+
+    hashed = backfill_token_hashes(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_sessions_token_hash ON sessions (token_hash)"))
+        # The legacy column is NOT NULL, so it has to go before new sessions can be inserted
+        conn.execute(text("DROP INDEX IF EXISTS ix_sessions_token"))
+        conn.execute(text("ALTER TABLE sessions DROP COLUMN token"))
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ALTER TABLE sessions ALTER COLUMN token_hash SET NOT NULL"))
+
+    logger.info(f"Migrated sessions to token digests: {hashed} tokens hashed, token column dropped")
+    return {"hashed": hashed, "dropped_token": True}
+
+
+if __name__ == "__main__":
+    """Run migration when executed directly"""
+    logging.basicConfig(level=logging.INFO)
+    result = migrate_session_token_hash()
+    print(f"Migration result: {result}")
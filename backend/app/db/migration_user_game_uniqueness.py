@@ -0,0 +1,130 @@
+"""
+Migration script to add unique (user_id, app_id) indexes to the per-user tables.
+
+This script:
+1. Removes duplicate (user_id, app_id) rows in small batches, keeping the newest row
+2. Creates the unique composite index (CONCURRENTLY on PostgreSQL, so writes keep flowing)
+3. Retries if new duplicates slipped in while the index was being built
+
+It's safe to call multiple times - tables that already have their index are
+skipped. app.main runs it on startup; on a large PostgreSQL database the first
+dedupe can take a while, so run it once by hand before deploying instead:
+
+    python -m app.db.migration_user_game_uniqueness
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from ..database import engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (table, index name) pairs covered by this migration
+UNIQUE_INDEXES = [
+    ("user_games", "ux_user_games_user_app"),
+    ("user_played_games", "ux_user_played_games_user_app"),
+]
+
+
+def dedupe_table(engine: Engine, table: str, batch_size: int = 1000) -> int:
+    """Delete duplicate (user_id, app_id) rows in batches, keeping the highest id"""
+    removed = 0
+
+    while True:
+        with engine.begin() as conn:
+            groups = conn.execute(text(f"""
+                SELECT user_id, app_id, MAX(id) AS keep_id
+                FROM {table}
+                GROUP BY user_id, app_id
+                HAVING COUNT(*) > 1
+                LIMIT :batch_size
+            """), {"batch_size": batch_size}).fetchall()
+
+            if not groups:
+                break
+
+            result = conn.execute(
+                text(f"DELETE FROM {table} WHERE user_id = :user_id AND app_id = :app_id AND id <> :keep_id"),
+                [{"user_id": g.user_id, "app_id": g.app_id, "keep_id": g.keep_id} for g in groups]
+            )
+            removed += result.rowcount if result.rowcount and result.rowcount > 0 else 0
+
+        logger.info(f"{table}: resolved {len(groups)} duplicate groups ({removed} rows removed so far)")
+
+    return removed
+
+
+def create_unique_index(engine: Engine, table: str, index_name: str):
+    """Create the unique (user_id, app_id) index without blocking writers where supported"""
+    if engine.dialect.name == "postgresql":
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table} (user_id, app_id)"
+            ))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table} (user_id, app_id)"
+            ))
+
+
+def drop_index(engine: Engine, index_name: str):
+    """Drop an index left behind by a failed build"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+
+def missing_unique_indexes(engine: Engine) -> list:
+    """(table, index name) pairs whose unique index doesn't exist yet"""
+    inspector = inspect(engine)
+    missing = []
+    for table, index_name in UNIQUE_INDEXES:
+        if not inspector.has_table(table):
+            continue
+        if index_name not in {index["name"] for index in inspector.get_indexes(table)}:
+            missing.append((table, index_name))
+    return missing
+
+
+def migrate_user_game_uniqueness(engine: Engine = None, batch_size: int = 1000, max_attempts: int = 5):
+    """
+    Dedupe per-user tables and add their unique (user_id, app_id) indexes.
+
+    Runs online: every dedupe batch is its own short transaction.
+    """
+    if engine is None:
+        engine = default_engine
+
+    summary = {}
+    for table, index_name in missing_unique_indexes(engine):
+        removed = 0
+        for attempt in range(1, max_attempts + 1):
+            removed += dedupe_table(engine, table, batch_size)
+            try:
+                create_unique_index(engine, table, index_name)
+                break
+            except DBAPIError as e:
+                # A concurrent writer re-introduced a duplicate - clean up and try again
+                logger.warning(f"{table}: index build failed (attempt {attempt}/{max_attempts}): {e}")
+                drop_index(engine, index_name)
+        else:
+            raise RuntimeError(f"Could not create {index_name} after {max_attempts} attempts")
+
+        logger.info(f"{table}: unique index {index_name} ready ({removed} duplicates removed)")
+        summary[table] = {"duplicates_removed": removed}
+
+    return summary
+
+
+if __name__ == "__main__":
+    """Run migration when executed directly"""
+    logging.basicConfig(level=logging.INFO)
+    result = migrate_user_game_uniqueness()
+    print(f"Migration result: {result}")
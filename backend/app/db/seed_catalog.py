@@ -0,0 +1,182 @@
+"""
+Seed the games catalog from a JSON dump (backend/data/games.json by default).
+
+The dump is a JSON array of game objects like the ones served by the API
+(app_id, name, image_url/header_image, playtime_hours, score, total_reviews,
+hltb_url). It is stream-parsed, so dumps larger than memory work too, and
+written with bulk upserts in a few large transactions - no Steam or HLTB calls.
+
+Usage (from backend/):
+    python -m app.db.seed_catalog [path/to/games.json] [--batch-size 5000] [--insert-only]
+"""
+
+import argparse
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+from sqlalchemy.orm import Session
+from ..models import Game
+from ..database import SessionLocal
+from .bulk import insert_ignore, upsert
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUMP_PATH = Path(__file__).parent.parent.parent / "data" / "games.json"
+
+# Columns the dump fills in when a game already exists, with the value that counts as empty.
+# Values already present (e.g. written by the catalog refresher) are newer than any dump and
+# are kept, and so is updated_at, so the refresher's staleness checks stay correct.
+FILL_COLUMNS = {
+    "name": "",
+    "header_image": "",
+    "playtime_hours": None,
+    "score": 0,
+    "total_reviews": 0,
+    "hltb_url": None,
+}
+
+
+def iter_json_array(path: Path, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    """Yield the elements of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    with open(path, "r", encoding="utf-8") as f:
+        eof = False
+        while True:
+            if not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+
+            pos = 0
+            while True:
+                # Skip whitespace and separators between elements
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if not started:
+                    if pos >= len(buffer):
+                        break
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{path} does not contain a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if pos < len(buffer) and buffer[pos] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Element continues in the next chunk
+                    break
+                yield item
+                pos = end
+
+            buffer = buffer[pos:]
+            if eof:
+                if buffer.strip():
+                    raise ValueError(f"Truncated JSON array in {path}")
+                return
+
+
+def dump_record_to_row(record: dict, now: datetime) -> Optional[dict]:
+    """Map a dump record to a games row, or None if it lacks the essentials"""
+    app_id = record.get("app_id")
+    name = record.get("name")
+    if not app_id or not name:
+        return None
+    return {
+        "app_id": int(app_id),
+        "name": name,
+        "header_image": record.get("header_image") or record.get("image_url") or "",
+        "playtime_hours": record.get("playtime_hours"),
+        "score": record.get("score") or 0,
+        "total_reviews": record.get("total_reviews") or 0,
+        "hltb_url": record.get("hltb_url"),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def seed_catalog(path: Optional[Path] = None, batch_size: int = 5000, insert_only: bool = False, db: Session = None) -> dict:
+    """
+    Bulk-load a games dump into the catalog.
+
+    Each batch is one transaction. Existing games only get the columns they
+    are missing filled in from the dump (their other values and updated_at
+    are kept); with insert_only they are left untouched.
+    """
+    path = Path(path) if path else DEFAULT_DUMP_PATH
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
+
+    now = datetime.utcnow()
+    written = 0
+    skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        if insert_only:
+            written += insert_ignore(db, Game, batch)
+        else:
+            written += upsert(db, Game, batch, index_elements=["app_id"], update_columns=[], fill_columns=FILL_COLUMNS)
+        db.commit()
+        logger.info(f"💾 Seeded {written} games so far")
+        batch.clear()
+
+    try:
+        for record in iter_json_array(path):
+            row = dump_record_to_row(record, now)
+            if row is None:
+                skipped += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        logger.info(f"✅ Catalog seeding from {path} complete: {written} written, {skipped} skipped")
+        return {"written": written, "skipped": skipped}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Catalog seeding failed: {e}")
+        raise
+    finally:
+        if owns_session:
+            db.close()
+
+
+def seed_catalog_if_empty(path: Optional[Path] = None) -> Optional[dict]:
+    """Seed the catalog only when the games table is empty (cold deployment)"""
+    db = SessionLocal()
+    try:
+        if db.query(Game.id).first() is not None:
+            logger.info("📦 Games table already populated - skipping catalog seeding")
+            return None
+        return seed_catalog(path, db=db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    """Run seeding when executed directly"""
+    parser = argparse.ArgumentParser(description="Seed the games catalog from a JSON dump")
+    parser.add_argument("path", nargs="?", default=str(DEFAULT_DUMP_PATH))
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--insert-only", action="store_true", help="skip games that already exist instead of filling in their missing data")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from ..models import Base
+    from ..database import engine
+    Base.metadata.create_all(bind=engine)
+
+    result = seed_catalog(args.path, batch_size=args.batch_size, insert_only=args.insert_only)
+    print(f"Seeding result: {result}")
@@ -7,11 +7,19 @@ from .routes.games import router as games_router
 from .routes.auth import router as auth_router
 from .routes.played_games import router as played_games_router
 from .routes.preferences import router as preferences_router
-from .database import engine
-from .models import Base
 from .services.health_monitor import get_health_monitor
+from .services.http_client import http_client_pool
+from .services.circuit_breaker import circuit_breakers, OPEN
+from .services.hltb_cache import HLTB_BREAKER
+from .services.game_service import game_service
+from .services.catalog_refresher import catalog_refresher
+from .services.session_purger import session_purger
+from .services.profile_refresher import profile_refresher
+from .db.seed_catalog import seed_catalog_if_empty
+from .db.bootstrap import init_database
 import logging
 from datetime import datetime
+from urllib.parse import urlsplit
 
 # Version identifier for deployment tracking
 APP_VERSION = "2025-11-24-v1.0.0"
@@ -25,22 +33,49 @@ logger.info(f"🚀 FastAPI app initialized - VERSION: {APP_VERSION}")
 logger.info(f"📍 APP_URL configured as: {settings.app_url}")
 logger.info(f"🔑 STEAM_API_KEY set: {'Yes' if settings.steam_api_key else 'No'}")
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and run the startup migrations
+init_database()
 
 # Health monitor lifecycle
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Every upstream shows up in /health from the start, not only after its first call
+    circuit_breakers.register([
+        urlsplit(settings.steam_store_base_url).netloc,
+        urlsplit(settings.steam_api_base_url).netloc,
+        HLTB_BREAKER,
+    ])
+    
+    if settings.seed_catalog_on_startup:
+        result = seed_catalog_if_empty(settings.seed_catalog_path or None)
+        if result:
+            logger.info(f"📦 Catalog seeded on startup: {result['written']} games")
+            game_service.load_games()
+    
+    logger.info(f"🔌 HTTP client pool: {settings.http_max_connections_per_host} connections/host, HTTP/2 {'on' if settings.http2_enabled else 'off'}")
+    await http_client_pool.start([
+        settings.steam_api_base_url,
+        settings.steam_store_base_url,
+        settings.steam_openid_url,
+        settings.hltb_base_url,
+    ])
     health_monitor = get_health_monitor(settings.app_url, interval_minutes=10)
     await health_monitor.start()
     logger.info("🏥 Health monitor iniciado - Ping cada 10 minutos")
+    await catalog_refresher.start()
+    await session_purger.start()
+    await profile_refresher.start()
     
     yield
     
     # Shutdown
+    await profile_refresher.stop()
+    await session_purger.stop()
+    await catalog_refresher.stop()
     await health_monitor.stop()
     logger.info("🏥 Health monitor detenido")
+    await http_client_pool.aclose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -66,12 +101,18 @@ async def health_check():
     hours = int(uptime_seconds // 3600)
     minutes = int((uptime_seconds % 3600) // 60)
     
+    # Upstream outages degrade the service but don't make it unhealthy
+    upstreams = circuit_breakers.snapshot()
+    degraded = any(breaker["state"] == OPEN for breaker in upstreams.values())
+    
     return {
         "status": "ok",
+        "degraded": degraded,
         "service": "Steam Priority Picker API",
         "version": "0.1.0",
         "uptime_seconds": int(uptime_seconds),
-        "uptime_formatted": f"{hours}h {minutes}m"
+        "uptime_formatted": f"{hours}h {minutes}m",
+        "upstreams": upstreams
     }
 
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -66,6 +66,11 @@ class UserGame(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # One row per user and game (existing databases: see db/migration_user_game_uniqueness.py)
+    __table_args__ = (
+        Index("ux_user_games_user_app", "user_id", "app_id", unique=True),
+    )
+    
     def to_dict(self, game: 'Game' = None):
         """Convert to dictionary for API responses"""
         return {
@@ -98,15 +103,20 @@ class Favorite(Base):
 
 
 class Session(Base):
-    """User session tracking"""
+    """User session tracking
+    
+    Only the SHA-256 of the JWT is stored, so the lookup index holds
+    fixed-length 64-character keys. Expired and logged-out rows are deleted by
+    the session purger.
+    """
     __tablename__ = "sessions"
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    token = Column(String(500), unique=True, nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False, index=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     
     def __repr__(self):
         return f"<Session user={self.user_id}>"
@@ -117,12 +127,15 @@ class DelistedGame(Base):
     
     This prevents repeated Steam API calls for games that have been delisted,
     improving performance on subsequent fetches of the same user's library.
+    Each game is rechecked on its own exponential backoff schedule.
     """
     __tablename__ = "delisted_games"
     
     id = Column(Integer, primary_key=True)
     app_id = Column(Integer, unique=True, nullable=False, index=True)
     checked_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    recheck_count = Column(Integer, default=0)  # Rechecks that found the game still delisted
+    next_check_at = Column(DateTime, nullable=True, index=True)  # NULL = due now
     
     def __repr__(self):
         return f"<DelistedGame app_id={self.app_id}>"
@@ -138,10 +151,10 @@ class UserPlayedGame(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Composite index for efficient lookups
+    # Composite index for fast user_id + app_id lookups, one row per user and game
+    # (existing databases: see db/migration_user_game_uniqueness.py)
     __table_args__ = (
-        # Index for fast user_id + app_id lookups
-        None,
+        Index("ux_user_played_games_user_app", "user_id", "app_id", unique=True),
     )
     
     def __repr__(self):
@@ -200,3 +213,31 @@ class UserPreferences(Base):
     
     def __repr__(self):
         return f"<UserPreferences user={self.user_id}>"
+
+
+class EnrichmentJob(Base):
+    """Queued enrichment of a game missing from the catalog (consumed by app.worker)
+    
+    A worker claims pending jobs by taking a lease (lease_owner/lease_expires_at)
+    and extends it with heartbeats while it works; jobs whose lease expired are
+    claimed again. Failed attempts are retried after run_after with backoff.
+    """
+    __tablename__ = "enrichment_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    app_id = Column(Integer, unique=True, nullable=False, index=True)  # one job per game
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_owner = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_enrichment_jobs_status_run_after", "status", "run_after"),
+    )
+    
+    def __repr__(self):
+        return f"<EnrichmentJob app_id={self.app_id} status={self.status}>"
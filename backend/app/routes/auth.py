@@ -3,11 +3,15 @@ Authentication routes
 """
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, Header
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncReadSessionLocal, AsyncSessionLocal, get_async_db
 from ..services.auth_service import SteamAuthService
+from ..services.read_routing import read_router
+from ..services.token_cache import AuthenticatedUser
 from ..models import User
 from ..config import settings
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +27,7 @@ async def login():
 @router.get("/callback")
 async def auth_callback(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Steam OAuth callback endpoint"""
     
@@ -50,36 +54,76 @@ async def auth_callback(
     logger.info(f"Steam profile fetched: {steam_profile['username']}")
     
     # Create or update user
-    user = auth_service.create_or_update_user(db, steam_profile)
+    user = await db.run_sync(auth_service.create_or_update_user, steam_profile)
     logger.info(f"User {user.username} created/updated")
     
     # Create session
-    token, session = auth_service.create_session(db, user)
+    token, session = await db.run_sync(auth_service.create_session, user)
     
     # Redirect to frontend with token
     return RedirectResponse(url=f"{settings.app_url}?token={token}")
 
-@router.get("/user")
-async def get_user_info(
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Token from an "Authorization: Bearer <token>" header, or None if it is missing/malformed"""
+    if not authorization:
+        return None
+    parts = authorization.split(" ")
+    if len(parts) < 2 or not parts[1]:
+        return None
+    return parts[1]
+
+
+async def get_optional_user(
     authorization: str = Header(None),
-    db: Session = Depends(get_db)
-):
-    """Get current authenticated user"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[AuthenticatedUser]:
+    """Dependency for the authenticated user, or None for anonymous/invalid requests"""
+    token = _bearer_token(authorization)
+    if not token:
+        return None
+    return await auth_service.verify_token_async(db, token)
+
+
+async def get_current_user(
+    authorization: str = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedUser:
+    """Dependency for getting current authenticated user (raises 401 otherwise)"""
     
     if not authorization:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    # Extract token from "Bearer <token>"
-    try:
-        token = authorization.split(" ")[1]
-    except IndexError:
+    token = _bearer_token(authorization)
+    if not token:
         raise HTTPException(status_code=401, detail="Invalid authorization header")
     
-    user = auth_service.verify_token(db, token)
+    user = await auth_service.verify_token_async(db, token)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
+    return user
+
+
+async def get_read_db(
+    user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Dependency for a session for read-only queries: the replica, unless the user
+    wrote recently or the replica lags (see services/read_routing.py)
+
+    Reuses the route's own get_current_user (FastAPI resolves it once per request),
+    so the token is verified once and no extra primary session is opened.
+    """
+    use_primary = await read_router.use_primary(user.id)
+    async with (AsyncSessionLocal if use_primary else AsyncReadSessionLocal)() as db:
+        yield db
+
+@router.get("/user")
+async def get_user_info(
+    user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Get current authenticated user"""
+    
     return {
         "id": user.id,
         "steam_id": user.steam_id,
@@ -88,45 +132,21 @@ async def get_user_info(
         "profile_url": user.profile_url,
     }
 
-
-async def get_current_user(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db)
-):
-    """Dependency for getting current authenticated user (returns User object)"""
-    
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    # Extract token from "Bearer <token>"
-    try:
-        token = authorization.split(" ")[1]
-    except IndexError:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    user = auth_service.verify_token(db, token)
-    
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    return user
-
 @router.post("/logout")
 async def logout(
     authorization: str = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Logout user"""
     
     if not authorization:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    try:
-        token = authorization.split(" ")[1]
-    except IndexError:
+    token = _bearer_token(authorization)
+    if not token:
         raise HTTPException(status_code=401, detail="Invalid authorization header")
     
-    success = auth_service.logout_user(db, token)
+    success = await db.run_sync(auth_service.logout_user, token)
     
     if not success:
         raise HTTPException(status_code=400, detail="Logout failed")
@@ -135,31 +155,17 @@ async def logout(
 
 @router.get("/stats/users-count")
 async def get_users_count(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get total number of registered users (admin only)"""
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    # Extract token from "Bearer <token>"
-    try:
-        token = authorization.split(" ")[1]
-    except IndexError:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    user = auth_service.verify_token(db, token)
-    
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
     # Check if user is admin (compare with ADMIN_ID from config)
     if str(user.steam_id) != settings.admin_steam_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Count total users
-    total_users = db.query(User).count()
+    total_users = await db.scalar(select(func.count(User.id)))
     
     return {
         "total_users": total_users
@@ -167,22 +173,10 @@ async def get_users_count(
 
 @router.get("/is-admin")
 async def is_admin(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db)
+    user: Optional[AuthenticatedUser] = Depends(get_optional_user)
 ):
     """Check if current user is admin"""
     
-    if not authorization:
-        return {"is_admin": False}
-    
-    # Extract token from "Bearer <token>"
-    try:
-        token = authorization.split(" ")[1]
-    except IndexError:
-        return {"is_admin": False}
-    
-    user = auth_service.verify_token(db, token)
-    
     if not user:
         return {"is_admin": False}
     
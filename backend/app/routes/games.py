@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Query, Header, HTTPException, Depends
+from fastapi import APIRouter, Query, HTTPException, Depends
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..schemas.game import GameResponse, GameListResponse
 from ..services.game_service import game_service
 from ..services.auth_service import SteamAuthService
-from ..database import get_db
-from ..models import User, UserPreferences, UserPlayedGame
-from .auth import get_current_user
+from ..services.token_cache import AuthenticatedUser
+from ..services.preferences_cache import preferences_cache
+from ..services.library_views import LibraryFilter, library_views
+from ..database import SessionLocal, get_async_db
+from ..db.bulk import insert_ignore
+from ..services.enrichment_queue import enrichment_queue, save_enriched_games
+from ..config import settings
+from ..models import UserPlayedGame
+from .auth import get_current_user, get_read_db
 import logging
 import time
 
@@ -33,7 +40,6 @@ async def get_game(app_id: int):
     """Get a specific game by app_id"""
     game = game_service.get_game_by_id(app_id)
     if not game:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail=f"Game with app_id {app_id} not found")
     return game
 
@@ -66,8 +72,8 @@ async def search_games(
 
 @router.get("/search-with-preferences", response_model=GameListResponse)
 async def search_games_with_preferences(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
     q: Optional[str] = Query(None, min_length=1),
     playtime_min: Optional[float] = Query(None, ge=0),
     playtime_max: Optional[float] = Query(None, ge=0),
@@ -82,42 +88,48 @@ async def search_games_with_preferences(
 ):
     """Search and filter games using user's saved preferences as defaults"""
     
-    # Get user's preferences
-    preferences = db.query(UserPreferences).filter(
-        UserPreferences.user_id == current_user.id
-    ).first()
+    # Get user's preferences (cached per worker)
+    preferences = await preferences_cache.load(db, current_user.id)
+    saved = LibraryFilter.from_preferences(preferences)
     
     # Use query parameters if provided, otherwise use preferences, otherwise use defaults
-    final_playtime_min = playtime_min if playtime_min is not None else (preferences.playtime_min if preferences else 0)
-    final_playtime_max = playtime_max if playtime_max is not None else (preferences.playtime_max if preferences else 1000)
-    final_score_min = score_min if score_min is not None else (preferences.score_min if preferences else 0)
-    final_score_max = score_max if score_max is not None else (preferences.score_max if preferences else 100)
-    final_show_played = show_played_games if show_played_games is not None else (preferences.show_played_games if preferences else True)
-    final_show_unplayed = show_unplayed_games if show_unplayed_games is not None else (preferences.show_unplayed_games if preferences else True)
-    final_sort_by = sort_by if sort_by is not None else (preferences.sort_by if preferences else "name")
-    final_sort_order = sort_order if sort_order is not None else (preferences.sort_order if preferences else "asc")
-    final_limit = limit if limit is not None else (preferences.items_per_page if preferences else 24)
+    library_filter = LibraryFilter(
+        playtime_min=playtime_min if playtime_min is not None else saved.playtime_min,
+        playtime_max=playtime_max if playtime_max is not None else saved.playtime_max,
+        score_min=score_min if score_min is not None else saved.score_min,
+        score_max=score_max if score_max is not None else saved.score_max,
+        show_played_games=show_played_games if show_played_games is not None else saved.show_played_games,
+        show_unplayed_games=show_unplayed_games if show_unplayed_games is not None else saved.show_unplayed_games,
+        sort_by=sort_by if sort_by is not None else saved.sort_by,
+        sort_order=sort_order if sort_order is not None else saved.sort_order,
+    )
+    final_limit = limit if limit is not None else (preferences["items_per_page"] if preferences else 24)
     
-    # Get user's played games for filtering
-    played_games = db.query(UserPlayedGame.app_id).filter(
-        UserPlayedGame.user_id == current_user.id
-    ).all()
-    played_game_ids = {game.app_id for game in played_games}
+    # User's played games for filtering
+    async def load_played_game_ids():
+        return set(await db.scalars(
+            select(UserPlayedGame.app_id).where(UserPlayedGame.user_id == current_user.id)
+        ))
     
-    games, total = game_service.search_games(
-        query=q,
-        playtime_min=final_playtime_min,
-        playtime_max=final_playtime_max,
-        score_min=final_score_min,
-        score_max=final_score_max,
-        limit=final_limit,
-        offset=offset,
-        show_played_games=final_show_played,
-        show_unplayed_games=final_show_unplayed,
-        played_game_ids=played_game_ids,
-        sort_by=final_sort_by,
-        sort_order=final_sort_order
-    )
+    if settings.library_views_enabled and q is None and library_filter == saved:
+        # The user's saved view: the played write paths keep it current, so the played set is only read to (re)build it
+        games, total = await library_views.saved_page(current_user.id, library_filter, load_played_game_ids, offset, final_limit)
+    else:
+        played_game_ids = await load_played_game_ids()
+        games, total = game_service.search_games(
+            query=q,
+            playtime_min=library_filter.playtime_min,
+            playtime_max=library_filter.playtime_max,
+            score_min=library_filter.score_min,
+            score_max=library_filter.score_max,
+            limit=final_limit,
+            offset=offset,
+            show_played_games=library_filter.show_played_games,
+            show_unplayed_games=library_filter.show_unplayed_games,
+            played_game_ids=played_game_ids,
+            sort_by=library_filter.sort_by,
+            sort_order=library_filter.sort_order
+        )
     
     return {
         "total": total,
@@ -161,8 +173,8 @@ async def get_stats():
 
 @router.get("/my-games")
 async def get_my_games(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db)
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get authenticated user's games from Steam library with personal playtime"""
     from ..models import UserGame, Game as GameModel
@@ -170,24 +182,31 @@ async def get_my_games(
     start_time = time.time()
     logger.debug("⏱️ ========== START /my-games request ==========")
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    try:
-        token = authorization.split(" ")[1]
-    except IndexError:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    # Verify token and get user
-    user = auth_service.verify_token(db, token)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
     logger.debug(f"Fetching games for user: {user.username} (Steam ID: {user.steam_id})")
     
     # Get user's owned games from Steam API
     owned_games_data = await auth_service.get_user_owned_games(user.steam_id)
     
+    if not owned_games_data and auth_service.steam_api_breaker.is_open():
+        # Steam Web API is down - serve the library stored on the last successful sync
+        stored = (await db.execute(
+            select(UserGame, GameModel).join(GameModel, GameModel.app_id == UserGame.app_id).where(
+                UserGame.user_id == user.id
+            )
+        )).all()
+        if stored:
+            logger.warning(f"🔌 Steam Web API unavailable - serving {len(stored)} stored games for {user.steam_id}")
+            games = []
+            for user_game, game in stored:
+                game_dict = game.to_dict()
+                game_dict["playtime_hours"] = user_game.playtime_hours
+                games.append(game_dict)
+            return {
+                "total": len(games),
+                "games": games,
+                "message": "Steam is unavailable - showing your last synced library"
+            }
+    
     if not owned_games_data:
         logger.warning(f"Could not fetch games for {user.steam_id}")
         return {
@@ -205,7 +224,9 @@ async def get_my_games(
     logger.debug(f"User owns {len(owned_app_ids)} games")
     
     # Find unknown games - query DB directly
-    known_games = db.query(GameModel.app_id, GameModel.name).filter(GameModel.app_id.in_(list(owned_app_ids.keys()))).all()
+    known_games = (await db.execute(
+        select(GameModel.app_id, GameModel.name).where(GameModel.app_id.in_(list(owned_app_ids.keys())))
+    )).all()
     known_app_ids = {g.app_id for g in known_games}
     games_with_generic_names = {g.app_id for g in known_games if g.name.startswith("Game ")}
     
@@ -214,107 +235,82 @@ async def get_my_games(
     
     logger.debug(f"Found {len(known_app_ids)} known games, {len(unknown_app_ids)} unknown/generic games ({len(games_with_generic_names)} with generic names)")
     
+    # In worker mode, unknown games are queued for app.worker instead of fetched here
+    queued_count = 0
+    if unknown_app_ids and settings.enrichment_mode == "worker":
+        queued_count = await db.run_sync(enrichment_queue.enqueue, unknown_app_ids)
+        logger.info(f"📥 Queued {queued_count} unknown games for the enrichment worker")
+        unknown_app_ids = []
+    
     # Fetch and save unknown games FIRST (process in batches of 50 to avoid timeouts)
+    saved_app_ids = set()
     if unknown_app_ids:
         logger.debug(f"Found {len(unknown_app_ids)} unknown games - processing in batches of 50...")
         
-        # Process all unknown games in batches of 50
-        for batch_start in range(0, len(unknown_app_ids), 50):
-            batch_end = min(batch_start + 50, len(unknown_app_ids))
-            unknown_app_ids_to_fetch = unknown_app_ids[batch_start:batch_end]
-            logger.debug(f"Fetching batch {batch_start//50 + 1}: games {batch_start+1}-{batch_end} of {len(unknown_app_ids)}...")
-            
-            unknown_games = await auth_service.fetch_unknown_games_info(unknown_app_ids_to_fetch, db)
-            
-            if unknown_games:
-                # Insert games directly into database in a separate transaction
-                games_added = 0
-                logger.debug(f"Processing {len(unknown_games)} unknown games from Steam API (batch {batch_start//50 + 1})")
+        # The delisted registry inside fetch_unknown_games_info works on a sync session
+        enrichment_db = SessionLocal()
+        try:
+            # Process all unknown games in batches of 50
+            for batch_start in range(0, len(unknown_app_ids), 50):
+                batch_end = min(batch_start + 50, len(unknown_app_ids))
+                unknown_app_ids_to_fetch = unknown_app_ids[batch_start:batch_end]
+                logger.debug(f"Fetching batch {batch_start//50 + 1}: games {batch_start+1}-{batch_end} of {len(unknown_app_ids)}...")
+                
+                unknown_games = await auth_service.fetch_unknown_games_info(unknown_app_ids_to_fetch, enrichment_db)
                 
-                for game_data in unknown_games:
-                    try:
-                        app_id = game_data.get("app_id")
-                        new_name = game_data.get("name", "Unknown")
-                        logger.debug(f"Processing game: app_id={app_id}, name={new_name}")
-                        
-                        # Check if already exists
-                        existing = db.query(GameModel).filter(GameModel.app_id == app_id).first()
-                        if existing:
-                            # Game already exists in database, skip
-                            logger.debug(f"Game {app_id} already in database, skipping")
-                            continue
-                        
-                        game = GameModel(
-                            app_id=app_id,
-                            name=new_name,
-                            header_image=game_data.get("header_image", ""),
-                            playtime_hours=game_data.get("playtime_hours", 0),
-                            score=game_data.get("score", 0),
-                            total_reviews=game_data.get("total_reviews", 0),
-                            hltb_url=game_data.get("hltb_url")
-                        )
-                        db.add(game)
-                        games_added += 1
-                        logger.debug(f"✅ Added game {app_id} to session")
-                    except Exception as e:
-                        logger.error(f"❌ Error processing game {game_data.get('app_id')}: {e}", exc_info=True)
-                        continue
+                if unknown_games:
+                    # Insert games in one statement; rows another request inserted meanwhile are skipped
+                    logger.debug(f"Processing {len(unknown_games)} unknown games from Steam API (batch {batch_start//50 + 1})")
+                    new_games = [game_data for game_data in unknown_games if game_data.get("app_id") not in known_app_ids]
+                    
+                    if new_games:
+                        try:
+                            logger.debug(f"Committing {len(new_games)} games to database (batch {batch_start//50 + 1})...")
+                            await db.run_sync(save_enriched_games, new_games)
+                            await db.commit()
+                            saved_app_ids.update(game_data["app_id"] for game_data in new_games)
+                            logger.debug(f"✅ Successfully committed {len(new_games)} games")
+                        except Exception as e:
+                            logger.error(f"❌ Failed to commit games (batch {batch_start//50 + 1}): {e}", exc_info=True)
+                            await db.rollback()
+                            raise
                 
-                if games_added > 0:
-                    # COMMIT the games in a fresh transaction
-                    try:
-                        logger.debug(f"Committing {games_added} games to database (batch {batch_start//50 + 1})...")
-                        db.commit()
-                        logger.debug(f"✅ Successfully committed {games_added} games")
-                        
-                        # Verify games were actually saved
-                        for game_data in unknown_games:
-                            app_id = game_data.get("app_id")
-                            verified = db.query(GameModel).filter(GameModel.app_id == app_id).first()
-                            if verified:
-                                logger.debug(f"✅ Verified game {app_id} is in database")
-                            else:
-                                logger.error(f"❌ VERIFICATION FAILED: Game {app_id} NOT found in database after commit!")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to commit games (batch {batch_start//50 + 1}): {e}", exc_info=True)
-                        db.rollback()
-                        raise
-            
-            logger.debug(f"✅ Batch {batch_start//50 + 1} complete")
+                logger.debug(f"✅ Batch {batch_start//50 + 1} complete")
+        finally:
+            enrichment_db.close()
     
     # NOW create user_game records ONLY for games that exist in the database
     # Use a single efficient query to get all games at once instead of looping
     user_games_response = []
     
-    # Get ALL games from database in ONE query (much faster than looping)
-    all_games = db.query(GameModel).all()
-    games_by_app_id = {g.app_id: g for g in all_games}
+    # Get the owned games from database in ONE query (much faster than looping)
+    owned_games = await db.scalars(select(GameModel).where(GameModel.app_id.in_(list(owned_app_ids.keys()))))
+    games_by_app_id = {g.app_id: g for g in owned_games}
     
-    logger.debug(f"Games table has {len(games_by_app_id)} games total")
+    # Newly enriched games go into the in-memory catalog as a logged change, so library views merge them in
+    if saved_app_ids and game_service.games:
+        game_service.add_cached_games([games_by_app_id[aid].to_dict() for aid in saved_app_ids if aid in games_by_app_id])
+    
+    logger.debug(f"Found {len(games_by_app_id)} of the owned games in the database")
     
     # Only process games that actually exist in the database
     valid_app_ids = [aid for aid in owned_app_ids.keys() if aid in games_by_app_id]
     logger.debug(f"User has {len(valid_app_ids)} games that exist in database, {len(owned_app_ids) - len(valid_app_ids)} delisted/not found")
     
+    # Existing user_game records in one query; new ones are inserted in bulk
+    existing_user_games = {
+        ug.app_id: ug for ug in await db.scalars(select(UserGame).where(UserGame.user_id == user.id))
+    }
+    new_user_games = []
+    
     for app_id in valid_app_ids:
         playtime_hours = owned_app_ids[app_id]
         game = games_by_app_id[app_id]  # Already fetched above
         
-        
-        # Get or create user_game record
-        user_game = db.query(UserGame).filter(
-            UserGame.user_id == user.id,
-            UserGame.app_id == app_id
-        ).first()
-        
+        user_game = existing_user_games.get(app_id)
         if not user_game:
-            user_game = UserGame(
-                user_id=user.id,
-                app_id=app_id,
-                playtime_hours=playtime_hours
-            )
-            db.add(user_game)
-        else:
+            new_user_games.append({"user_id": user.id, "app_id": app_id, "playtime_hours": playtime_hours})
+        elif user_game.playtime_hours != playtime_hours:
             # Update playtime if changed
             user_game.playtime_hours = playtime_hours
         
@@ -328,12 +324,14 @@ async def get_my_games(
     # Commit all user_game changes only if there are games to add
     if user_games_response:
         try:
-            logger.debug(f"Committing {len(user_games_response)} user_game records...")
-            db.commit()
+            logger.debug(f"Committing {len(user_games_response)} user_game records ({len(new_user_games)} new)...")
+            # A concurrent request for the same user may have inserted some of these already
+            await db.run_sync(insert_ignore, UserGame, new_user_games)
+            await db.commit()
             logger.info(f"✅ Successfully committed {len(user_games_response)} user_game records")
         except Exception as e:
             logger.error(f"❌ Failed to commit user_game records: {e}", exc_info=True)
-            db.rollback()
+            await db.rollback()
             # Return with games from response even if DB commit failed
             # (games are valid, just DB insert had issues)
             logger.warning(f"⚠️ Returning {len(user_games_response)} games despite DB commit error")
@@ -357,11 +355,14 @@ async def get_my_games(
     logger.info(f"⏱️ ========== END /my-games request - Took {elapsed_time:.2f}s ==========")
     
     # Get actual count from database (not cached)
-    actual_db_total = db.query(GameModel).count()
+    actual_db_total = await db.scalar(select(func.count(GameModel.id)))
     
-    return {
+    response = {
         "total": len(user_games_response),
         "games": user_games_response,
         "db_total": actual_db_total  # Real count from database
     }
+    if queued_count:
+        response["queued"] = queued_count  # games still being fetched by the enrichment worker
+    return response
 
@@ -1,114 +1,187 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import delete
-from typing import List
+from sqlalchemy import delete, select
+from typing import Iterable, List
 import logging
-from ..models import UserPlayedGame, User
-from ..database import get_db
-from .auth import get_current_user
+from ..models import UserPlayedGame
+from ..services.token_cache import AuthenticatedUser
+from ..services.read_routing import read_router
+from ..services.library_views import library_views
+from ..database import get_async_db
+from ..db.bulk import insert_ignore
+from .auth import get_current_user, get_read_db
 
 logger = logging.getLogger(__name__)
 
-# Request model
+# Request models
 class SyncPlayedGamesRequest(BaseModel):
     app_ids: List[int]
 
+class PatchPlayedGamesRequest(BaseModel):
+    add: List[int] = []
+    remove: List[int] = []
+
 router = APIRouter(prefix="/api/played-games", tags=["played-games"])
 
 
 @router.get("/")
 async def get_played_games(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all app_ids of games marked as played by the current user"""
     try:
-        played_games = db.query(UserPlayedGame.app_id).filter(
-            UserPlayedGame.user_id == current_user.id
-        ).all()
+        played_games = await db.scalars(
+            select(UserPlayedGame.app_id).where(UserPlayedGame.user_id == current_user.id)
+        )
         
         # Return as list of integers
-        app_ids = [game.app_id for game in played_games]
+        app_ids = list(played_games)
         return {"played_games": app_ids}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _apply_played_delta(db: Session, user_id: int, add: Iterable[int], remove: Iterable[int]) -> tuple[int, int]:
+    """Apply a played-games delta with one bulk insert and one bulk delete (does not commit)
+    
+    Takes a sync Session; async routes call it through AsyncSession.run_sync.
+    """
+    to_remove = set(remove)
+    to_add = set(add) - to_remove
+    
+    removed = 0
+    if to_remove:
+        removed = db.execute(
+            delete(UserPlayedGame).where(
+                UserPlayedGame.user_id == user_id,
+                UserPlayedGame.app_id.in_(to_remove)
+            )
+        ).rowcount
+    
+    added = insert_ignore(
+        db,
+        UserPlayedGame,
+        [{"user_id": user_id, "app_id": app_id} for app_id in to_add]
+    )
+    return added, removed
+
+
 @router.post("/")
 async def sync_played_games(
     request: SyncPlayedGamesRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Sync played games status from client.
     Replaces all played games with the provided list.
     
+    Only the difference against the stored list is written, so re-syncing an
+    unchanged list costs a single read.
+    
     Request body: {"app_ids": [123456, 789012, ...]}
     """
     try:
-        logger.info(f"Syncing played games for user {current_user.id}: {request.app_ids}")
         app_ids = request.app_ids
+        logger.debug(f"Syncing played games for user {current_user.id}: {app_ids}")
         
-        if not isinstance(app_ids, list):
-            raise HTTPException(status_code=400, detail="app_ids must be a list")
-        
-        # Delete all existing played games for this user
-        deleted_count = db.query(UserPlayedGame).filter(
-            UserPlayedGame.user_id == current_user.id
-        ).delete(synchronize_session=False)
-        logger.info(f"Deleted {deleted_count} played games for user {current_user.id}")
+        wanted = set(app_ids)
+        existing = set(await db.scalars(
+            select(UserPlayedGame.app_id).where(UserPlayedGame.user_id == current_user.id)
+        ))
         
-        # Add new played games
-        for app_id in app_ids:
-            if isinstance(app_id, int):
-                played_game = UserPlayedGame(
-                    user_id=current_user.id,
-                    app_id=app_id
-                )
-                db.add(played_game)
+        added, removed = await db.run_sync(
+            _apply_played_delta,
+            current_user.id,
+            add=wanted - existing,
+            remove=existing - wanted
+        )
         
-        db.commit()
-        logger.info(f"Successfully synced {len(app_ids)} played games for user {current_user.id}")
+        await db.commit()
+        await read_router.record_write(current_user.id)
+        await library_views.played_changed(current_user.id, added=wanted - existing, removed=existing - wanted)
+        logger.info(f"Synced {len(wanted)} played games for user {current_user.id} (+{added} / -{removed})")
         return {
             "status": "success",
             "message": f"Synced {len(app_ids)} played games",
             "app_ids": app_ids
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error syncing played games for user {current_user.id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.patch("/")
+async def patch_played_games(
+    request: PatchPlayedGamesRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Apply an incremental change to the played games list.
+    
+    Request body: {"add": [123456, ...], "remove": [789012, ...]}
+    An app_id present in both lists is removed.
+    """
+    try:
+        to_add = set(request.add)
+        if to_add:
+            # Skip ids that are already stored so the insert only carries new rows
+            to_add -= set(await db.scalars(
+                select(UserPlayedGame.app_id).where(
+                    UserPlayedGame.user_id == current_user.id,
+                    UserPlayedGame.app_id.in_(to_add)
+                )
+            ))
+        added, removed = await db.run_sync(_apply_played_delta, current_user.id, to_add, request.remove)
+        await db.commit()
+        await read_router.record_write(current_user.id)
+        await library_views.played_changed(current_user.id, added=set(to_add) - set(request.remove), removed=request.remove)
+        logger.info(f"Patched played games for user {current_user.id} (+{added} / -{removed})")
+        return {
+            "status": "success",
+            "added": added,
+            "removed": removed
+        }
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error patching played games for user {current_user.id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/toggle/{app_id}")
 async def toggle_played_game(
     app_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle a game as played/unplayed"""
     try:
-        existing = db.query(UserPlayedGame).filter(
-            UserPlayedGame.user_id == current_user.id,
-            UserPlayedGame.app_id == app_id
-        ).first()
+        existing = await db.scalar(
+            select(UserPlayedGame).where(
+                UserPlayedGame.user_id == current_user.id,
+                UserPlayedGame.app_id == app_id
+            )
+        )
         
         if existing:
             # Remove from played
-            db.delete(existing)
-            db.commit()
+            await db.delete(existing)
+            await db.commit()
+            await read_router.record_write(current_user.id)
+            await library_views.played_changed(current_user.id, removed=[app_id])
             return {"status": "removed", "app_id": app_id, "is_played": False}
         else:
-            # Add to played
-            played_game = UserPlayedGame(
-                user_id=current_user.id,
-                app_id=app_id
-            )
-            db.add(played_game)
-            db.commit()
+            # Add to played; a concurrent toggle may have added it already, which the unique index skips
+            await db.run_sync(insert_ignore, UserPlayedGame, [{"user_id": current_user.id, "app_id": app_id}])
+            await db.commit()
+            await read_router.record_write(current_user.id)
+            await library_views.played_changed(current_user.id, added=[app_id])
             return {"status": "added", "app_id": app_id, "is_played": True}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import logging
-from ..models import UserPreferences, User
-from ..database import get_db
-from .auth import get_current_user
+from ..models import UserPreferences
+from ..services.token_cache import AuthenticatedUser
+from ..services.read_routing import read_router
+from ..services.preferences_cache import preferences_cache
+from ..services.library_views import library_views
+from ..database import get_async_db
+from .auth import get_current_user, get_read_db
 
 logger = logging.getLogger(__name__)
 
@@ -45,31 +50,18 @@ router = APIRouter(prefix="/api/preferences", tags=["preferences"])
 
 @router.get("/", response_model=UserPreferencesResponse)
 async def get_user_preferences(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user's filter and display preferences"""
     try:
-        preferences = db.query(UserPreferences).filter(
-            UserPreferences.user_id == current_user.id
-        ).first()
+        preferences = await preferences_cache.load(db, current_user.id)
         
         if not preferences:
             # Return default preferences if none exist
-            return UserPreferencesResponse(
-                show_played_games=True,
-                show_unplayed_games=True,
-                playtime_min=0,
-                playtime_max=1000,
-                score_min=0,
-                score_max=100,
-                sort_by="name",
-                sort_order="asc",
-                items_per_page=50,
-                last_search_query=""
-            )
+            return UserPreferencesResponse(**UserPreferencesRequest().dict())
         
-        return UserPreferencesResponse(**preferences.to_dict())
+        return UserPreferencesResponse(**preferences)
     except Exception as e:
         logger.error(f"Error getting preferences for user {current_user.id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -78,15 +70,15 @@ async def get_user_preferences(
 @router.post("/", response_model=UserPreferencesResponse)
 async def update_user_preferences(
     preferences_data: UserPreferencesRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user's filter and display preferences"""
     try:
         # Get existing preferences or create new ones
-        preferences = db.query(UserPreferences).filter(
-            UserPreferences.user_id == current_user.id
-        ).first()
+        preferences = await db.scalar(
+            select(UserPreferences).where(UserPreferences.user_id == current_user.id)
+        )
         
         if not preferences:
             preferences = UserPreferences(user_id=current_user.id)
@@ -97,31 +89,39 @@ async def update_user_preferences(
             if hasattr(preferences, field):
                 setattr(preferences, field, value)
         
-        db.commit()
-        db.refresh(preferences)
+        await db.commit()
+        await read_router.record_write(current_user.id)
+        
+        # Write through instead of re-reading the row we just wrote
+        saved = preferences.to_dict()
+        await preferences_cache.write(current_user.id, saved)
+        library_views.invalidate(current_user.id)
         
         logger.info(f"Updated preferences for user {current_user.id}")
-        return UserPreferencesResponse(**preferences.to_dict())
+        return UserPreferencesResponse(**saved)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating preferences for user {current_user.id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/")
 async def reset_user_preferences(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reset user's preferences to defaults"""
     try:
-        preferences = db.query(UserPreferences).filter(
-            UserPreferences.user_id == current_user.id
-        ).first()
+        preferences = await db.scalar(
+            select(UserPreferences).where(UserPreferences.user_id == current_user.id)
+        )
         
         if preferences:
-            db.delete(preferences)
-            db.commit()
+            await db.delete(preferences)
+            await db.commit()
+            await read_router.record_write(current_user.id)
+            await preferences_cache.write(current_user.id, None)
+            library_views.invalidate(current_user.id)
             logger.info(f"Reset preferences for user {current_user.id}")
         
         return {
@@ -129,6 +129,6 @@ async def reset_user_preferences(
             "message": "Preferences reset to defaults"
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error resetting preferences for user {current_user.id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
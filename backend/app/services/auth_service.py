@@ -2,28 +2,36 @@
 Steam OAuth authentication service
 """
 import asyncio
-import httpx
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 from typing import Optional
 from datetime import datetime, timedelta
 import jwt
 import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from howlongtobeatpy import HowLongToBeat
 from ..models import User, Session as SessionModel
 from ..config import settings
+from .http_client import get_http_client
+from .hltb_cache import get_hltb_info as get_cached_hltb_info, normalize_game_name, default_search
+from .steam_store import store_get, THROTTLE_STATUSES, appdetails_is_negative, appreviews_is_negative
+from .delisted_registry import delisted_registry
+from .single_flight import SingleFlight
+from .circuit_breaker import circuit_breakers, CircuitOpenError
+from .token_cache import token_cache, AuthenticatedUser, hash_token
 
 logger = logging.getLogger(__name__)
 
+# Shared by every SteamAuthService instance so concurrent requests coalesce
+owned_games_flight = SingleFlight("owned-games")  # keyed by steam_id
+store_info_flight = SingleFlight("store-info")  # keyed by app_id
+
+# GetPlayerSummaries limit on steamids per request
+PLAYER_SUMMARIES_MAX_IDS = 100
+
 class SteamAuthService:
     """Handle Steam OpenID authentication"""
     
-    STEAM_API_URL = "https://steamcommunity.com/openid/login"
-    STEAM_INFO_URL = "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/"
-    
-    # Flag to track if we've already tried to refetch delisted games in this session
-    _delisted_refetch_done = False
-    
     def __init__(self):
         # Don't cache these - read from settings each time to get production values
         self.steam_api_key = settings.steam_api_key
@@ -38,6 +46,24 @@ class SteamAuthService:
         """Get api_url from settings (not cached to allow env override)"""
         return settings.api_url or "http://localhost:8000"
     
+    # Upstream URLs come from settings so they can point at a local stub server
+    # (see benchmarks/stub_upstream.py)
+    
+    @property
+    def steam_info_url(self):
+        return f"{settings.steam_api_base_url.rstrip('/')}/ISteamUser/GetPlayerSummaries/v0002/"
+    
+    @property
+    def owned_games_url(self):
+        return f"{settings.steam_api_base_url.rstrip('/')}/IPlayerService/GetOwnedGames/v1/"
+    
+    @property
+    def appdetails_url(self):
+        return f"{settings.steam_store_base_url.rstrip('/')}/api/appdetails"
+    
+    def appreviews_url(self, app_id: int) -> str:
+        return f"{settings.steam_store_base_url.rstrip('/')}/appreviews/{app_id}"
+    
     def get_login_url(self) -> str:
         """Generate Steam login redirect URL"""
         return_url = f"{self.api_url}/auth/callback"
@@ -51,7 +77,7 @@ class SteamAuthService:
             "openid.claimed_id": "http://specs.openid.net/auth/2.0/identifier_select",
         }
         
-        return f"{self.STEAM_API_URL}?{urlencode(params)}"
+        return f"{settings.steam_openid_url}?{urlencode(params)}"
     
     async def verify_steam_id(self, query_params: dict) -> Optional[str]:
         """Verify Steam OpenID response and extract Steam ID"""
@@ -71,22 +97,21 @@ class SteamAuthService:
                 verify_params = dict(query_params)
                 verify_params["openid.mode"] = "check_auth"
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        self.STEAM_API_URL,
-                        data=verify_params,
-                        timeout=10.0
-                    )
-                    
-                    # Check if verification was successful
-                    if "is_valid:true" in response.text:
+                response = await get_http_client(settings.steam_openid_url).post(
+                    settings.steam_openid_url,
+                    data=verify_params,
+                    timeout=10.0
+                )
+                
+                # Check if verification was successful
+                if "is_valid:true" in response.text:
+                    return steam_id
+                else:
+                    logger.warning(f"Steam verification failed for {steam_id}")
+                    # For development, accept anyway if we have a valid steam_id
+                    if steam_id.isdigit():
+                        logger.debug(f"Development mode: accepting Steam ID {steam_id}")
                         return steam_id
-                    else:
-                        logger.warning(f"Steam verification failed for {steam_id}")
-                        # For development, accept anyway if we have a valid steam_id
-                        if steam_id.isdigit():
-                            logger.debug(f"Development mode: accepting Steam ID {steam_id}")
-                            return steam_id
                         
             except Exception as e:
                 logger.error(f"Error verifying Steam ID: {e}")
@@ -106,28 +131,42 @@ class SteamAuthService:
                 "profile_url": f"https://steamcommunity.com/profiles/{steam_id}/",
             }
         
+        profiles = await self.get_steam_profiles([steam_id])
+        return profiles.get(steam_id) if profiles else None
+    
+    async def get_steam_profiles(self, steam_ids: list) -> Optional[dict]:
+        """Get profiles for up to 100 steam_ids with one GetPlayerSummaries call
+        
+        Goes through the shared rate limiter and circuit breaker. Returns
+        {steam_id: profile} for the players Steam returned (private or deleted
+        accounts are simply missing), or None if the request failed.
+        """
+        if len(steam_ids) > PLAYER_SUMMARIES_MAX_IDS:
+            raise ValueError(f"GetPlayerSummaries accepts at most {PLAYER_SUMMARIES_MAX_IDS} steamids")
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.STEAM_INFO_URL,
-                    params={
-                        "key": self.steam_api_key,
-                        "steamids": steam_id,
-                    },
-                    timeout=10.0
-                )
-                
-                data = response.json()
-                players = data.get("response", {}).get("players", [])
-                
-                if players:
-                    player = players[0]
-                    return {
-                        "steam_id": steam_id,
-                        "username": player.get("personaname"),
-                        "avatar_url": player.get("avatarfull"),
-                        "profile_url": player.get("profileurl"),
-                    }
+            response = await store_get(
+                self.steam_info_url,
+                params={
+                    "key": self.steam_api_key,
+                    "steamids": ",".join(steam_ids),
+                },
+                timeout=10.0
+            )
+            if response.status_code != 200:
+                logger.warning(f"GetPlayerSummaries returned {response.status_code} for {len(steam_ids)} steamids")
+                return None
+            
+            players = response.json().get("response", {}).get("players", [])
+            return {
+                player["steamid"]: {
+                    "steam_id": player["steamid"],
+                    "username": player.get("personaname"),
+                    "avatar_url": player.get("avatarfull"),
+                    "profile_url": player.get("profileurl"),
+                }
+                for player in players if player.get("steamid")
+            }
         except Exception as e:
             logger.error(f"Steam profile error: {e}")
         
@@ -191,7 +230,7 @@ class SteamAuthService:
         # Store session in database
         session = SessionModel(
             user_id=user.id,
-            token=token,
+            token_hash=hash_token(token),
             expires_at=expires_at,
         )
         db.add(session)
@@ -199,8 +238,16 @@ class SteamAuthService:
         
         return token, session
     
-    def verify_token(self, db: Session, token: str) -> Optional[User]:
-        """Verify JWT token and return user"""
+    def verify_token(self, db: Session, token: str) -> Optional[AuthenticatedUser]:
+        """Verify JWT token and return a snapshot of its user
+        
+        Verified tokens are cached per worker (see token_cache), so repeat
+        requests skip the JWT decode and the database.
+        """
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
+        
         try:
             payload = jwt.decode(
                 token,
@@ -212,7 +259,7 @@ class SteamAuthService:
             
             # Check if session exists and is active
             session = db.query(SessionModel).filter(
-                SessionModel.token == token,
+                SessionModel.token_hash == hash_token(token),
                 SessionModel.is_active == True
             ).first()
             
@@ -221,34 +268,83 @@ class SteamAuthService:
             
             # Get user
             user = db.query(User).filter(User.id == user_id).first()
-            return user
+            if not user:
+                return None
+            
+            snapshot = AuthenticatedUser.from_user(user)
+            token_cache.put(token, snapshot, session.expires_at)
+            return snapshot
             
         except jwt.InvalidTokenError:
             return None
     
+    async def verify_token_async(self, db: AsyncSession, token: str) -> Optional[AuthenticatedUser]:
+        """verify_token for async sessions; the session and its user are read in one query"""
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
+        
+        try:
+            payload = jwt.decode(
+                token,
+                settings.jwt_secret_key,
+                algorithms=["HS256"]
+            )
+        except jwt.InvalidTokenError:
+            return None
+        
+        row = (await db.execute(
+            select(SessionModel.expires_at, User)
+            .join(User, User.id == SessionModel.user_id)
+            .where(
+                SessionModel.token_hash == hash_token(token),
+                SessionModel.is_active == True,
+                User.id == payload.get("user_id")
+            )
+        )).first()
+        
+        if not row or row.expires_at < datetime.utcnow():
+            return None
+        
+        snapshot = AuthenticatedUser.from_user(row.User)
+        token_cache.put(token, snapshot, row.expires_at)
+        return snapshot
+    
     def logout_user(self, db: Session, token: str) -> bool:
         """Logout user by deactivating session"""
         session = db.query(SessionModel).filter(
-            SessionModel.token == token
+            SessionModel.token_hash == hash_token(token)
         ).first()
         
         if session:
             session.is_active = False
             db.commit()
+            token_cache.revoke(token)
             return True
         
         return False
     
     async def get_user_owned_games(self, steam_id: str) -> Optional[dict]:
-        """Get user's owned games from Steam API"""
+        """Get user's owned games from Steam API
+        
+        Concurrent calls for the same steam_id share one upstream request.
+        """
         if not self.steam_api_key or self.steam_api_key == "your_steam_api_key_here":
             logger.warning("Steam API key not configured for GetOwnedGames")
             return None
         
+        return await owned_games_flight.run(steam_id, lambda: self._fetch_user_owned_games(steam_id))
+    
+    @property
+    def steam_api_breaker(self):
+        """Circuit breaker for the Steam Web API (GetOwnedGames)"""
+        return circuit_breakers.get(urlsplit(self.owned_games_url).netloc)
+    
+    async def _fetch_user_owned_games(self, steam_id: str) -> Optional[dict]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/",
+            response = await self.steam_api_breaker.call(
+                lambda: get_http_client(self.owned_games_url).get(
+                    self.owned_games_url,
                     params={
                         "key": self.steam_api_key,
                         "steamid": steam_id,
@@ -257,86 +353,91 @@ class SteamAuthService:
                         "format": "json"
                     },
                     timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("response", {})
-                else:
-                    logger.error(f"Steam API error: {response.status_code}")
-                    return None
+                ),
+                is_failure=lambda r: r.status_code >= 500
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("response", {})
+            else:
+                logger.error(f"Steam API error: {response.status_code}")
+                return None
+        except CircuitOpenError as e:
+            logger.warning(f"⏭️ Skipping GetOwnedGames for {steam_id}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error fetching owned games: {e}")
             return None
     
-    async def get_game_info_from_steam(self, app_id: int, retry_count: int = 0, max_retries: int = 3) -> Optional[dict]:
-        """Get basic game info from Steam Store API with retry logic for rate limits"""
+    async def get_game_info_from_steam(self, app_id: int, max_retries: int = 3, revalidate: bool = False) -> Optional[dict]:
+        """Get basic game info from Steam Store API (rate limited, retries 429/403)
+
+        revalidate skips a fresh response cache entry and asks Steam again.
+        """
         if not self.steam_api_key or self.steam_api_key == "your_steam_api_key_here":
             return None
         
         try:
-            # Use proper headers to avoid being blocked
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9",
-            }
+            # Pooled client already sends browser-like headers to avoid being blocked
+            response = await store_get(
+                self.appdetails_url,
+                params={"appids": app_id},
+                timeout=10,  # Increased timeout from 5s to 10s
+                max_retries=max_retries,
+                cache_endpoint="appdetails",
+                cache_id=app_id,
+                is_negative=appdetails_is_negative(app_id),
+                revalidate=revalidate
+            )
             
-            async with httpx.AsyncClient(headers=headers) as client:
-                response = await client.get(
-                    f"https://store.steampowered.com/api/appdetails?appids={app_id}",
-                    timeout=10  # Increased timeout from 5s to 10s
-                )
+            if response.status_code == 200:
+                data = response.json()
+                logger.debug(f"Steam API response for {app_id}: keys={list(data.keys())}")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.debug(f"Steam API response for {app_id}: keys={list(data.keys())}")
+                if str(app_id) in data:
+                    app_data = data[str(app_id)]
+                    success = app_data.get("success", False)
+                    has_data = "data" in app_data
+                    data_value = app_data.get("data")
                     
-                    if str(app_id) in data:
-                        app_data = data[str(app_id)]
-                        success = app_data.get("success", False)
-                        has_data = "data" in app_data
-                        data_value = app_data.get("data")
-                        
-                        logger.debug(f"App {app_id}: success={success}, has_data={has_data}, data_type={type(data_value).__name__}")
+                    logger.debug(f"App {app_id}: success={success}, has_data={has_data}, data_type={type(data_value).__name__}")
+                    
+                    # Try to get game data even if success is False
+                    # (some games are delisted but still have data, or have empty data but might have name elsewhere)
+                    if has_data and isinstance(data_value, dict):
+                        game_data = data_value
+                        name = game_data.get("name")
                         
-                        # Try to get game data even if success is False
-                        # (some games are delisted but still have data, or have empty data but might have name elsewhere)
-                        if has_data and isinstance(data_value, dict):
-                            game_data = data_value
-                            name = game_data.get("name")
-                            
-                            if name:  # Has a real name from Steam
-                                game_info = {
-                                    "app_id": app_id,
-                                    "name": name,
-                                    "header_image": game_data.get("header_image", ""),
-                                }
-                                logger.debug(f"✅ Fetched Steam info for app {app_id}: {game_info['name']} (success={success})")
-                                return game_info
-                            else:
-                                # Data exists but no name - likely delisted or hidden game
-                                logger.warning(f"❌ App {app_id} has data but no name (success={success}, data keys={list(game_data.keys())[:5]}...)")
-                        elif has_data and data_value is None:
-                            logger.warning(f"❌ App {app_id} returned null data (success={success}) - likely delisted or region-locked")
-                        elif not has_data:
-                            logger.warning(f"❌ App {app_id} has no data key in response (success={success})")
+                        if name:  # Has a real name from Steam
+                            game_info = {
+                                "app_id": app_id,
+                                "name": name,
+                                "header_image": game_data.get("header_image", ""),
+                            }
+                            logger.debug(f"✅ Fetched Steam info for app {app_id}: {game_info['name']} (success={success})")
+                            return game_info
                         else:
-                            logger.warning(f"❌ App {app_id} data is not a dict, it's {type(data_value).__name__}")
-                    else:
-                        logger.warning(f"❌ App {app_id} not found in Steam API response keys: {list(data.keys())}")
-                        
-                elif response.status_code in (429, 403):
-                    # Rate limit or forbidden - these are temporary/transient issues
-                    if retry_count < max_retries:
-                        wait_time = 2 ** retry_count  # Exponential backoff: 1s, 2s, 4s
-                        logger.warning(f"⏳ Got HTTP {response.status_code} for app {app_id}, retrying in {wait_time}s (attempt {retry_count + 1}/{max_retries})...")
-                        await asyncio.sleep(wait_time)
-                        return await self.get_game_info_from_steam(app_id, retry_count + 1, max_retries)
+                            # Data exists but no name - likely delisted or hidden game
+                            logger.warning(f"❌ App {app_id} has data but no name (success={success}, data keys={list(game_data.keys())[:5]}...)")
+                    elif has_data and data_value is None:
+                        logger.warning(f"❌ App {app_id} returned null data (success={success}) - likely delisted or region-locked")
+                    elif not has_data:
+                        logger.warning(f"❌ App {app_id} has no data key in response (success={success})")
                     else:
-                        logger.warning(f"❌ Gave up on app {app_id} after {max_retries} retries (HTTP {response.status_code})")
+                        logger.warning(f"❌ App {app_id} data is not a dict, it's {type(data_value).__name__}")
                 else:
-                    logger.warning(f"Steam API error for app {app_id}: HTTP {response.status_code}")
+                    logger.warning(f"❌ App {app_id} not found in Steam API response keys: {list(data.keys())}")
                     
+            elif response.status_code in THROTTLE_STATUSES:
+                # store_get already retried with backoff
+                logger.warning(f"❌ Gave up on app {app_id} after {max_retries} retries (HTTP {response.status_code})")
+            else:
+                logger.warning(f"Steam API error for app {app_id}: HTTP {response.status_code}")
+                
+        except CircuitOpenError:
+            # Not a delisting - let the caller skip this app for now
+            raise
         except asyncio.TimeoutError:
             logger.warning(f"⏱️ Timeout fetching app {app_id} (took >10s)")
         except Exception as e:
@@ -346,142 +447,142 @@ class SteamAuthService:
     
     def normalize_game_name(self, name: str) -> str:
         """Normalize game name for better HLTB search results"""
-        import re
-        # Remove trademark symbols
-        name = re.sub(r'[™®©]', '', name)
-        # Remove common patterns that cause issues
-        name = re.sub(r'\s*:\s*', ' ', name)  # Replace colons with space
-        name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
-        # Title case (better matching than all caps)
-        name = name.title()
-        return name.strip()
+        return normalize_game_name(name)
 
-    async def get_hltb_info(self, game_name: str) -> dict:
-        """Get playtime and URL from HowLongToBeat using howlongtobeatpy library"""
+    async def _hltb_search(self, name: str) -> list:
+        """Run a single HowLongToBeat search"""
+        return await default_search(name)
+    
+    async def get_hltb_info(self, game_name: str, refresh: bool = False) -> dict:
+        """Get playtime and URL from HowLongToBeat (cached by normalized title, bypassed with refresh)"""
+        return await get_cached_hltb_info(game_name, self._hltb_search, refresh=refresh)
+    
+    @staticmethod
+    def _delisted_rechecks(db: Session, app_ids: list) -> list:
+        """Reload the delisted registry if due and pick the delisted app_ids due for a recheck"""
+        delisted_registry.refresh(db)
+        return delisted_registry.due_for_recheck(db, app_ids)
+    
+    @staticmethod
+    def _save_delisted_state(db: Session, newly_delisted: list, restored: list, rechecks: set):
+        """Save delisted state: new misses start their backoff, failed rechecks double it"""
         try:
-            # Try with normalized name first
-            normalized_name = self.normalize_game_name(game_name)
-            results = await HowLongToBeat().async_search(normalized_name)
-            
-            # If no results, try with original name
-            if not results or len(results) == 0:
-                results = await HowLongToBeat().async_search(game_name)
-            
-            if results and len(results) > 0:
-                # Get the best match (first result has highest similarity)
-                best_match = results[0]
-                return {
-                    "playtime": best_match.main_story if best_match.main_story else 0,
-                    "url": f"https://howlongtobeat.com/game/{best_match.game_id}" if best_match.game_id else None
-                }
+            still_delisted = [aid for aid in newly_delisted if aid in rechecks]
+            delisted_registry.mark_delisted(db, [aid for aid in newly_delisted if aid not in rechecks])
+            delisted_registry.mark_still_delisted(db, still_delisted)
+            delisted_registry.mark_restored(db, restored)
+            db.commit()
+            logger.debug(f"💾 Saved {len(newly_delisted)} delisted games to database ({len(still_delisted)} still delisted after recheck)")
+            if restored:
+                logger.warning(f"⭐ {len(restored)} games have been restored to Steam!")
         except Exception as e:
-            # Silently fail - HLTB is optional
-            pass
-        
-        return {"playtime": None, "url": None}
+            logger.error(f"❌ Error saving delisted games: {e}")
+            db.rollback()
     
-    async def fetch_unknown_games_info(self, unknown_app_ids: list, db=None) -> list:
+    async def fetch_unknown_games_info(self, unknown_app_ids: list, db=None, circuit_skipped_ids: Optional[list] = None) -> list:
         """Fetch info for unknown games from Steam and HowLongToBeat
         
-        Skips known delisted games from database to avoid unnecessary Steam API calls.
-        On first request of this session, attempts to refetch delisted games to see 
-        if they've been restored to Steam.
+        Skips known delisted games (kept in memory by the delisted registry) to
+        avoid unnecessary Steam API calls. Delisted games whose backoff has expired
+        are rechecked along with the batch to see if they've been restored to Steam.
         
         Args:
             unknown_app_ids: List of app IDs to fetch info for
             db: Database session for checking/storing delisted games
+            circuit_skipped_ids: If given, collects the app IDs that were not tried
+                because the Steam Store circuit breaker was open
         """
         import asyncio
-        from ..models import DelistedGame
         
         unknown_games = []
         logger.debug(f"🔍 Fetching info for {len(unknown_app_ids)} unknown games from Steam...")
         logger.debug(f"📌 Database session available: {db is not None}")
         
-        # Get known delisted games from database
-        delisted_from_db = set()
-        last_refetch_time = None
+        # Known delisted games come from the in-memory registry; only due rechecks hit the database
+        rechecks = set()
         if db:
-            delisted_records = db.query(DelistedGame).all()
-            delisted_from_db = {record.app_id for record in delisted_records}
-            logger.debug(f"📊 Loaded {len(delisted_from_db)} known delisted games from database")
-            
-            # Get the most recent check time
-            if delisted_records:
-                last_refetch_time = max(record.checked_at for record in delisted_records)
-                logger.debug(f"🕐 Last refetch was at: {last_refetch_time}")
+            # Sync DB work runs in a thread so it never blocks the event loop other requests' sessions need
+            rechecks = set(await asyncio.to_thread(self._delisted_rechecks, db, unknown_app_ids))
+            if rechecks:
+                logger.debug(f"🔄 Rechecking {len(rechecks)} delisted games whose backoff expired")
         else:
             logger.debug(f"⚠️ No database session provided - cannot cache delisted games")
         
-        # Check if we should refetch (once per day)
-        from datetime import timedelta
-        should_refetch = False
-        if db and delisted_from_db and any(aid in delisted_from_db for aid in unknown_app_ids):
-            if last_refetch_time is None:
-                should_refetch = True
-                logger.debug("🔄 No previous refetch found - will attempt refetch")
-            else:
-                time_since_refetch = datetime.utcnow() - last_refetch_time
-                if time_since_refetch > timedelta(hours=24):
-                    should_refetch = True
-                    logger.debug(f"🔄 Last refetch was {time_since_refetch.total_seconds() / 3600:.1f} hours ago - will attempt refetch")
-                else:
-                    logger.debug(f"⏭️ Last refetch was {time_since_refetch.total_seconds() / 3600:.1f} hours ago - skipping (need 24h)")
+        # Store API calls (appdetails and appreviews) share one concurrency cap,
+        # on top of the per-host rate limit applied by store_get
+        semaphore = asyncio.Semaphore(settings.steam_store_concurrency)
+        review_results = {}
         
-        if should_refetch:
-            delisted_in_unknown = [aid for aid in unknown_app_ids if aid in delisted_from_db]
-            logger.debug(f"🔄 Attempting to refetch {len(delisted_in_unknown)}/{len(delisted_from_db)} delisted games...")
-            steam_tasks = [self.get_game_info_from_steam(app_id) for app_id in delisted_in_unknown]
-            steam_results = await asyncio.gather(*steam_tasks, return_exceptions=True)
-            
-            # Check if any have reappeared
-            restored_count = 0
-            for app_id, steam_info in zip(delisted_in_unknown, steam_results):
-                if steam_info and isinstance(steam_info, dict) and steam_info.get("name"):
-                    logger.warning(f"✅ GAME RESTORED: App {app_id} ({steam_info.get('name')}) is now available!")
-                    # Remove from delisted list in database
-                    db.query(DelistedGame).filter(DelistedGame.app_id == app_id).delete()
-                    delisted_from_db.discard(app_id)
-                    restored_count += 1
-                else:
-                    # Update checked_at for games still delisted
-                    db.query(DelistedGame).filter(DelistedGame.app_id == app_id).update(
-                        {"checked_at": datetime.utcnow()}
-                    )
-            
-            db.commit()
-            if restored_count > 0:
-                logger.warning(f"⭐ {restored_count} games have been restored to Steam!")
-            else:
-                logger.debug(f"✅ Refetch complete - no games have been restored")
+        async def steam_info_with_semaphore(app_id):
+            async with semaphore:
+                return await self.get_game_info_from_steam(app_id)
         
-        # Filter out known delisted games
-        apps_to_fetch = [aid for aid in unknown_app_ids if aid not in delisted_from_db]
+        async def store_info(app_id):
+            steam_info = await steam_info_with_semaphore(app_id)
+            review_data = None
+            # Only ask for reviews once the app is known to exist
+            if isinstance(steam_info, dict) and steam_info.get("name"):
+                async with semaphore:
+                    review_data = await self.get_steam_review_score(app_id)
+            return steam_info, review_data
+        
+        async def fetch_with_semaphore(app_id):
+            # Another request enriching the same app shares its appdetails/appreviews calls
+            steam_info, review_results[app_id] = await store_info_flight.run(app_id, lambda: store_info(app_id))
+            return steam_info
+        
+        # Filter out known delisted games (except the ones being rechecked)
+        apps_to_fetch = [
+            aid for aid in unknown_app_ids
+            if aid in rechecks or not delisted_registry.is_delisted(aid)
+        ]
         delisted_skipped = len(unknown_app_ids) - len(apps_to_fetch)
         
         if delisted_skipped > 0:
             logger.debug(f"⏭️ Skipping {delisted_skipped} known delisted games (no Steam API call needed)")
         
-        # Fetch Steam info with limited concurrency to avoid rate limiting
+        # Fetch Steam info and review scores with limited concurrency to avoid rate limiting
         if apps_to_fetch:
-            # Limit to 10 concurrent requests to avoid Steam API timeouts
-            semaphore = asyncio.Semaphore(10)
-            
-            async def fetch_with_semaphore(app_id):
-                async with semaphore:
-                    return await self.get_game_info_from_steam(app_id)
-            
             steam_tasks = [fetch_with_semaphore(app_id) for app_id in apps_to_fetch]
             steam_results = await asyncio.gather(*steam_tasks, return_exceptions=True)
         else:
             steam_results = []
         
+        # Resolve HLTB data for every game Steam knows about, as its own concurrent stage
+        hltb_results = {}
+        resolved_games = [
+            (app_id, steam_info["name"])
+            for app_id, steam_info in zip(apps_to_fetch, steam_results)
+            if isinstance(steam_info, dict) and steam_info.get("name")
+        ]
+        if resolved_games:
+            hltb_semaphore = asyncio.Semaphore(settings.hltb_concurrency)
+            
+            async def hltb_with_semaphore(app_id, name):
+                async with hltb_semaphore:
+                    hltb_results[app_id] = await self.get_hltb_info(name)
+            
+            await asyncio.gather(
+                *[hltb_with_semaphore(app_id, name) for app_id, name in resolved_games],
+                return_exceptions=True
+            )
+        
         # Process results and collect newly delisted games
         games_found = 0
         skipped_games = 0
         newly_delisted = []
+        restored = []
+        circuit_skipped = 0
         
         for app_id, steam_info in zip(apps_to_fetch, steam_results):
+            if isinstance(steam_info, CircuitOpenError):
+                # Steam Store is down - serve what we have and enrich this app on a later request
+                circuit_skipped += 1
+                if circuit_skipped_ids is not None:
+                    circuit_skipped_ids.append(app_id)
+                skipped_games += 1
+                continue
+            
             if isinstance(steam_info, Exception):
                 logger.error(f"❌ Exception fetching app {app_id}: {steam_info}")
                 # Don't mark as delisted - could be temporary API error
@@ -497,20 +598,17 @@ class SteamAuthService:
             
             if isinstance(steam_info, dict) and steam_info.get("name"):
                 try:
-                    # Try to get HLTB info (playtime and URL)
-                    hltb_info = await self.get_hltb_info(steam_info["name"])
+                    # HLTB info (playtime and URL, resolved concurrently above)
+                    hltb_info = hltb_results.get(app_id) or {"playtime": None, "url": None}
                     
-                    # Get Steam review score and total reviews
+                    # Steam review score and total reviews (fetched concurrently above)
                     score = 0
                     total_reviews = 0
-                    try:
-                        review_data = self.get_steam_review_score(app_id)
-                        if review_data:
-                            score = review_data.get("score", 0)
-                            total_reviews = review_data.get("total_reviews", 0)
-                            logger.debug(f"📊 Got reviews for {steam_info['name']}: {score:.1f}% ({total_reviews} reviews)")
-                    except Exception as e:
-                        logger.warning(f"⚠️ Could not fetch reviews for app {app_id}: {e}")
+                    review_data = review_results.get(app_id)
+                    if review_data:
+                        score = review_data.get("score", 0)
+                        total_reviews = review_data.get("total_reviews", 0)
+                        logger.debug(f"📊 Got reviews for {steam_info['name']}: {score:.1f}% ({total_reviews} reviews)")
                     
                     game = {
                         "app_id": app_id,
@@ -523,6 +621,9 @@ class SteamAuthService:
                     }
                     unknown_games.append(game)
                     games_found += 1
+                    if app_id in rechecks:
+                        logger.warning(f"✅ GAME RESTORED: App {app_id} ({game['name']}) is now available!")
+                        restored.append(app_id)
                     logger.debug(f"✅ Added unknown game: {game['name']} ({app_id}) - {score:.1f}% ({total_reviews} reviews)")
                 except Exception as e:
                     logger.error(f"❌ Error processing game {app_id}: {e}", exc_info=True)
@@ -532,46 +633,42 @@ class SteamAuthService:
                 newly_delisted.append(app_id)
                 skipped_games += 1
         
-        # Save newly delisted games to database
-        if newly_delisted and db:
-            try:
-                for app_id in newly_delisted:
-                    # Check if already in delisted table
-                    existing = db.query(DelistedGame).filter(DelistedGame.app_id == app_id).first()
-                    if not existing:
-                        db.add(DelistedGame(app_id=app_id))
-                db.commit()
-                logger.debug(f"💾 Saved {len(newly_delisted)} newly delisted games to database")
-            except Exception as e:
-                logger.error(f"❌ Error saving delisted games: {e}")
-                db.rollback()
+        # Save delisted state: new misses start their backoff, failed rechecks double it
+        if db and (newly_delisted or restored or rechecks):
+            await asyncio.to_thread(self._save_delisted_state, db, newly_delisted, restored, rechecks)
         
+        if circuit_skipped:
+            logger.warning(f"🔌 Steam Store unavailable - skipped {circuit_skipped} games, they will be fetched on a later request")
         logger.info(f"✅ Successfully fetched {games_found}/{len(apps_to_fetch)} games from Steam ({skipped_games} skipped, {delisted_skipped} skipped from cache)")
         return unknown_games
     
-    def get_steam_review_score(self, app_id: int) -> Optional[dict]:
-        """Get review score from Steam review API (synchronous using httpx)
+    async def get_steam_review_score(self, app_id: int, revalidate: bool = False) -> Optional[dict]:
+        """Get review score from Steam review API (async, pooled client)
         
         Args:
             app_id: Steam application ID
+            revalidate: Skip a fresh response cache entry and ask Steam again
             
         Returns:
             Dictionary with score and total_reviews or None if not available
         """
-        import httpx
-        
-        url = f"https://store.steampowered.com/appreviews/{app_id}"
+        url = self.appreviews_url(app_id)
         params = {
             "json": 1,
             "language": "all",
             "purchase_type": "all"
         }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
         
         try:
-            response = httpx.get(url, params=params, headers=headers, timeout=5)
+            response = await store_get(
+                url,
+                params=params,
+                timeout=5,
+                cache_endpoint="appreviews",
+                cache_id=app_id,
+                is_negative=appreviews_is_negative,
+                revalidate=revalidate
+            )
             response.raise_for_status()
             
             data = response.json()
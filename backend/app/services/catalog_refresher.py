@@ -0,0 +1,192 @@
+"""
+Background refresher that keeps catalog rows (reviews, name, HLTB) fresh
+
+Every few minutes the refresher picks Game rows whose updated_at is older than
+catalog_stale_after_hours, most-owned first (by number of UserGame rows), and
+refreshes as many as the hourly upstream budget allows. Results are written
+back with one bulk UPDATE per tick and patched into the in-memory catalog.
+
+Only one process refreshes at a time: with several gunicorn workers the first
+one to take the lock file in cache_dir does the work, so the budget is global.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import func, or_, update
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Game, UserGame
+from .auth_service import SteamAuthService
+from .circuit_breaker import CircuitOpenError
+from .game_service import game_service
+
+logger = logging.getLogger(__name__)
+
+# Upstream calls spent per refreshed game: appdetails, appreviews, HLTB
+CALLS_PER_GAME = 3
+# Games refreshed concurrently within a tick
+_CONCURRENCY = 4
+
+
+def _acquire_leader_lock(path: str):
+    """Non-blocking exclusive lock on `path`; returns the open file, or None if another process holds it"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows dev machines) - every process refreshes
+        return open(path, "a")
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class CatalogRefresher:
+    """Periodically refresh stale catalog rows within an upstream budget"""
+
+    def __init__(self):
+        self.steam = SteamAuthService()
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._lock_file = None
+        self.refreshed_total = 0
+
+    async def start(self):
+        if self.is_running or not settings.catalog_refresh_enabled:
+            return
+        self.is_running = True
+        self.task = asyncio.create_task(self._loop())
+        logger.info(f"🔄 Catalog refresher started - every {settings.catalog_refresh_interval_seconds:.0f}s, "
+                    f"{settings.catalog_refresh_budget_per_hour} upstream calls/hour")
+
+    async def stop(self):
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def games_per_tick(self) -> int:
+        """How many games one tick may refresh under the hourly budget"""
+        calls = settings.catalog_refresh_budget_per_hour * settings.catalog_refresh_interval_seconds / 3600
+        return min(settings.catalog_refresh_batch_max, int(calls // CALLS_PER_GAME))
+
+    async def _loop(self):
+        while self.is_running:
+            try:
+                await asyncio.sleep(settings.catalog_refresh_interval_seconds)
+                if self._lock_file is None:
+                    self._lock_file = _acquire_leader_lock(os.path.join(settings.cache_dir, "catalog_refresher.lock"))
+                    if self._lock_file is None:
+                        continue  # another worker is the refresher
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Catalog refresher tick failed: {e}", exc_info=True)
+
+    def _pick_stale(self, db, limit: int) -> List[tuple]:
+        """Stale games, most owned first, then least recently updated"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.catalog_stale_after_hours)
+        owners = func.count(UserGame.id)
+        return (
+            db.query(Game.id, Game.app_id, Game.name, owners.label("owners"))
+            .outerjoin(UserGame, UserGame.app_id == Game.app_id)
+            .filter(or_(Game.updated_at.is_(None), Game.updated_at < cutoff))
+            .group_by(Game.id, Game.app_id, Game.name)
+            .order_by(owners.desc(), Game.updated_at.asc())
+            .limit(limit)
+            .all()
+        )
+
+    async def _refresh_game(self, game_id: int, app_id: int, name: str) -> Optional[dict]:
+        """Fresh values for one game; None if Steam could not be reached"""
+        # The caches would hand back the payloads the stale row was built from, so go upstream
+        try:
+            steam_info = await self.steam.get_game_info_from_steam(app_id, revalidate=True)
+        except CircuitOpenError:
+            return None
+
+        now = datetime.utcnow()
+        values = {"id": game_id, "updated_at": now}
+        if steam_info is None:
+            # Delisted or hidden - keep the data we have, just don't pick it again until it's stale
+            return values
+
+        values["name"] = steam_info["name"]
+        if steam_info.get("header_image"):
+            values["header_image"] = steam_info["header_image"]
+
+        reviews = await self.steam.get_steam_review_score(app_id, revalidate=True)
+        if reviews:
+            values["score"] = reviews["score"]
+            values["total_reviews"] = reviews["total_reviews"]
+
+        hltb_info = await self.steam.get_hltb_info(steam_info["name"], refresh=True)
+        if hltb_info.get("playtime") is not None:
+            values["playtime_hours"] = hltb_info["playtime"]
+            values["hltb_url"] = hltb_info.get("url")
+        return values
+
+    @staticmethod
+    def _save(db, rows: List[dict]) -> List[dict]:
+        """Write refreshed values back; returns the updated games as dicts"""
+        # Rows have different column sets, so group them into one executemany per shape
+        by_columns = {}
+        for values in rows:
+            by_columns.setdefault(tuple(sorted(values)), []).append(values)
+        for group in by_columns.values():
+            db.execute(update(Game), group)
+        db.commit()
+
+        refreshed = db.query(Game).filter(Game.id.in_([values["id"] for values in rows])).all() if rows else []
+        return [game.to_dict() for game in refreshed]
+
+    async def refresh_once(self) -> int:
+        """Refresh one tick's worth of stale games; returns how many rows were updated"""
+        limit = self.games_per_tick()
+        if limit <= 0:
+            return 0
+
+        db = SessionLocal()
+        try:
+            stale = await asyncio.to_thread(self._pick_stale, db, limit)
+            if not stale:
+                return 0
+
+            semaphore = asyncio.Semaphore(_CONCURRENCY)
+
+            async def refresh_with_semaphore(row):
+                async with semaphore:
+                    return await self._refresh_game(row.id, row.app_id, row.name)
+
+            results = await asyncio.gather(*[refresh_with_semaphore(row) for row in stale], return_exceptions=True)
+            rows = [values for values in results if isinstance(values, dict)]
+            failed = len(results) - len(rows)
+
+            refreshed = await asyncio.to_thread(self._save, db, rows)
+            game_service.update_cached_games(refreshed)
+
+            self.refreshed_total += len(rows)
+            logger.info(f"🔄 Refreshed {len(rows)}/{len(stale)} stale games (top owner count {stale[0].owners}, {failed} failed)")
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global instance
+catalog_refresher = CatalogRefresher()
@@ -0,0 +1,167 @@
+"""
+Per-upstream circuit breakers (Steam Store, Steam Web API, HowLongToBeat)
+
+Each breaker tracks the outcome and latency of recent calls in a sliding
+window. When too many of them fail or are slow the breaker opens and calls
+fail fast with CircuitOpenError, so callers can fall back to cached or
+partial data instead of waiting out timeouts. After a cool-down a few probe
+calls are let through (half-open); if they succeed the breaker closes again.
+"""
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple, TypeVar
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit '{name}' is open (retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by error rate and slow calls"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._calls: Deque[Tuple[float, bool, float]] = deque()  # (finished_at, failed, latency)
+        self._opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+
+    def _trim(self, now: float):
+        cutoff = now - settings.circuit_window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _open(self, now: float, reason: str):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.times_opened += 1
+        logger.warning(f"🔌 Circuit '{self.name}' opened ({reason}) - failing fast for {settings.circuit_open_seconds:.0f}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self._calls.clear()
+        self._probes = 0
+        logger.info(f"🔌 Circuit '{self.name}' closed - upstream recovered")
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (reserves a probe slot when half-open)"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < settings.circuit_open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+            logger.info(f"🔌 Circuit '{self.name}' half-open - probing upstream")
+        if self.state == HALF_OPEN:
+            if self._probes >= settings.circuit_half_open_calls:
+                return False
+            self._probes += 1
+        return True
+
+    def record(self, failed: bool, latency: float):
+        """Record the outcome of a call that allow() let through"""
+        now = time.monotonic()
+        slow = latency >= settings.circuit_slow_call_seconds
+
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open(now, "probe failed" if failed else f"probe took {latency:.1f}s")
+            else:
+                self._close()
+            return
+
+        self._calls.append((now, failed or slow, latency))
+        self._trim(now)
+        if self.state == CLOSED and len(self._calls) >= settings.circuit_min_calls:
+            bad = sum(1 for _, is_bad, _ in self._calls if is_bad)
+            if bad / len(self._calls) >= settings.circuit_failure_threshold:
+                self._open(now, f"{bad}/{len(self._calls)} failed or slow calls in {settings.circuit_window_seconds:.0f}s")
+
+    def is_open(self) -> bool:
+        """Open and still cooling down (calls would be rejected without reserving a probe)"""
+        return self.state == OPEN and time.monotonic() - self._opened_at < settings.circuit_open_seconds
+
+    def retry_in(self) -> float:
+        return max(0.0, settings.circuit_open_seconds - (time.monotonic() - self._opened_at))
+
+    async def call(self, fn: Callable[[], Awaitable[T]], is_failure: Optional[Callable[[T], bool]] = None) -> T:
+        """Run fn() through the breaker
+
+        Exceptions count as failures and are re-raised; is_failure(result) can
+        mark a returned value (e.g. an HTTP 5xx response) as a failure too.
+        """
+        if not settings.circuit_breakers_enabled:
+            return await fn()
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception:
+            self.record(failed=True, latency=time.monotonic() - started)
+            raise
+        except BaseException:
+            # A cancelled call says nothing about the upstream's health - just free its probe slot
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            raise
+        self.record(failed=bool(is_failure and is_failure(result)), latency=time.monotonic() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        """State for the /health endpoint"""
+        self._trim(time.monotonic())
+        calls = len(self._calls)
+        bad = sum(1 for _, is_bad, _ in self._calls if is_bad)
+        latencies = sorted(latency for _, _, latency in self._calls)
+        return {
+            "state": self.state,
+            "recent_calls": calls,
+            "recent_failure_rate": round(bad / calls, 3) if calls else 0.0,
+            "recent_p50_latency_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": round(self.retry_in(), 1) if self.state == OPEN else None,
+        }
+
+
+class CircuitBreakerRegistry:
+    """One breaker per upstream name, created on first use"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def register(self, names: Iterable[str]):
+        """Create breakers up front so /health lists them before their first call"""
+        for name in names:
+            self.get(name)
+
+    def snapshot(self) -> dict:
+        return {name: breaker.snapshot() for name, breaker in sorted(self._breakers.items())}
+
+
+# Global instance
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,131 @@
+"""
+In-memory registry of delisted games with per-game recheck backoff
+
+The set of delisted app_ids is kept in memory and reloaded from the
+delisted_games table every few minutes, so enrichment batches don't query
+the table. Each delisted game carries its own next_check_at; a game that is
+still delisted when rechecked waits twice as long for its next recheck, and a
+process-wide budget caps how many rechecks happen per hour.
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Set
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import DelistedGame
+from ..db.bulk import insert_ignore
+
+logger = logging.getLogger(__name__)
+
+
+class DelistedRegistry:
+    """Delisted app_id set with periodic refresh and rate-limited rechecks"""
+
+    def __init__(self):
+        self._ids: Set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        # Recheck budget (token bucket, refilled continuously)
+        self._recheck_tokens = float(settings.delisted_recheck_per_hour)
+        self._recheck_updated = time.monotonic()
+
+    def refresh(self, db: Session, force: bool = False):
+        """Reload the delisted set if it is older than delisted_refresh_seconds"""
+        if not force and time.monotonic() - self._loaded_at < settings.delisted_refresh_seconds:
+            return
+        ids = {row.app_id for row in db.query(DelistedGame.app_id)}
+        with self._lock:
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+        logger.debug(f"📊 Loaded {len(ids)} known delisted games into the registry")
+
+    def is_delisted(self, app_id: int) -> bool:
+        return app_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _take_recheck_budget(self, wanted: int) -> int:
+        """Take up to `wanted` recheck tokens from the hourly budget"""
+        with self._lock:
+            now = time.monotonic()
+            per_second = settings.delisted_recheck_per_hour / 3600
+            self._recheck_tokens = min(
+                float(settings.delisted_recheck_per_hour),
+                self._recheck_tokens + (now - self._recheck_updated) * per_second
+            )
+            self._recheck_updated = now
+            granted = min(wanted, int(self._recheck_tokens))
+            self._recheck_tokens -= granted
+            return granted
+
+    def due_for_recheck(self, db: Session, app_ids: Iterable[int]) -> List[int]:
+        """Delisted games among app_ids whose recheck is due, within the recheck budget"""
+        app_ids = [aid for aid in app_ids if aid in self._ids]
+        if not app_ids:
+            return []
+
+        now = datetime.utcnow()
+        due = [
+            row.app_id for row in db.query(DelistedGame.app_id).filter(
+                DelistedGame.app_id.in_(app_ids),
+                or_(DelistedGame.next_check_at.is_(None), DelistedGame.next_check_at <= now)
+            ).order_by(DelistedGame.next_check_at).limit(settings.delisted_recheck_batch)
+        ]
+        if not due:
+            return []
+
+        granted = self._take_recheck_budget(len(due))
+        if granted < len(due):
+            logger.debug(f"⏳ Recheck budget exhausted - rechecking {granted}/{len(due)} due delisted games")
+        return due[:granted]
+
+    @staticmethod
+    def _next_check(recheck_count: int, now: datetime) -> datetime:
+        """Exponential backoff with a little jitter so rechecks don't line up"""
+        hours = min(
+            settings.delisted_recheck_max_hours,
+            settings.delisted_recheck_base_hours * (2 ** recheck_count)
+        )
+        return now + timedelta(hours=hours * random.uniform(0.9, 1.1))
+
+    def mark_delisted(self, db: Session, app_ids: Iterable[int]):
+        """Record newly delisted games (does not commit)"""
+        app_ids = set(app_ids)
+        if not app_ids:
+            return
+        now = datetime.utcnow()
+        insert_ignore(db, DelistedGame, [
+            {"app_id": aid, "checked_at": now, "recheck_count": 0, "next_check_at": self._next_check(0, now)}
+            for aid in app_ids
+        ])
+        with self._lock:
+            self._ids |= app_ids
+
+    def mark_still_delisted(self, db: Session, app_ids: Iterable[int]):
+        """Push back the next recheck of games that are still delisted (does not commit)"""
+        app_ids = list(app_ids)
+        if not app_ids:
+            return
+        now = datetime.utcnow()
+        for record in db.query(DelistedGame).filter(DelistedGame.app_id.in_(app_ids)):
+            record.recheck_count = (record.recheck_count or 0) + 1
+            record.checked_at = now
+            record.next_check_at = self._next_check(record.recheck_count, now)
+
+    def mark_restored(self, db: Session, app_ids: Iterable[int]):
+        """Forget games that are available on Steam again (does not commit)"""
+        app_ids = set(app_ids)
+        if not app_ids:
+            return
+        db.query(DelistedGame).filter(DelistedGame.app_id.in_(app_ids)).delete(synchronize_session=False)
+        with self._lock:
+            self._ids -= app_ids
+
+
+# Global instance
+delisted_registry = DelistedRegistry()
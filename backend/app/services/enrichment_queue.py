@@ -0,0 +1,178 @@
+"""
+Persistent queue of enrichment jobs (the enrichment_jobs table)
+
+Web workers enqueue app_ids that are missing from the catalog and worker
+processes (python -m app.worker) claim them in batches. A claim takes a lease
+that the worker extends with heartbeats; if a worker dies its jobs become
+claimable again once the lease expires. On PostgreSQL claims use
+SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never wait on each
+other; on SQLite the claiming UPDATE re-checks the claimable condition, which
+SQLite's single writer makes atomic.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import EnrichmentJob, Game
+from ..db.bulk import insert_ignore
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def save_enriched_games(db: Session, games: List[dict]) -> int:
+    """Insert games returned by fetch_unknown_games_info, skipping ones that already exist
+
+    Does not commit. Returns the number of rows inserted.
+    """
+    return insert_ignore(db, Game, [
+        {
+            "app_id": game_data["app_id"],
+            "name": game_data.get("name", "Unknown"),
+            "header_image": game_data.get("header_image", ""),
+            "playtime_hours": game_data.get("playtime_hours", 0),
+            "score": game_data.get("score", 0),
+            "total_reviews": game_data.get("total_reviews", 0),
+            "hltb_url": game_data.get("hltb_url")
+        }
+        for game_data in games
+    ])
+
+
+class EnrichmentQueue:
+    """Enqueue, claim, heartbeat and settle enrichment jobs"""
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(EnrichmentJob.status == PENDING, EnrichmentJob.run_after <= now),
+            and_(EnrichmentJob.status == RUNNING, EnrichmentJob.lease_expires_at < now)
+        )
+
+    def enqueue(self, db: Session, app_ids: Iterable[int]) -> int:
+        """Queue app_ids for enrichment (commits); finished jobs for the same apps are re-armed"""
+        app_ids = sorted(set(app_ids))
+        if not app_ids:
+            return 0
+        now = datetime.utcnow()
+        insert_ignore(db, EnrichmentJob, [
+            {"app_id": app_id, "status": PENDING, "attempts": 0, "run_after": now}
+            for app_id in app_ids
+        ])
+        db.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.app_id.in_(app_ids), EnrichmentJob.status.in_([DONE, FAILED]))
+            .values(status=PENDING, attempts=0, run_after=now, last_error=None, updated_at=now)
+        )
+        db.commit()
+        return len(app_ids)
+
+    def claim(self, db: Session, worker_id: str, limit: int) -> List[EnrichmentJob]:
+        """Lease up to `limit` claimable jobs (commits); returns the claimed jobs"""
+        now = datetime.utcnow()
+        token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+
+        candidates = (
+            select(EnrichmentJob.id)
+            .where(self._claimable(now))
+            .order_by(EnrichmentJob.run_after)
+            .limit(limit)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            # Rows locked by another worker's claim are skipped instead of waited on
+            candidates = candidates.with_for_update(skip_locked=True)
+
+        try:
+            ids = db.execute(candidates).scalars().all()
+            if not ids:
+                db.commit()
+                return []
+            # Re-checking the condition makes the claim safe where SKIP LOCKED isn't available
+            db.execute(
+                update(EnrichmentJob)
+                .where(EnrichmentJob.id.in_(ids), self._claimable(now))
+                .values(
+                    status=RUNNING,
+                    lease_owner=token,
+                    lease_expires_at=now + timedelta(seconds=settings.worker_lease_seconds),
+                    attempts=EnrichmentJob.attempts + 1,
+                    updated_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return db.query(EnrichmentJob).filter(EnrichmentJob.lease_owner == token).all()
+
+    def heartbeat(self, db: Session, lease_owner: str) -> int:
+        """Extend the lease of every job still held by `lease_owner` (commits)"""
+        now = datetime.utcnow()
+        result = db.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.lease_owner == lease_owner, EnrichmentJob.status == RUNNING)
+            .values(lease_expires_at=now + timedelta(seconds=settings.worker_lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    def complete(self, db: Session, lease_owner: str, app_ids: Iterable[int]):
+        """Mark jobs done (does not commit); jobs whose lease was lost are left alone"""
+        app_ids = list(app_ids)
+        if not app_ids:
+            return
+        db.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.lease_owner == lease_owner, EnrichmentJob.app_id.in_(app_ids))
+            .values(status=DONE, lease_owner=None, lease_expires_at=None, last_error=None,
+                    updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    def retry_later(self, db: Session, jobs: Iterable[EnrichmentJob], error: str):
+        """Reschedule failed jobs with exponential backoff, or give up after max attempts (does not commit)"""
+        now = datetime.utcnow()
+        for job in jobs:
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.last_error = error[:1000]
+            if job.attempts >= settings.enrichment_job_max_attempts:
+                job.status = FAILED
+                logger.warning(f"❌ Giving up on enrichment of app {job.app_id} after {job.attempts} attempts: {error}")
+            else:
+                job.status = PENDING
+                delay = settings.enrichment_job_retry_base_seconds * (2 ** (job.attempts - 1))
+                job.run_after = now + timedelta(seconds=delay)
+
+    def reschedule(self, db: Session, jobs: Iterable[EnrichmentJob], delay_seconds: float, error: str):
+        """Put jobs back after `delay_seconds` without counting this claim as an attempt (does not commit)
+
+        For jobs that were never tried because their upstream's circuit breaker
+        was open - an outage must not use up their attempts.
+        """
+        run_after = datetime.utcnow() + timedelta(seconds=delay_seconds)
+        for job in jobs:
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.last_error = error[:1000]
+            job.status = PENDING
+            job.attempts = max(job.attempts - 1, 0)
+            job.run_after = run_after
+
+    def stats(self, db: Session) -> Dict[str, int]:
+        """Number of jobs per status"""
+        return dict(db.query(EnrichmentJob.status, func.count(EnrichmentJob.id)).group_by(EnrichmentJob.status).all())
+
+
+# Global instance
+enrichment_queue = EnrichmentQueue()
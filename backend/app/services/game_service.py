@@ -1,6 +1,7 @@
 import json
 import os
-from typing import List, Optional, Set
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from sqlalchemy.orm import Session
 from ..models import Game
 from ..database import SessionLocal
@@ -8,14 +9,76 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Incremental catalog changes kept for views built on an older catalog (see changes_since)
+CHANGE_LOG_SIZE = 256
+
+
+def sort_key(sort_by: str) -> Callable[[dict], tuple]:
+    """Sort key for a sort field; ties are broken by app_id so paging is deterministic"""
+    if sort_by == "playtime_hours":
+        return lambda g: (g.get('playtime_hours', 0), g['app_id'])
+    if sort_by == "score":
+        return lambda g: (g.get('score', 0), g['app_id'])
+    # Default sort by name
+    return lambda g: (g.get('name', '').lower(), g['app_id'])
+
+
+def in_ranges(game: dict, playtime_min: float, playtime_max: float, score_min: float, score_max: float) -> bool:
+    """Whether a game passes the playtime and score filters"""
+    return (playtime_min <= game.get('playtime_hours', 0) <= playtime_max
+            and score_min <= game.get('score', 0) <= score_max)
+
 
 class GameService:
     def __init__(self):
-        self.games: List[dict] = []
+        self._games: List[dict] = []
+        self._by_app_id: Dict[int, dict] = {}
+        # Bumped on every catalog change; the log lets views apply changes instead of rebuilding
+        self.catalog_version = 0
+        self._change_log = deque()  # (version, added app_ids, {app_id: dict before the change})
+        self._log_floor = 0  # views older than this must rebuild
         self.games_file_path = None
         self.db_session = None
         self.load_games()
     
+    @property
+    def games(self) -> List[dict]:
+        return self._games
+    
+    @games.setter
+    def games(self, games: List[dict]):
+        """Replace the whole catalog (views built on the old one rebuild)"""
+        self._set_games(games)
+    
+    def _set_games(self, games: List[dict], added: Optional[Set[int]] = None, old: Optional[Dict[int, dict]] = None):
+        """Swap in a new catalog list, logging the change when it is incremental"""
+        self._games = games
+        self._by_app_id = {game['app_id']: game for game in games}
+        self.catalog_version += 1
+        if added is None and old is None:
+            self._change_log.clear()
+            self._log_floor = self.catalog_version
+            return
+        if len(self._change_log) >= CHANGE_LOG_SIZE:
+            self._log_floor = self._change_log.popleft()[0]
+        self._change_log.append((self.catalog_version, added or set(), old or {}))
+    
+    def changes_since(self, version: int) -> Optional[Tuple[Set[int], Dict[int, dict]]]:
+        """App ids added since `version` and the dicts (as of `version`) of games updated or
+        removed since then; None if the catalog was replaced or the log no longer reaches back"""
+        if version < self._log_floor:
+            return None
+        added: Set[int] = set()
+        old: Dict[int, dict] = {}
+        for entry_version, entry_added, entry_old in self._change_log:
+            if entry_version <= version:
+                continue
+            for app_id, game in entry_old.items():
+                if app_id not in added and app_id not in old:
+                    old[app_id] = game
+            added |= entry_added - old.keys()
+        return added, old
+    
     def _get_db_session(self) -> Session:
         """Get a database session"""
         if self.db_session is None:
@@ -77,7 +140,7 @@ class GameService:
                     if should_commit:
                         db.commit()
                         # Refresh in-memory cache
-                        self.games = [game.to_dict() for game in db.query(Game).all()]
+                        self._reload_with_changes([game.to_dict() for game in db.query(Game).all()])
                     logger.info(f"✅ Saved {games_added} new games to database")
                     return True
                 except Exception as e:
@@ -92,6 +155,33 @@ class GameService:
             logger.error(f"❌ Error processing games: {e}")
             return False
     
+    def _reload_with_changes(self, games: List[dict]):
+        """Swap in a reloaded catalog, logging which games were added, changed or removed"""
+        previous = self._by_app_id
+        current = {game['app_id'] for game in games}
+        added = current - previous.keys()
+        old = {game['app_id']: previous[game['app_id']] for game in games
+               if game['app_id'] in previous and previous[game['app_id']] != game}
+        old.update({app_id: game for app_id, game in previous.items() if app_id not in current})
+        self._set_games(games, added=added, old=old)
+    
+    def update_cached_games(self, updated_games: List[dict]):
+        """Replace in-memory entries for games refreshed in the database"""
+        by_app_id = {game["app_id"]: game for game in updated_games}
+        if by_app_id:
+            old = {app_id: self._by_app_id[app_id] for app_id in by_app_id if app_id in self._by_app_id}
+            self._set_games([by_app_id.get(game["app_id"], game) for game in self.games], added=set(), old=old)
+    
+    def add_cached_games(self, saved_games: List[dict]):
+        """Add (or replace) in-memory entries for games just written to the database"""
+        by_app_id = {game["app_id"]: game for game in saved_games}
+        if by_app_id:
+            old = {app_id: self._by_app_id[app_id] for app_id in by_app_id if app_id in self._by_app_id}
+            added = by_app_id.keys() - old.keys()
+            games = [by_app_id.get(game["app_id"], game) for game in self.games]
+            games.extend(game for app_id, game in by_app_id.items() if app_id in added)
+            self._set_games(games, added=set(added), old=old)
+    
     def get_all_games(self, limit: int = None, offset: int = 0) -> tuple[List[dict], int]:
         """Get all games with pagination"""
         total = len(self.games)
@@ -134,23 +224,12 @@ class GameService:
             query_lower = query.lower()
             filtered = [g for g in filtered if query_lower in g.get('name', '').lower()]
         
-        # Filter by playtime
-        filtered = [g for g in filtered if playtime_min <= g.get('playtime_hours', 0) <= playtime_max]
-        
-        # Filter by score
-        filtered = [g for g in filtered if score_min <= g.get('score', 0) <= score_max]
+        # Filter by playtime and score
+        filtered = [g for g in filtered if in_ranges(g, playtime_min, playtime_max, score_min, score_max)]
         
         # Sort results
         reverse_order = sort_order.lower() == "desc"
-        if sort_by == "name":
-            filtered.sort(key=lambda x: x.get('name', '').lower(), reverse=reverse_order)
-        elif sort_by == "playtime_hours":
-            filtered.sort(key=lambda x: x.get('playtime_hours', 0), reverse=reverse_order)
-        elif sort_by == "score":
-            filtered.sort(key=lambda x: x.get('score', 0), reverse=reverse_order)
-        else:
-            # Default sort by name
-            filtered.sort(key=lambda x: x.get('name', '').lower(), reverse=reverse_order)
+        filtered.sort(key=sort_key(sort_by), reverse=reverse_order)
         
         total = len(filtered)
         games = filtered[offset:offset + limit] if limit else filtered[offset:]
@@ -158,10 +237,7 @@ class GameService:
     
     def get_game_by_id(self, app_id: int) -> Optional[dict]:
         """Get a specific game by app_id"""
-        for game in self.games:
-            if game.get('app_id') == app_id:
-                return game
-        return None
+        return self._by_app_id.get(app_id)
 
 
 # Global instance
@@ -0,0 +1,219 @@
+"""
+HowLongToBeat lookup cache keyed by normalized game title
+
+Results (found or not) are stored in a SQLite file inside settings.cache_dir,
+shared by every worker and by the scripts in scripts/, with separate TTLs for
+hits and misses. Concurrent lookups of the same title share one upstream search,
+and searches go through the HowLongToBeat circuit breaker.
+"""
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from typing import Awaitable, Callable, List, Optional
+from howlongtobeatpy import HowLongToBeat
+from ..config import settings
+from .single_flight import SingleFlight
+from .http_client import get_http_client
+from .circuit_breaker import circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+_TRADEMARKS_RE = re.compile(r'[™®©]')
+_COLON_RE = re.compile(r'\s*:\s*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+EMPTY_HLTB_INFO = {"playtime": None, "url": None}
+HLTB_BREAKER = "howlongtobeat.com"
+
+
+def normalize_game_name(name: str) -> str:
+    """Normalize game name for better HLTB search results"""
+    # Remove trademark symbols
+    name = _TRADEMARKS_RE.sub('', name)
+    # Remove common patterns that cause issues
+    name = _COLON_RE.sub(' ', name)  # Replace colons with space
+    name = _WHITESPACE_RE.sub(' ', name)  # Normalize whitespace
+    # Title case (better matching than all caps)
+    name = name.title()
+    return name.strip()
+
+
+async def default_search(name: str) -> list:
+    """Run a single HowLongToBeat search (against settings.hltb_base_url when set)"""
+    if settings.hltb_base_url:
+        return await base_url_search(name)
+    return await HowLongToBeat().async_search(name)
+
+
+async def base_url_search(name: str) -> list:
+    """Search an HLTB-compatible /api/search endpoint (e.g. the benchmark stub server)
+
+    Returns entries with the attributes search_best_match reads from howlongtobeatpy results.
+    """
+    url = f"{settings.hltb_base_url.rstrip('/')}/api/search"
+    response = await get_http_client(url).post(url, json={"searchType": "games", "searchTerms": name.split()})
+    response.raise_for_status()
+    return [
+        SimpleNamespace(
+            game_id=entry.get("game_id"),
+            game_name=entry.get("game_name"),
+            # HLTB reports completion times in seconds, howlongtobeatpy in hours
+            main_story=round(entry["comp_main"] / 3600, 2) if entry.get("comp_main") else 0
+        )
+        for entry in response.json().get("data", [])
+    ]
+
+
+async def search_best_match(game_name: str, search: Callable[[str], Awaitable[list]] = default_search) -> Optional[dict]:
+    """Search HLTB for a game and return its best match, or None if nothing matched
+
+    The normalized and original names are searched in parallel; the first
+    search that returns results wins and the other one is cancelled.
+    Raises the last error if every search failed (so failures aren't cached as misses).
+    """
+    normalized_name = normalize_game_name(game_name)
+    names = [normalized_name] if normalized_name == game_name else [normalized_name, game_name]
+    searches = [asyncio.create_task(search(name)) for name in names]
+
+    results = None
+    errors: List[Exception] = []
+    try:
+        for next_search in asyncio.as_completed(searches):
+            try:
+                results = await next_search
+            except Exception as e:
+                errors.append(e)
+                continue
+            if results:
+                break
+    finally:
+        for task in searches:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # mark as retrieved; errors are collected above
+
+    if results:
+        # Get the best match (first result has highest similarity)
+        best_match = results[0]
+        return {
+            "game_id": best_match.game_id,
+            "playtime": best_match.main_story if best_match.main_story else 0,
+            "url": f"https://howlongtobeat.com/game/{best_match.game_id}" if best_match.game_id else None
+        }
+    if errors and len(errors) == len(searches):
+        raise errors[-1]
+    return None
+
+
+class HltbCache:
+    """SQLite-backed HLTB results with positive and negative TTLs"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._flights = SingleFlight("hltb")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self._path or os.path.join(settings.cache_dir, "hltb_cache.sqlite")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hltb (
+                    title TEXT PRIMARY KEY,
+                    found INTEGER NOT NULL,
+                    game_id INTEGER,
+                    main_story REAL,
+                    url TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get(self, title: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT found, game_id, main_story, url FROM hltb WHERE title = ? AND expires_at > ?",
+                (title, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        found, game_id, main_story, url = row
+        if not found:
+            return dict(EMPTY_HLTB_INFO)
+        return {"game_id": game_id, "playtime": main_story, "url": url}
+
+    def _put(self, title: str, info: Optional[dict]):
+        ttl = settings.hltb_cache_ttl if info else settings.hltb_cache_negative_ttl
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO hltb VALUES (?, ?, ?, ?, ?, ?)",
+                (title, int(bool(info)),
+                 info.get("game_id") if info else None,
+                 info.get("playtime") if info else None,
+                 info.get("url") if info else None,
+                 time.time() + ttl)
+            )
+            conn.commit()
+
+    async def lookup(self, game_name: str, resolve: Callable[[], Awaitable[Optional[dict]]], refresh: bool = False) -> dict:
+        """Cached HLTB info for a game; resolve() is only called on a miss
+
+        resolve() returns the match dict, None when HLTB has no match (cached
+        as a negative result), or raises on upstream errors (not cached).
+        With refresh, the cached entry is skipped and replaced by a new search.
+        """
+        title = normalize_game_name(game_name)
+
+        cached = None
+        if not refresh:
+            try:
+                cached = await asyncio.to_thread(self._get, title)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ HLTB cache read failed for {title!r}: {e}")
+        if cached is not None:
+            return cached
+
+        async def resolve_and_store() -> dict:
+            info = await resolve()
+            try:
+                await asyncio.to_thread(self._put, title, info)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ HLTB cache write failed for {title!r}: {e}")
+            return info or dict(EMPTY_HLTB_INFO)
+
+        return await self._flights.run(title, resolve_and_store)
+
+
+# Global instance
+hltb_cache = HltbCache()
+
+
+async def get_hltb_info(game_name: str, search: Callable[[str], Awaitable[list]] = default_search, refresh: bool = False) -> dict:
+    """Get playtime and URL from HowLongToBeat, through the shared cache (bypassed with refresh)
+
+    Returns {"playtime": None, "url": None} when there is no match, HLTB failed
+    or its circuit breaker is open.
+    """
+    breaker = circuit_breakers.get(HLTB_BREAKER)
+    try:
+        return await hltb_cache.lookup(
+            game_name,
+            lambda: breaker.call(lambda: search_best_match(game_name, search)),
+            refresh=refresh
+        )
+    except Exception as e:
+        # HLTB is optional - carry on without it (the breaker logs when HLTB is down)
+        logger.debug(f"HLTB lookup failed for {game_name!r}: {type(e).__name__}: {e}")
+        return dict(EMPTY_HLTB_INFO)
@@ -0,0 +1,109 @@
+"""
+Shared pooled HTTP clients for upstream APIs (Steam Web API, Steam Store, ...)
+
+One httpx.AsyncClient is kept per upstream host so every request to that host
+reuses warm keep-alive connections instead of paying a new TCP+TLS handshake.
+Clients for the known upstreams are created (and one connection to each is
+opened) from the FastAPI lifespan on startup, and closed there on shutdown.
+Clients for any other host are created on first use.
+"""
+import asyncio
+import logging
+from typing import Dict, Iterable
+from urllib.parse import urlsplit
+import httpx
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HttpClientPool:
+    """App-lifetime pool of httpx.AsyncClient instances, one per upstream host"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._http2_warned = False
+
+    def _use_http2(self) -> bool:
+        if not settings.http2_enabled:
+            return False
+        if _http2_available():
+            return True
+        if not self._http2_warned:
+            logger.warning("⚠️ HTTP2_ENABLED is set but the 'h2' package is not installed - using HTTP/1.1")
+            self._http2_warned = True
+        return False
+
+    def _build_client(self, host: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections_per_host,
+            max_keepalive_connections=settings.http_max_keepalive_per_host,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        client = httpx.AsyncClient(
+            headers={
+                "User-Agent": settings.http_user_agent,
+                "Accept-Language": "en-US,en;q=0.9",
+            },
+            limits=limits,
+            timeout=settings.http_timeout,
+            http2=self._use_http2(),
+        )
+        logger.debug(f"🔌 Created pooled HTTP client for {host} (max {settings.http_max_connections_per_host} connections)")
+        return client
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """Get the pooled client for the host of `url`"""
+        host = urlsplit(url).netloc
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = self._build_client(host)
+            self._clients[host] = client
+        return client
+
+    async def start(self, urls: Iterable[str]):
+        """Create the clients for `urls` up front and warm one connection per host"""
+        roots = {}
+        for url in urls:
+            if url:
+                parts = urlsplit(url)
+                roots[parts.netloc] = f"{parts.scheme}://{parts.netloc}/"
+                self.get(url)
+        if not settings.http_prewarm_connections:
+            return
+
+        async def warm(host: str, root: str):
+            try:
+                # Any response means TCP+TLS are done and the connection is back in the pool
+                await self.get(root).head(root, timeout=settings.http_prewarm_timeout)
+            except httpx.HTTPError as e:
+                logger.debug(f"Could not prewarm connection to {host}: {e}")
+
+        await asyncio.gather(*[warm(host, root) for host, root in roots.items()])
+        logger.info(f"🔌 Pooled HTTP clients ready for {', '.join(roots)}")
+
+    async def aclose(self):
+        """Close every pooled client (called on app shutdown)"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        if clients:
+            logger.info(f"🔌 Closed {len(clients)} pooled HTTP clients")
+
+
+# Global instance
+http_client_pool = HttpClientPool()
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """Shortcut for http_client_pool.get(url)"""
+    return http_client_pool.get(url)
@@ -0,0 +1,349 @@
+"""
+Per-user materialized library views
+
+/api/search-with-preferences without a text query re-applies the user's
+saved filters, played set and sort to the whole catalog on every request.
+A view keeps the result instead: the app_ids passing the filters, in sort
+order, plus the played set it was built with. Paging through it is a slice,
+O(page size).
+
+Views are kept up to date incrementally:
+  - played changes (toggle, patch, sync) insert or remove single ids, so
+    serving a page doesn't query the played set
+  - each played change also bumps the user's version stamp in a SQLite file
+    inside settings.cache_dir; a view whose stamp is behind (the played set
+    was changed by another worker) loads the played set and reconciles it the
+    same way. The stamp is read in a thread, at most once per
+    library_views_played_check_seconds per view
+  - catalog additions and refreshes (GameService.changes_since) are merged
+    in at their sort position with a binary search
+  - a different filter state (a preferences save) or a full catalog reload
+    rebuilds the view
+
+Views are per worker and bounded by library_views_max_ids (ids plus played
+ids over all views); the least recently used users are evicted first.
+"""
+import asyncio
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from ..config import settings
+from .game_service import game_service, in_ranges, sort_key
+from .version_stamps import VersionStamps
+
+logger = logging.getLogger(__name__)
+
+# Past this many changed ids a rebuild is cheaper than inserting/removing them one by one
+MAX_INCREMENTAL_CHANGES = 256
+
+
+@dataclass(frozen=True)
+class LibraryFilter:
+    """Filter and sort state a view is built for"""
+    playtime_min: float = 0
+    playtime_max: float = 1000
+    score_min: float = 0
+    score_max: float = 100
+    show_played_games: bool = True
+    show_unplayed_games: bool = True
+    sort_by: str = "name"
+    sort_order: str = "asc"
+
+    @classmethod
+    def from_preferences(cls, preferences: Optional[dict]) -> "LibraryFilter":
+        """The saved filter state (defaults for users without saved preferences)"""
+        if not preferences:
+            return cls()
+        return cls(**{field: preferences[field] for field in cls.__dataclass_fields__})
+
+    def admits(self, game: dict, played: Set[int]) -> bool:
+        """Whether a game belongs in the view (same rules as GameService.search_games)"""
+        if game['app_id'] in played:
+            if not self.show_played_games:
+                return False
+        elif not self.show_unplayed_games:
+            return False
+        return in_ranges(game, self.playtime_min, self.playtime_max, self.score_min, self.score_max)
+
+
+class _View:
+    """App ids of one user's view in ascending sort order (desc views are read backwards)"""
+    __slots__ = ("filter", "ids", "played", "catalog_version", "played_version", "checked_until")
+
+    def __init__(self, library_filter: LibraryFilter, ids: List[int], played: Set[int], catalog_version: int):
+        self.filter = library_filter
+        self.ids = ids
+        self.played = played
+        self.catalog_version = catalog_version
+        self.played_version: Optional[int] = None  # stamp `played` matches; None = unknown, reconcile on read
+        self.checked_until = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.ids) + len(self.played)
+
+
+class LibraryViews:
+    """LRU of per-user views with incremental maintenance"""
+
+    def __init__(self, catalog=None, stamps_path: Optional[str] = None):
+        self.catalog = catalog or game_service
+        self._views: "OrderedDict[int, _View]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stamps_path = stamps_path
+        self._stamps: Optional[VersionStamps] = None
+        self._stamps_failed = False
+        self.hits = 0
+        self.builds = 0
+        self.incremental_updates = 0
+
+    @property
+    def stamps(self) -> Optional[VersionStamps]:
+        if self._stamps is None and not self._stamps_failed:
+            path = self._stamps_path or os.path.join(settings.cache_dir, "played_versions.sqlite")
+            try:
+                self._stamps = VersionStamps(path, "played_versions")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not open shared played versions at {path}: {e} - "
+                               f"library views re-read the played set on every request")
+                self._stamps_failed = True
+        return self._stamps
+
+    def played_version(self, user_id: int) -> Optional[int]:
+        """Current version stamp of the user's played set (None if it can't be read)"""
+        if self.stamps is None:
+            return None
+        try:
+            return self.stamps.get(user_id)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not read played version for user {user_id}: {e}")
+            return None
+
+    def _build(self, library_filter: LibraryFilter, played: Set[int]) -> _View:
+        version = self.catalog.catalog_version
+        key = sort_key(library_filter.sort_by)
+        games = [g for g in self.catalog.games if library_filter.admits(g, played)]
+        games.sort(key=key)
+        self.builds += 1
+        logger.debug(f"📚 Built library view: {len(games)} games ({library_filter.sort_by} {library_filter.sort_order})")
+        return _View(library_filter, [g['app_id'] for g in games], set(played), version)
+
+    def _position(self, view: _View, game: dict, overrides: Dict[int, dict]) -> int:
+        """Index of `game` in the view's id list (or where it would go)"""
+        key = sort_key(view.filter.sort_by)
+        lookup = self.catalog.get_game_by_id
+        return bisect.bisect_left(
+            view.ids, key(game),
+            key=lambda app_id: key(overrides.get(app_id) or lookup(app_id))
+        )
+
+    def _insert(self, view: _View, game: dict):
+        view.ids.insert(self._position(view, game, {}), game['app_id'])
+
+    def _remove(self, view: _View, game: dict, overrides: Dict[int, dict]):
+        index = self._position(view, game, overrides)
+        if index < len(view.ids) and view.ids[index] == game['app_id']:
+            del view.ids[index]
+
+    def _apply_catalog_changes(self, view: _View) -> bool:
+        """Bring a view up to the current catalog; False if it has to be rebuilt"""
+        if view.catalog_version == self.catalog.catalog_version:
+            return True
+        changes = self.catalog.changes_since(view.catalog_version)
+        if changes is None:
+            return False
+        added, old = changes
+        if len(added) + len(old) > MAX_INCREMENTAL_CHANGES:
+            return False
+        # Take out changed games by their old sort position first, while the rest of the list is consistent
+        for game in old.values():
+            if view.filter.admits(game, view.played):
+                self._remove(view, game, old)
+        for app_id in added | old.keys():
+            game = self.catalog.get_game_by_id(app_id)
+            if game is not None and view.filter.admits(game, view.played):
+                self._insert(view, game)
+        view.catalog_version = self.catalog.catalog_version
+        self.incremental_updates += 1
+        return True
+
+    def _apply_played_changes(self, view: _View, added: Iterable[int], removed: Iterable[int]):
+        """Move single games in or out of the view as their played state flips"""
+        for app_id, now_played in [(app_id, False) for app_id in removed] + [(app_id, True) for app_id in added]:
+            if (app_id in view.played) == now_played:
+                continue
+            game = self.catalog.get_game_by_id(app_id)
+            was_in = game is not None and view.filter.admits(game, view.played)
+            if now_played:
+                view.played.add(app_id)
+            else:
+                view.played.discard(app_id)
+            if game is None:
+                continue
+            is_in = view.filter.admits(game, view.played)
+            if was_in and not is_in:
+                self._remove(view, game, {})
+            elif is_in and not was_in:
+                self._insert(view, game)
+        self.incremental_updates += 1
+
+    def _store(self, user_id: int, view: _View):
+        self._views[user_id] = view
+        self._size += view.size
+        # Evict idle users, never the one being served
+        while self._size > settings.library_views_max_ids and len(self._views) > 1:
+            _, evicted = self._views.popitem(last=False)
+            self._size -= evicted.size
+
+    @staticmethod
+    def _slice(view: _View, offset: int, limit: Optional[int]) -> Tuple[List[int], int]:
+        ids = view.ids
+        total = len(ids)
+        if view.filter.sort_order.lower() == "desc":
+            end = max(total - offset, 0)
+            start = max(end - limit, 0) if limit else 0
+            return ids[start:end][::-1], total
+        return (ids[offset:offset + limit] if limit else ids[offset:]), total
+
+    def _games(self, page_ids: List[int]) -> List[dict]:
+        lookup = self.catalog.get_game_by_id
+        return [lookup(app_id) for app_id in page_ids]
+
+    def page(
+        self,
+        user_id: int,
+        library_filter: LibraryFilter,
+        played: Set[int],
+        offset: int = 0,
+        limit: Optional[int] = None,
+        played_version: Optional[int] = None,
+    ) -> Tuple[List[dict], int]:
+        """A page of the user's view for `library_filter` and `played`, like GameService.search_games
+
+        `played_version` is the user's played stamp read before `played` was loaded.
+        """
+        with self._lock:
+            view = self._views.pop(user_id, None)
+            if view is not None:
+                self._size -= view.size
+                if view.filter != library_filter or not self._apply_catalog_changes(view):
+                    view = None
+                elif view.played != played:
+                    if len(played ^ view.played) > MAX_INCREMENTAL_CHANGES:
+                        view = None
+                    else:
+                        self._apply_played_changes(view, played - view.played, view.played - played)
+                else:
+                    self.hits += 1
+            if view is None:
+                view = self._build(library_filter, played)
+            view.played_version = played_version
+            view.checked_until = time.monotonic() + settings.library_views_played_check_seconds
+            self._store(user_id, view)
+            page_ids, total = self._slice(view, offset, limit)
+        return self._games(page_ids), total
+
+    def _current_page(
+        self, user_id: int, library_filter: LibraryFilter, offset: int, limit: Optional[int], played_version=None
+    ) -> Optional[Tuple[List[int], int]]:
+        """Page ids of the user's view if it is known to be current, else None
+
+        Without `played_version` the view must have been checked recently; with
+        it, the view must have been built under that version.
+        """
+        now = time.monotonic()
+        with self._lock:
+            view = self._views.get(user_id)
+            if view is None or view.filter != library_filter or view.played_version is None:
+                return None
+            if played_version is None:
+                if view.checked_until <= now:
+                    return None
+            elif played_version != view.played_version:
+                return None
+            self._views.pop(user_id)
+            self._size -= view.size
+            if not self._apply_catalog_changes(view):
+                return None
+            if played_version is not None:
+                # The stamp was just confirmed - trust the view for another check interval
+                view.checked_until = now + settings.library_views_played_check_seconds
+            self.hits += 1
+            self._store(user_id, view)
+            return self._slice(view, offset, limit)
+
+    async def saved_page(
+        self,
+        user_id: int,
+        library_filter: LibraryFilter,
+        load_played: Callable[[], Awaitable[Set[int]]],
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[dict], int]:
+        """A page of the user's view; the played set is only loaded (load_played) when the view is missing or behind"""
+        current = self._current_page(user_id, library_filter, offset, limit)
+        if current is None:
+            # Stamp first: a played change landing while the set loads leaves a newer stamp
+            version = await asyncio.to_thread(self.played_version, user_id)
+            if version is not None:
+                current = self._current_page(user_id, library_filter, offset, limit, played_version=version)
+            if current is None:
+                return self.page(user_id, library_filter, await load_played(), offset, limit, played_version=version)
+        page_ids, total = current
+        return self._games(page_ids), total
+
+    async def played_changed(self, user_id: int, added: Iterable[int] = (), removed: Iterable[int] = ()):
+        """Apply a committed played-games change to the user's view, if this worker has one,
+        and bump the user's played stamp so other workers' views reconcile"""
+        version = None
+        if self.stamps is not None:
+            try:
+                # BEGIN IMMEDIATE can wait on other workers' bumps - not on the event loop
+                version = await asyncio.to_thread(self.stamps.bump, user_id)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not bump played version for user {user_id}: {e}")
+        with self._lock:
+            view = self._views.pop(user_id, None)
+            if view is None:
+                return
+            self._size -= view.size
+            # Positions are only consistent once the view has caught up with the catalog
+            if not self._apply_catalog_changes(view):
+                return
+            self._apply_played_changes(view, list(added), list(removed))
+            # Only this change was applied - if another worker's landed in between, reconcile on the next read
+            consecutive = version is not None and view.played_version is not None and version == view.played_version + 1
+            view.played_version = version if consecutive else None
+            self._store(user_id, view)
+
+    def invalidate(self, user_id: int):
+        """Drop the user's view (their saved filters changed)"""
+        with self._lock:
+            view = self._views.pop(user_id, None)
+            if view is not None:
+                self._size -= view.size
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._views),
+            "ids": self._size,
+            "hits": self.hits,
+            "builds": self.builds,
+            "incremental_updates": self.incremental_updates,
+        }
+
+
+# Global instance
+library_views = LibraryViews()
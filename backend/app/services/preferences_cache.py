@@ -0,0 +1,156 @@
+"""
+Per-worker cache of user preferences
+
+Preferences are read by every /api/search-with-preferences call but only
+change when the user saves the filter panel. The cache maps user_id to the
+preferences dict (None for a user without a saved row); update and reset
+write through it, so neither searches nor the save calls themselves re-read
+the row.
+
+Each user has a version stamp in a small SQLite file inside settings.cache_dir.
+A write bumps the stamp and every cached entry remembers the stamp it was
+loaded under, so an entry another worker has overwritten is dropped on its
+next read. The stamp is read in a thread, and at most once per
+preferences_version_check_seconds for an entry, so searches in between are
+served without touching the file. Entries also expire after
+preferences_cache_ttl_seconds, which bounds staleness if the stamp file
+can't be used.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..models import UserPreferences
+from .version_stamps import VersionStamps
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class PreferencesCache:
+    """Bounded TTL cache of user_id -> preferences dict, validated by version stamps"""
+
+    def __init__(self, stamps_path: Optional[str] = None):
+        # user_id -> (preferences, version, expires_at, stamp checked until)
+        self._entries: "OrderedDict[int, Tuple[Optional[dict], int, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamps_path = stamps_path
+        self._stamps: Optional[VersionStamps] = None
+        self._stamps_failed = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stamps(self) -> Optional[VersionStamps]:
+        if self._stamps is None and not self._stamps_failed:
+            path = self._stamps_path or os.path.join(settings.cache_dir, "preferences_versions.sqlite")
+            try:
+                self._stamps = VersionStamps(path, "preference_versions")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not open shared preference versions at {path}: {e} - "
+                               f"other workers' saves show up after {settings.preferences_cache_ttl_seconds:.0f}s")
+                self._stamps_failed = True
+        return self._stamps
+
+    def version(self, user_id: int) -> int:
+        """Current version stamp of the user's preferences (0 if unknown)"""
+        if self.stamps is None:
+            return 0
+        try:
+            return self.stamps.get(user_id)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not read preference version for user {user_id}: {e}")
+            return 0
+
+    def get(self, user_id: int, version: int):
+        """Cached preferences (dict or None) loaded under `version`, or _MISSING"""
+        if not settings.preferences_cache_enabled:
+            return _MISSING
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] != version or entry[2] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return _MISSING
+            # The stamp was just confirmed - trust the entry for another check interval
+            self._entries[user_id] = entry[:3] + (now + settings.preferences_version_check_seconds,)
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def recent(self, user_id: int):
+        """Cached preferences whose stamp was checked within preferences_version_check_seconds, or _MISSING"""
+        if not settings.preferences_cache_enabled:
+            return _MISSING
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[3] <= now or entry[2] <= now:
+                return _MISSING
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_id: int, preferences: Optional[dict], version: int):
+        if not settings.preferences_cache_enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries[user_id] = (
+                preferences, version,
+                now + settings.preferences_cache_ttl_seconds,
+                now + settings.preferences_version_check_seconds,
+            )
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.preferences_cache_max_entries:
+                self._entries.popitem(last=False)
+
+    async def write(self, user_id: int, preferences: Optional[dict]):
+        """Write-through after a committed update (None after a reset); invalidates other workers"""
+        version = 0
+        if self.stamps is not None:
+            try:
+                # BEGIN IMMEDIATE can wait on other workers' bumps - not on the event loop
+                version = await asyncio.to_thread(self.stamps.bump, user_id)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not bump preference version for user {user_id}: {e}")
+                with self._lock:
+                    self._entries.pop(user_id, None)
+                return
+        self.put(user_id, preferences, version)
+
+    async def load(self, db: AsyncSession, user_id: int) -> Optional[dict]:
+        """The user's preferences as a dict, or None if they never saved any"""
+        cached = self.recent(user_id)
+        if cached is not _MISSING:
+            return cached
+        # Stamp first: a save landing during the query leaves a newer stamp, so this entry won't be used
+        version = await asyncio.to_thread(self.version, user_id)
+        cached = self.get(user_id, version)
+        if cached is not _MISSING:
+            return cached
+        row = await db.scalar(select(UserPreferences).where(UserPreferences.user_id == user_id))
+        preferences = row.to_dict() if row else None
+        self.put(user_id, preferences, version)
+        return preferences
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global instance
+preferences_cache = PreferencesCache()
@@ -0,0 +1,146 @@
+"""
+Background refresher for Steam profiles (username, avatar, profile URL)
+
+Profiles are otherwise only fetched at login, so they drift. Every
+profile_refresh_interval_seconds the refresher walks the users table in id
+order, up to profile_refresh_users_per_run users per run (the next run picks
+up where this one stopped), asks GetPlayerSummaries about 100 steam_ids per
+call with a few calls in flight, and writes back only the rows whose profile
+actually changed, in one bulk UPDATE.
+
+Only the worker holding the lock file in cache_dir refreshes, so the upstream
+cost is about one call per 100 users per run no matter how many workers run.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import update
+from ..config import settings
+from ..database import SessionLocal
+from ..models import User
+from .auth_service import SteamAuthService, PLAYER_SUMMARIES_MAX_IDS
+from .catalog_refresher import _acquire_leader_lock
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ("username", "avatar_url", "profile_url")
+
+
+class ProfileRefresher:
+    """Periodically refresh user profiles with batched GetPlayerSummaries calls"""
+
+    def __init__(self):
+        self.steam = SteamAuthService()
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._lock_file = None
+        self._next_user_id = 0
+        self.updated_total = 0
+
+    async def start(self):
+        if self.is_running or not settings.profile_refresh_enabled:
+            return
+        self.is_running = True
+        self.task = asyncio.create_task(self._loop())
+        logger.info(f"👤 Profile refresher started - every {settings.profile_refresh_interval_seconds:.0f}s, "
+                    f"{settings.profile_refresh_users_per_run} users per run")
+
+    async def stop(self):
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _loop(self):
+        while self.is_running:
+            try:
+                await asyncio.sleep(settings.profile_refresh_interval_seconds)
+                if self._lock_file is None:
+                    self._lock_file = _acquire_leader_lock(os.path.join(settings.cache_dir, "profile_refresher.lock"))
+                    if self._lock_file is None:
+                        continue  # another worker is the refresher
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Profile refresher run failed: {e}", exc_info=True)
+
+    def _next_users(self, db, limit: int) -> List[tuple]:
+        """The next `limit` users after the cursor, wrapping around at the end of the table"""
+        columns = (User.id, User.steam_id, User.username, User.avatar_url, User.profile_url)
+        users = db.query(*columns).filter(User.id > self._next_user_id).order_by(User.id).limit(limit).all()
+        if len(users) < limit and self._next_user_id > 0:
+            seen = {user.id for user in users}
+            users += [
+                user for user in db.query(*columns).filter(User.id <= self._next_user_id).order_by(User.id).limit(limit - len(users))
+                if user.id not in seen
+            ]
+        return users
+
+    @staticmethod
+    def _save(db, changed: List[dict]):
+        db.execute(update(User), changed)
+        db.commit()
+
+    async def refresh_once(self) -> int:
+        """Refresh one run's worth of users; returns how many rows changed"""
+        if not self.steam.steam_api_key or self.steam.steam_api_key == "your_steam_api_key_here":
+            logger.debug("Steam API key not configured - skipping profile refresh")
+            return 0
+
+        db = SessionLocal()
+        try:
+            users = await asyncio.to_thread(self._next_users, db, settings.profile_refresh_users_per_run)
+            if not users:
+                return 0
+
+            batches = [users[i:i + PLAYER_SUMMARIES_MAX_IDS] for i in range(0, len(users), PLAYER_SUMMARIES_MAX_IDS)]
+            semaphore = asyncio.Semaphore(settings.profile_refresh_concurrency)
+
+            async def fetch(batch):
+                async with semaphore:
+                    return await self.steam.get_steam_profiles([user.steam_id for user in batch])
+
+            results = await asyncio.gather(*[fetch(batch) for batch in batches], return_exceptions=True)
+
+            now = datetime.utcnow()
+            changed = []
+            failed = 0
+            for batch, profiles in zip(batches, results):
+                if not isinstance(profiles, dict):
+                    failed += 1
+                    continue
+                for user in batch:
+                    profile = profiles.get(user.steam_id)
+                    if profile and profile["username"] and any(profile[field] != getattr(user, field) for field in PROFILE_FIELDS):
+                        changed.append({
+                            "id": user.id,
+                            **{field: profile[field] for field in PROFILE_FIELDS},
+                            "updated_at": now,
+                        })
+
+            if changed:
+                await asyncio.to_thread(self._save, db, changed)
+
+            self._next_user_id = users[-1].id
+            self.updated_total += len(changed)
+            logger.info(f"👤 Refreshed {len(users)} profiles in {len(batches)} calls: "
+                        f"{len(changed)} changed, {failed} calls failed")
+            return len(changed)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global instance
+profile_refresher = ProfileRefresher()
@@ -0,0 +1,189 @@
+"""
+Adaptive per-host token-bucket rate limiter for upstream APIs
+
+Each host gets a token bucket whose refill rate adapts AIMD-style: every
+successful response adds a small step to the rate, every 429/403 halves it
+(at most once per cooldown) and honours Retry-After by pausing the host.
+
+Bucket state lives in a small SQLite file inside settings.cache_dir, so all
+gunicorn workers (and the scripts in scripts/) draw from the same buckets.
+Set RATE_LIMIT_SHARED=false to keep state in process memory instead.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BucketState:
+    """Mutable state of one host's bucket"""
+    tokens: float
+    rate: float
+    updated: float
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _MemoryStore:
+    """Bucket state for a single process"""
+
+    def __init__(self):
+        self._states: Dict[str, BucketState] = {}
+        self._lock = threading.Lock()
+
+    def update(self, host: str, initial: Callable[[], BucketState], fn: Callable[[BucketState], float]) -> float:
+        with self._lock:
+            state = self._states.get(host) or initial()
+            result = fn(state)
+            self._states[host] = state
+            return result
+
+
+class _SQLiteStore:
+    """Bucket state shared between processes through a SQLite file"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                host TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                rate REAL NOT NULL,
+                updated REAL NOT NULL,
+                blocked_until REAL NOT NULL,
+                last_decrease REAL NOT NULL
+            )
+        """)
+        self._lock = threading.Lock()
+
+    def update(self, host: str, initial: Callable[[], BucketState], fn: Callable[[BucketState], float]) -> float:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across workers
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, rate, updated, blocked_until, last_decrease FROM buckets WHERE host = ?",
+                    (host,)
+                ).fetchone()
+                state = BucketState(*row) if row else initial()
+                result = fn(state)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)",
+                    (host, state.tokens, state.rate, state.updated, state.blocked_until, state.last_decrease)
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets with AIMD rate adaptation and Retry-After support"""
+
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            if settings.rate_limit_shared:
+                path = os.path.join(settings.cache_dir, "rate_limits.sqlite")
+                try:
+                    self._store = _SQLiteStore(path)
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Could not open shared rate limit state at {path}: {e} - using in-memory state")
+                    self._store = _MemoryStore()
+            else:
+                self._store = _MemoryStore()
+        return self._store
+
+    def _initial_state(self) -> BucketState:
+        return BucketState(
+            tokens=settings.rate_limit_burst,
+            rate=settings.rate_limit_initial_rps,
+            updated=time.time(),
+        )
+
+    @staticmethod
+    def _refill(state: BucketState, now: float):
+        state.tokens = min(settings.rate_limit_burst, state.tokens + (now - state.updated) * state.rate)
+        state.updated = now
+
+    def _take(self, state: BucketState) -> float:
+        """Take a token if one is available, otherwise return how long to wait"""
+        now = time.time()
+        if now < state.blocked_until:
+            # No refill while the host is paused, so it doesn't burst when the pause ends
+            state.updated = now
+            return state.blocked_until - now
+        self._refill(state, now)
+        if state.tokens >= 1:
+            state.tokens -= 1
+            return 0.0
+        return (1 - state.tokens) / state.rate
+
+    async def _update(self, host: str, fn: Callable[[BucketState], float]) -> float:
+        # SQLite calls are short, but never run them on the event loop
+        return await asyncio.to_thread(self.store.update, host, self._initial_state, fn)
+
+    async def acquire(self, host: str):
+        """Wait until a request to `host` is allowed"""
+        while True:
+            wait = await self._update(host, self._take)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def on_success(self, host: str):
+        """Additive increase after a successful response"""
+        def increase(state: BucketState) -> float:
+            state.rate = min(settings.rate_limit_max_rps, state.rate + settings.rate_limit_increase_step)
+            return state.rate
+        await self._update(host, increase)
+
+    async def on_throttled(self, host: str, retry_after: Optional[float] = None, fallback_delay: float = 1.0) -> float:
+        """Multiplicative decrease after a 429/403 and pause the host; returns the new rate"""
+        def decrease(state: BucketState) -> float:
+            now = time.time()
+            # Many in-flight requests see the same throttling episode - only decrease once per cooldown
+            if now - state.last_decrease >= settings.rate_limit_decrease_cooldown:
+                state.rate = max(settings.rate_limit_min_rps, state.rate * settings.rate_limit_decrease_factor)
+                state.last_decrease = now
+            delay = retry_after if retry_after is not None else fallback_delay
+            state.blocked_until = max(state.blocked_until, now + delay)
+            state.tokens = min(state.tokens, 0.0)
+            state.updated = now
+            return state.rate
+        rate = await self._update(host, decrease)
+        logger.warning(f"⏳ Throttled by {host} - rate lowered to {rate:.2f} req/s")
+        return rate
+
+
+# Global instance
+rate_limiter = AdaptiveRateLimiter()
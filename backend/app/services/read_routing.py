@@ -0,0 +1,206 @@
+"""
+Routing of read-only requests to a read replica (DATABASE_READ_URL)
+
+Replicas lag behind the primary, so a user who just toggled a played game or
+saved preferences could read their old state back. Writes are recorded per
+user; for read_your_writes_seconds after a write (or longer while the replica
+is further behind than that) the user's reads stay on the primary.
+
+The replica's lag is probed at most every replica_lag_check_seconds. When it
+exceeds replica_max_lag_seconds, or can't be measured, every read goes to the
+primary until the replica catches up. SQLite replicas (e.g. a second file for
+local testing) have no measurable lag and only get the fixed window.
+
+Writes are recorded in a small SQLite file inside settings.cache_dir, so a
+write handled by one gunicorn worker also pins reads handled by the others.
+The file is only touched in a thread: each write is recorded there, and a
+worker re-reads the recent writes of all users at most every
+write_log_check_seconds (its own writes are known straight away).
+"""
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import text
+from ..config import settings
+from ..database import read_async_engine
+
+logger = logging.getLogger(__name__)
+
+# Replay lag of a PostgreSQL standby; 0 on a primary or a standby that has replayed everything it received
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class _WriteLog:
+    """Last write time per user, shared between processes through a SQLite file"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS recent_writes (
+                user_id INTEGER PRIMARY KEY,
+                written_at REAL NOT NULL
+            )
+        """)
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, written_at: float, keep_seconds: float):
+        """Record a write and drop rows that can no longer pin anyone"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO recent_writes (user_id, written_at) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET written_at = excluded.written_at",
+                (user_id, written_at)
+            )
+            self._conn.execute("DELETE FROM recent_writes WHERE written_at < ?", (written_at - keep_seconds,))
+
+    def writes_since(self, since: float) -> Dict[int, float]:
+        """Last write time of every user who wrote after `since`"""
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, written_at FROM recent_writes WHERE written_at >= ?", (since,)).fetchall()
+        return dict(rows)
+
+
+class ReadRouter:
+    """Decides per request whether reads may use the replica"""
+
+    def __init__(self, engine=None, log_path: Optional[str] = None):
+        self.engine = engine
+        self._log_path = log_path
+        self._log: Optional[_WriteLog] = None
+        self._log_failed = False
+        self._recent_writes = {}  # user_id -> wall-clock time of this worker's last write for them
+        self._shared_writes: Dict[int, float] = {}  # same, for all workers, as of the last write log read
+        self._next_log_read = 0.0
+        self._log_lock = asyncio.Lock()
+        self._lag = 0.0
+        self._next_lag_check = 0.0
+        self._lag_lock = asyncio.Lock()
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine is not None
+
+    @property
+    def log(self) -> Optional[_WriteLog]:
+        if self._log is None and not self._log_failed:
+            path = self._log_path or os.path.join(settings.cache_dir, "read_routing.sqlite")
+            try:
+                self._log = _WriteLog(path)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not open shared write log at {path}: {e} - read-your-writes only holds per worker")
+                self._log_failed = True
+        return self._log
+
+    def _window(self) -> float:
+        """How long after a write the user's reads stay on the primary"""
+        return max(settings.read_your_writes_seconds, self._lag)
+
+    async def record_write(self, user_id: int):
+        """Pin the user's reads to the primary until the replica has caught up"""
+        if not self.enabled:
+            return
+        now = time.time()
+        self._recent_writes[user_id] = now
+        cutoff = now - self._window()
+        if len(self._recent_writes) > 10000:
+            self._recent_writes = {uid: t for uid, t in self._recent_writes.items() if t >= cutoff}
+        if self.log is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self.log.record, user_id, now,
+                keep_seconds=max(settings.replica_max_lag_seconds, settings.read_your_writes_seconds)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not record write for user {user_id}: {e}")
+
+    async def _shared_last_write(self, user_id: int) -> Optional[float]:
+        """The user's last write on any worker, from the write log (re-read at most every write_log_check_seconds)"""
+        if time.monotonic() >= self._next_log_read and self.log is not None:
+            async with self._log_lock:
+                if time.monotonic() >= self._next_log_read:
+                    since = time.time() - max(settings.replica_max_lag_seconds, settings.read_your_writes_seconds)
+                    try:
+                        self._shared_writes = await asyncio.to_thread(self.log.writes_since, since)
+                    except sqlite3.Error as e:
+                        logger.warning(f"⚠️ Could not read write log: {e}")
+                    self._next_log_read = time.monotonic() + settings.write_log_check_seconds
+        return self._shared_writes.get(user_id)
+
+    async def _last_write(self, user_id: int) -> Optional[float]:
+        window_start = time.time() - self._window()
+        own = self._recent_writes.get(user_id)
+        if own is not None and own >= window_start:
+            # This worker's own write already pins the user - no need to look at the shared log
+            return own
+        times = [t for t in (own, await self._shared_last_write(user_id)) if t is not None]
+        return max(times) if times else None
+
+    async def _probe_lag(self) -> float:
+        if self.engine.url.get_backend_name() != "postgresql":
+            return 0.0
+        async with self.engine.connect() as conn:
+            return float(await conn.scalar(POSTGRES_LAG_QUERY) or 0)
+
+    async def replica_lag(self) -> float:
+        """Replica lag in seconds (cached for replica_lag_check_seconds, inf if it can't be measured)"""
+        now = time.monotonic()
+        if now < self._next_lag_check:
+            return self._lag
+        async with self._lag_lock:
+            if now < self._next_lag_check:
+                return self._lag
+            try:
+                self._lag = await self._probe_lag()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not measure replica lag: {e} - reading from the primary")
+                self._lag = math.inf
+            self._next_lag_check = time.monotonic() + settings.replica_lag_check_seconds
+            if self._lag > settings.replica_max_lag_seconds:
+                logger.warning(f"⚠️ Replica is {self._lag:.1f}s behind - reading from the primary")
+        return self._lag
+
+    async def use_primary(self, user_id: Optional[int] = None) -> bool:
+        """Whether this user's reads must go to the primary right now"""
+        if not self.enabled:
+            return True
+        lag = await self.replica_lag()
+        if lag > settings.replica_max_lag_seconds:
+            use_primary = True
+        elif user_id is None:
+            use_primary = False
+        else:
+            last_write = await self._last_write(user_id)
+            use_primary = last_write is not None and time.time() - last_write < self._window()
+
+        if use_primary:
+            self.primary_reads += 1
+        else:
+            self.replica_reads += 1
+        return use_primary
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "replica_lag_seconds": self._lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+
+# Global instance
+read_router = ReadRouter(read_async_engine)
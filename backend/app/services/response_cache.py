@@ -0,0 +1,184 @@
+"""
+Persistent on-disk cache for Steam Store API responses
+
+Responses are stored zlib-compressed in a SQLite file inside settings.cache_dir,
+keyed by endpoint and app_id, so they survive restarts and are shared by every
+worker and by the scripts in scripts/. Each endpoint has its own TTL, "negative"
+answers (delisted apps, no reviews) get a separate TTL, and the file is kept
+under a size cap by evicting the least recently used entries.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# How often (in writes) the total cache size is re-checked against the cap
+_SIZE_CHECK_INTERVAL = 100
+
+
+@dataclass
+class CachedResponse:
+    """A cached upstream response body with its validators"""
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    negative: bool
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def ttl_for(endpoint: str, negative: bool) -> float:
+    """TTL in seconds for an endpoint's positive or negative answers"""
+    if negative:
+        return settings.response_cache_negative_ttl
+    return {
+        "appdetails": settings.response_cache_ttl_appdetails,
+        "appreviews": settings.response_cache_ttl_appreviews,
+    }.get(endpoint, settings.response_cache_ttl_default)
+
+
+class ResponseCache:
+    """SQLite-backed response cache with per-endpoint TTLs and LRU size cap"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self._path or os.path.join(settings.cache_dir, "http_cache.sqlite")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    negative INTEGER NOT NULL DEFAULT 0,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # Synchronous implementations (run in a worker thread by the async wrappers)
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, etag, last_modified, negative, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        body, etag, last_modified, negative, expires_at = row
+        return CachedResponse(zlib.decompress(body), etag, last_modified, bool(negative), expires_at)
+
+    def _put(self, key: str, endpoint: str, body: bytes, etag: Optional[str], last_modified: Optional[str], negative: bool):
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, compressed, etag, last_modified, int(negative),
+                 now + ttl_for(endpoint, negative), now, len(compressed))
+            )
+            conn.commit()
+            self._writes += 1
+            if self._writes % _SIZE_CHECK_INTERVAL == 1:
+                self._evict(conn)
+
+    def _refresh(self, key: str, endpoint: str, negative: bool):
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + ttl_for(endpoint, negative), now, key)
+            )
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache is back under 90% of the cap"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        cap = settings.response_cache_max_bytes
+        if total <= cap:
+            return
+        target = cap * 0.9
+        evicted = 0
+        while total > target:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY last_access LIMIT 500").fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k, _ in rows])
+            total -= sum(size for _, size in rows)
+            evicted += len(rows)
+        conn.commit()
+        logger.info(f"🧹 Response cache over {cap} bytes - evicted {evicted} least recently used entries")
+
+    # Async API
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        if not settings.response_cache_enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Response cache read failed for {key}: {e}")
+            return None
+
+    async def put(self, key: str, endpoint: str, body: bytes, etag: Optional[str] = None,
+                  last_modified: Optional[str] = None, negative: bool = False):
+        if not settings.response_cache_enabled:
+            return
+        try:
+            await asyncio.to_thread(self._put, key, endpoint, body, etag, last_modified, negative)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Response cache write failed for {key}: {e}")
+
+    async def refresh(self, key: str, endpoint: str, negative: bool):
+        if not settings.response_cache_enabled:
+            return
+        try:
+            await asyncio.to_thread(self._refresh, key, endpoint, negative)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Response cache refresh failed for {key}: {e}")
+
+
+# Global instance
+response_cache = ResponseCache()
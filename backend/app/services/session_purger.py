@@ -0,0 +1,106 @@
+"""
+Background purge of expired and logged-out sessions
+
+Every login adds a sessions row and nothing else removes them, so the lookup
+index would grow forever. Every session_purge_interval_seconds the purger
+deletes expired and inactive rows, session_purge_batch_size at a time with a
+commit between batches, so no single statement holds locks for long.
+
+Like the catalog refresher, only the worker holding the lock file in
+cache_dir purges.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, or_, select
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Session as SessionModel
+from .catalog_refresher import _acquire_leader_lock
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPurger:
+    """Periodically delete sessions that can no longer authenticate anyone"""
+
+    def __init__(self):
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._lock_file = None
+        self.purged_total = 0
+
+    async def start(self):
+        if self.is_running or not settings.session_purge_enabled:
+            return
+        self.is_running = True
+        self.task = asyncio.create_task(self._loop())
+        logger.info(f"🧹 Session purger started - every {settings.session_purge_interval_seconds:.0f}s")
+
+    async def stop(self):
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _loop(self):
+        while self.is_running:
+            try:
+                if self._lock_file is None:
+                    self._lock_file = _acquire_leader_lock(os.path.join(settings.cache_dir, "session_purger.lock"))
+                if self._lock_file is not None:
+                    await self.purge_once()
+                await asyncio.sleep(settings.session_purge_interval_seconds)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Session purge failed: {e}", exc_info=True)
+                await asyncio.sleep(settings.session_purge_interval_seconds)
+
+    def purge_batch(self, db, now: datetime) -> int:
+        """Delete up to one batch of dead sessions (commits); returns the number deleted"""
+        ids = db.execute(
+            select(SessionModel.id)
+            .where(or_(SessionModel.expires_at < now, SessionModel.is_active == False))
+            .limit(settings.session_purge_batch_size)
+        ).scalars().all()
+        if not ids:
+            return 0
+        db.execute(delete(SessionModel).where(SessionModel.id.in_(ids)))
+        db.commit()
+        return len(ids)
+
+    async def purge_once(self) -> int:
+        """Run up to session_purge_max_batches batches; returns how many sessions were deleted"""
+        now = datetime.utcnow()
+        purged = 0
+        db = SessionLocal()
+        try:
+            for _ in range(settings.session_purge_max_batches):
+                # In a thread, so requests keep running (and committing) while a batch waits for locks
+                deleted = await asyncio.to_thread(self.purge_batch, db, now)
+                purged += deleted
+                if deleted < settings.session_purge_batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.purged_total += purged
+        if purged:
+            logger.info(f"🧹 Purged {purged} expired/logged-out sessions")
+        return purged
+
+
+# Global instance
+session_purger = SessionPurger()
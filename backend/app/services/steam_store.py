@@ -0,0 +1,148 @@
+"""
+Single entry point for Steam Store API calls (appdetails, appreviews)
+
+Every call goes through the shared HTTP client pool and the adaptive rate
+limiter, and 429/403 responses are retried once the limiter allows it.
+Each host has a circuit breaker: network errors, 5xx and slow responses trip
+it, and while it is open calls fail fast with CircuitOpenError (or get the
+stale cached response when there is one).
+Callers that pass a cache key get responses from the persistent response
+cache while fresh, and stale entries are revalidated with conditional
+requests where Steam sends validators.
+Used by SteamAuthService and by the scripts in scripts/.
+"""
+import logging
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+import httpx
+from .http_client import get_http_client
+from .rate_limiter import rate_limiter, parse_retry_after
+from .response_cache import response_cache, CachedResponse
+from .circuit_breaker import circuit_breakers, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = (429, 403)
+
+
+async def _rate_limited_get(url: str, params: Optional[dict], headers: Optional[dict], timeout: float, max_retries: int) -> httpx.Response:
+    """GET under the host's rate limit, retrying throttled responses"""
+    host = urlsplit(url).netloc
+    breaker = circuit_breakers.get(host)
+    attempt = 0
+
+    while True:
+        # Don't queue on the rate limiter for a host that is known to be down
+        if breaker.is_open():
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
+        await rate_limiter.acquire(host)
+        response = await breaker.call(
+            lambda: get_http_client(url).get(url, params=params, headers=headers, timeout=timeout),
+            is_failure=lambda r: r.status_code >= 500
+        )
+
+        if response.status_code in THROTTLE_STATUSES:
+            # Rate limit or forbidden - these are temporary/transient issues
+            await rate_limiter.on_throttled(
+                host,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                fallback_delay=2 ** attempt  # 1s, 2s, 4s when Steam gives no hint
+            )
+            if attempt < max_retries:
+                attempt += 1
+                logger.warning(f"⏳ Got HTTP {response.status_code} for {url}, retrying (attempt {attempt}/{max_retries})...")
+                continue
+            return response
+
+        if response.status_code < 400:
+            await rate_limiter.on_success(host)
+        return response
+
+
+def _cached_response(entry: CachedResponse, url: str, params: Optional[dict]) -> httpx.Response:
+    """Rebuild an httpx.Response from a cache entry so callers handle both the same way"""
+    return httpx.Response(
+        200,
+        content=entry.body,
+        headers={"Content-Type": "application/json", "X-Cache": "HIT"},
+        request=httpx.Request("GET", url, params=params),
+    )
+
+
+async def store_get(
+    url: str,
+    params: Optional[dict] = None,
+    timeout: float = 10,
+    max_retries: int = 3,
+    cache_endpoint: Optional[str] = None,
+    cache_id=None,
+    is_negative: Optional[Callable[[dict], bool]] = None,
+    revalidate: bool = False,
+) -> httpx.Response:
+    """GET a Steam Store URL, optionally through the persistent response cache
+
+    Args:
+        cache_endpoint: Endpoint name used for the cache key and TTL (e.g. "appdetails")
+        cache_id: Identifier within the endpoint (usually the app_id)
+        is_negative: Tells whether a 200 JSON body is a "nothing here" answer,
+            which is cached with the shorter negative TTL
+        revalidate: Ask Steam even if the cached entry is fresh (conditionally,
+            when it has validators), and never fall back to the stale entry
+
+    Returns the last response (which may still be a 429/403 after max_retries).
+    Only 200 responses are cached. Network errors propagate to the caller, and
+    so does CircuitOpenError when the host's breaker is open and nothing is cached.
+    """
+    key = f"{cache_endpoint}:{cache_id}" if cache_endpoint else None
+    entry = await response_cache.get(key) if key else None
+
+    if entry and entry.fresh and not revalidate:
+        return _cached_response(entry, url, params)
+
+    try:
+        response = await _rate_limited_get(
+            url, params, entry.validators() if entry else None, timeout, max_retries
+        )
+    except CircuitOpenError:
+        if entry is None or revalidate:
+            raise
+        # Upstream is down - stale data beats no data
+        logger.debug(f"🔌 Serving stale {key} while {urlsplit(url).netloc} is unavailable")
+        return _cached_response(entry, url, params)
+
+    if key is None:
+        return response
+
+    if response.status_code == 304 and entry:
+        await response_cache.refresh(key, cache_endpoint, entry.negative)
+        return _cached_response(entry, url, params)
+
+    if response.status_code == 200:
+        try:
+            negative = bool(is_negative(response.json())) if is_negative else False
+        except ValueError:
+            # Not JSON - don't cache garbage
+            return response
+        await response_cache.put(
+            key,
+            cache_endpoint,
+            response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            negative=negative,
+        )
+
+    return response
+
+
+def appdetails_is_negative(app_id: int) -> Callable[[dict], bool]:
+    """appdetails answer without a usable name (delisted, hidden or region-locked)"""
+    def check(data: dict) -> bool:
+        app_data = data.get(str(app_id)) or {}
+        return not (isinstance(app_data.get("data"), dict) and app_data["data"].get("name"))
+    return check
+
+
+def appreviews_is_negative(data: dict) -> bool:
+    """appreviews answer with no reviews"""
+    return not (data.get("query_summary") or {}).get("total_reviews")
@@ -0,0 +1,195 @@
+"""
+Per-worker cache of verified session tokens
+
+Maps the SHA-256 of a token to a snapshot of its user, so an authenticated
+request costs a dictionary lookup instead of a JWT decode and two queries.
+Entries live for auth_token_cache_ttl_seconds at most and never outlive
+their session. The cache is a bounded LRU.
+
+Logouts are recorded in a small SQLite file inside settings.cache_dir (one
+row per revoked token, numbered by an autoincrement generation). Every
+worker polls the highest generation at most every auth_revocation_check_seconds
+and evicts the tokens revoked since its last check, so a logout in one
+gunicorn worker reaches the others within that interval.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def hash_token(token: str) -> str:
+    """Fixed-length digest of a session token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Read-only snapshot of the User a token belongs to"""
+    id: int
+    steam_id: str
+    username: str
+    avatar_url: Optional[str]
+    profile_url: Optional[str]
+
+    @classmethod
+    def from_user(cls, user) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            steam_id=user.steam_id,
+            username=user.username,
+            avatar_url=user.avatar_url,
+            profile_url=user.profile_url,
+        )
+
+
+class _RevocationLog:
+    """Revoked token digests shared between processes through a SQLite file"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS revocations (
+                generation INTEGER PRIMARY KEY AUTOINCREMENT,
+                token_hash TEXT NOT NULL,
+                revoked_at REAL NOT NULL
+            )
+        """)
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(generation), 0) FROM revocations").fetchone()[0]
+
+    def revoke(self, token_hash: str, keep_seconds: float):
+        """Record a revocation and drop rows no cache can still hold"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT INTO revocations (token_hash, revoked_at) VALUES (?, ?)", (token_hash, now))
+            self._conn.execute("DELETE FROM revocations WHERE revoked_at < ?", (now - keep_seconds,))
+
+    def since(self, generation: int) -> Tuple[int, list]:
+        """Highest generation and the token digests revoked after `generation`"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT generation, token_hash FROM revocations WHERE generation > ? ORDER BY generation",
+                (generation,)
+            ).fetchall()
+        if not rows:
+            return generation, []
+        return rows[-1][0], [row[1] for row in rows]
+
+
+class TokenCache:
+    """Bounded TTL cache of token digest -> AuthenticatedUser"""
+
+    def __init__(self, log_path: Optional[str] = None):
+        self._entries: "OrderedDict[str, Tuple[AuthenticatedUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._log_path = log_path
+        self._log: Optional[_RevocationLog] = None
+        self._log_failed = False
+        self._seen_generation = 0
+        self._next_check = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def log(self) -> Optional[_RevocationLog]:
+        if self._log is None and not self._log_failed:
+            path = self._log_path or os.path.join(settings.cache_dir, "auth_revocations.sqlite")
+            try:
+                self._log = _RevocationLog(path)
+                self._seen_generation = self._log.generation()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not open shared token revocations at {path}: {e} - logouts only reach this worker")
+                self._log_failed = True
+        return self._log
+
+    def _sync_revocations(self, now: float):
+        """Evict tokens other workers revoked since the last check (rate-limited)"""
+        if now < self._next_check:
+            return
+        self._next_check = now + settings.auth_revocation_check_seconds
+        if self.log is None:
+            return
+        try:
+            generation, revoked = self.log.since(self._seen_generation)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not read token revocations: {e}")
+            return
+        if revoked:
+            with self._lock:
+                for token_hash in revoked:
+                    self._entries.pop(token_hash, None)
+        self._seen_generation = generation
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        if not settings.auth_token_cache_enabled:
+            return None
+        now = time.monotonic()
+        self._sync_revocations(now)
+        key = hash_token(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires = entry
+            if expires <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: AuthenticatedUser, session_expires_at: datetime):
+        if not settings.auth_token_cache_enabled:
+            return
+        now = time.monotonic()
+        session_left = (session_expires_at - datetime.utcnow()).total_seconds()
+        ttl = min(settings.auth_token_cache_ttl_seconds, session_left)
+        if ttl <= 0:
+            return
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = (user, now + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.auth_token_cache_max_entries:
+                self._entries.popitem(last=False)
+
+    def revoke(self, token: str):
+        """Drop a token here and tell the other workers"""
+        key = hash_token(token)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.log is None:
+            return
+        try:
+            # Entries never outlive the TTL, so older revocations can't matter to anyone
+            self.log.revoke(key, keep_seconds=max(settings.auth_token_cache_ttl_seconds, 60) * 2)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not record token revocation: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global instance
+token_cache = TokenCache()
@@ -0,0 +1,52 @@
+"""
+Per-user version counters shared between processes through a SQLite file
+
+A worker that changes some per-user state bumps the user's stamp; workers
+holding a cached copy compare the stamp it was built under with the current
+one to tell whether another process has changed it since. Used by the
+preferences cache and the library views.
+"""
+import os
+import sqlite3
+import threading
+
+
+class VersionStamps:
+    """Per-user versions in one table of a SQLite file inside settings.cache_dir"""
+
+    def __init__(self, path: str, table: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._table = table
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> int:
+        with self._lock:
+            row = self._conn.execute(f"SELECT version FROM {self._table} WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, user_id: int) -> int:
+        """Increment the user's version and return the new one"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    f"INSERT INTO {self._table} (user_id, version) VALUES (?, 1) "
+                    "ON CONFLICT(user_id) DO UPDATE SET version = version + 1",
+                    (user_id,)
+                )
+                version = self._conn.execute(
+                    f"SELECT version FROM {self._table} WHERE user_id = ?", (user_id,)
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return version
@@ -0,0 +1,177 @@
+"""
+Standalone enrichment worker
+
+Consumes the enrichment_jobs table so Steam/HLTB scraping runs outside the web
+workers' event loops (set ENRICHMENT_MODE=worker for /my-games to enqueue
+instead of fetching inline). Run as many processes as needed:
+
+    cd backend
+    python -m app.worker [--concurrency N] [--batch-size N] [--once]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from urllib.parse import urlsplit
+from .config import settings
+from .database import SessionLocal
+from .db.bootstrap import init_database
+from .services.auth_service import SteamAuthService
+from .services.circuit_breaker import circuit_breakers
+from .services.delisted_registry import delisted_registry
+from .services.enrichment_queue import enrichment_queue, save_enriched_games
+from .services.http_client import http_client_pool
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentWorker:
+    """Claims batches of enrichment jobs and resolves them with SteamAuthService"""
+
+    def __init__(self, concurrency: int, batch_size: int):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.steam = SteamAuthService()
+        self.stopping = asyncio.Event()
+        self.processed = 0
+
+    async def _heartbeat(self, lease_owner: str):
+        """Keep the batch's leases alive while it is being processed"""
+        db = SessionLocal()
+        try:
+            while True:
+                await asyncio.sleep(settings.worker_heartbeat_seconds)
+                await asyncio.to_thread(enrichment_queue.heartbeat, db, lease_owner)
+        finally:
+            db.close()
+
+    def _settle(self, db, lease_owner: str, jobs: list, games: list, circuit_skipped: set) -> set:
+        """Save the batch's games and settle or reschedule its jobs (commits)"""
+        save_enriched_games(db, games)
+
+        # Found or known delisted = settled; skipped behind an open breaker = not tried; anything else is retried
+        settled = {game["app_id"] for game in games}
+        settled |= {job.app_id for job in jobs if delisted_registry.is_delisted(job.app_id)}
+        enrichment_queue.complete(db, lease_owner, settled)
+        skipped = [job for job in jobs if job.app_id not in settled and job.app_id in circuit_skipped]
+        if skipped:
+            breaker = circuit_breakers.get(urlsplit(self.steam.appdetails_url).netloc)
+            enrichment_queue.reschedule(
+                db, skipped, max(breaker.retry_in(), settings.worker_poll_seconds),
+                "Steam Store circuit open - not attempted"
+            )
+        enrichment_queue.retry_later(
+            db,
+            [job for job in jobs if job.app_id not in settled and job.app_id not in circuit_skipped],
+            "Steam Store did not answer (upstream error)"
+        )
+        db.commit()
+        return settled
+
+    @staticmethod
+    def _fail(db, jobs: list, error: str):
+        """Roll back a failed batch and retry all of its jobs later (commits)"""
+        db.rollback()
+        enrichment_queue.retry_later(db, jobs, error)
+        db.commit()
+
+    async def process_batch(self) -> int:
+        """Claim and process one batch; returns the number of jobs claimed (-1 if claiming failed)"""
+        db = SessionLocal()
+        heartbeat = None
+        try:
+            try:
+                jobs = await asyncio.to_thread(enrichment_queue.claim, db, self.worker_id, self.batch_size)
+            except Exception as e:
+                logger.error(f"❌ Could not claim enrichment jobs: {e}")
+                return -1
+            if not jobs:
+                return 0
+
+            lease_owner = jobs[0].lease_owner
+            heartbeat = asyncio.create_task(self._heartbeat(lease_owner))
+            app_ids = [job.app_id for job in jobs]
+            logger.info(f"🔧 Claimed {len(jobs)} enrichment jobs ({lease_owner})")
+
+            try:
+                circuit_skipped = []
+                games = await self.steam.fetch_unknown_games_info(app_ids, db, circuit_skipped_ids=circuit_skipped)
+                settled = await asyncio.to_thread(self._settle, db, lease_owner, jobs, games, set(circuit_skipped))
+                logger.info(f"✅ Batch done: {len(games)} games saved, {len(settled)}/{len(jobs)} jobs settled"
+                            f"{f', {len(circuit_skipped)} postponed (circuit open)' if circuit_skipped else ''}")
+            except Exception as e:
+                logger.error(f"❌ Enrichment batch failed: {e}", exc_info=True)
+                await asyncio.to_thread(self._fail, db, jobs, f"{type(e).__name__}: {e}")
+
+            self.processed += len(jobs)
+            return len(jobs)
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+            await asyncio.to_thread(db.close)
+
+    async def _slot(self, once: bool):
+        while not self.stopping.is_set():
+            claimed = await self.process_batch()
+            if claimed > 0:
+                continue
+            if once and claimed == 0:
+                return
+            # Empty queue: poll again later. Claim failed (e.g. database unreachable): back off the same way
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=settings.worker_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        if not self.stopping.is_set():
+            logger.info("🛑 Stopping after the current batches...")
+            self.stopping.set()
+
+    async def run(self, once: bool = False):
+        """Process jobs until stopped (or, with once=True, until the queue is empty)"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows - Ctrl+C still raises KeyboardInterrupt
+
+        def queue_stats():
+            db = SessionLocal()
+            try:
+                return enrichment_queue.stats(db)
+            finally:
+                db.close()
+
+        logger.info(f"🔧 Enrichment worker {self.worker_id} started - {self.concurrency} slots x {self.batch_size} jobs, queue: {await asyncio.to_thread(queue_stats)}")
+
+        try:
+            await asyncio.gather(*[self._slot(once) for _ in range(self.concurrency)])
+        finally:
+            await http_client_pool.aclose()
+            logger.info(f"🔧 Enrichment worker {self.worker_id} exiting - processed {self.processed} jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued game enrichment jobs")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency,
+                        help="batches processed in parallel")
+    parser.add_argument("--batch-size", type=int, default=settings.worker_batch_size,
+                        help="jobs claimed per batch")
+    parser.add_argument("--once", action="store_true",
+                        help="exit when the queue is empty instead of polling")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_database()
+
+    worker = EnrichmentWorker(args.concurrency, args.batch_size)
+    asyncio.run(worker.run(once=args.once))
+
+
+if __name__ == "__main__":
+    main()
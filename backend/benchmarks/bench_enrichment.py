@@ -0,0 +1,125 @@
+"""
+End-to-end enrichment benchmark against the local stub upstream
+
+Starts benchmarks/stub_upstream.py on a free local port, points the Steam and
+HLTB base URLs at it, and runs SteamAuthService.fetch_unknown_games_info over
+a synthetic library in batches of 50 (like /my-games), with a throwaway SQLite
+database and cache directory. Reports wall time, per-batch latency and the
+upstream requests the stub received.
+
+Usage (from backend/):
+    python -m benchmarks.bench_enrichment --games 500 --latency-ms 80 --throttle-rate 0.02
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+from .common import summarize, print_report
+from .stub_upstream import StubConfig, create_stub_app, library_app_ids
+
+BATCH_SIZE = 50
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(config: StubConfig):
+    """Run the stub server in a background thread; returns (base_url, server)"""
+    import uvicorn
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_stub_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+async def run(args, base_url: str) -> dict:
+    # Imported late so the settings below are in place before any service reads them
+    import httpx
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.models import Base
+    from app.services.auth_service import SteamAuthService
+    from app.services.http_client import http_client_pool
+
+    engine = create_engine(f"sqlite:///{os.path.join(args.workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    app_ids = library_app_ids(StubConfig(library_size=args.games, seed=args.seed), "76561190000000001")
+    service = SteamAuthService()
+
+    batch_samples = []
+    found = 0
+    started = time.perf_counter()
+    for start in range(0, len(app_ids), BATCH_SIZE):
+        batch_started = time.perf_counter()
+        games = await service.fetch_unknown_games_info(app_ids[start:start + BATCH_SIZE], db)
+        batch_samples.append(time.perf_counter() - batch_started)
+        found += len(games)
+    elapsed = time.perf_counter() - started
+
+    async with httpx.AsyncClient() as client:
+        upstream_requests = (await client.get(f"{base_url}/__stats")).json()
+    await http_client_pool.aclose()
+    db.close()
+
+    return {
+        "games": len(app_ids),
+        "enriched": found,
+        "wall_seconds": round(elapsed, 3),
+        "games_per_second": round(len(app_ids) / elapsed, 1) if elapsed else None,
+        "batch_latency": summarize(batch_samples),
+        "upstream_requests": upstream_requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--latency-dist", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--delisted-rate", type=float, default=0.05)
+    parser.add_argument("--rps", type=float, default=50.0, help="initial/max rate limit per host")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="where the throwaway db and caches go")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_dist=args.latency_dist, latency_ms=args.latency_ms, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, delisted_rate=args.delisted_rate, seed=args.seed,
+        retry_after=0.5,
+    )
+    base_url, server = start_stub(config)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.workdir = args.workdir or tmp
+        from app.config import settings
+        settings.steam_api_key = "stub"
+        settings.steam_api_base_url = base_url
+        settings.steam_store_base_url = base_url
+        settings.hltb_base_url = base_url
+        settings.cache_dir = os.path.join(args.workdir, "cache")
+        settings.rate_limit_shared = False
+        settings.rate_limit_initial_rps = args.rps
+        settings.rate_limit_max_rps = max(args.rps, settings.rate_limit_max_rps)
+        settings.rate_limit_burst = max(args.rps, settings.rate_limit_burst)
+
+        report = asyncio.run(run(args, base_url))
+        report["stub"] = vars(config)
+        print_report("Enrichment against stub upstream", report)
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
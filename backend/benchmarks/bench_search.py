@@ -0,0 +1,218 @@
+"""
+Microbenchmarks for the in-memory catalog (GameService)
+
+For synthetic catalogs of each size, measures search_games over a realistic
+mix of filters (empty query, substring query, tight ranges, played filtering
+with large played sets, every sort order, deep offsets), get_game_by_id,
+load_games and add_games, plus paging through a per-user materialized view
+(LibraryViews). Reports p50/p99 latency and the peak memory allocated by one
+call of each case (tracemalloc, measured separately so it doesn't skew the
+timings).
+
+load_games/add_games go through a throwaway SQLite database holding the
+catalog. They take minutes at 1M games, so by default they stop at 100k
+(--db-max-size 1000000 includes the largest catalog).
+
+Usage (from backend/):
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --sizes 1000,10000 --json search.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List
+from .common import summarize, time_calls, print_report
+
+WORDS = [
+    "dark", "souls", "legend", "star", "war", "space", "city", "quest", "hollow", "knight",
+    "dead", "cell", "tales", "dragon", "age", "fall", "out", "sim", "farm", "craft",
+    "racing", "tower", "defense", "puzzle", "shadow", "iron", "blood", "night", "sky", "ocean",
+]
+
+
+def make_catalog(size: int, seed: int = 1) -> List[dict]:
+    """Synthetic games shaped like Game.to_dict()"""
+    rng = random.Random(seed)
+    games = []
+    for i in range(size):
+        app_id = 10 + i * 10
+        name = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 4))) + f" {i}"
+        # ~15% unknown HLTB time (0), the rest skewed towards short games
+        playtime = 0.0 if rng.random() < 0.15 else round(rng.lognormvariate(2.3, 0.9), 1)
+        header = f"https://cdn.example/apps/{app_id}/header.jpg"
+        games.append({
+            "app_id": app_id,
+            "name": name,
+            "header_image": header,
+            "playtime_hours": playtime,
+            "hltb_hours": playtime,
+            "score": round(rng.uniform(20, 99), 1),
+            "total_reviews": int(rng.lognormvariate(6, 2)),
+            "steam_url": f"https://store.steampowered.com/app/{app_id}/",
+            "image_url": header,
+            "hltb_url": None,
+        })
+    return games
+
+
+def search_cases(catalog: List[dict]) -> Dict[str, dict]:
+    """search_games keyword arguments for each benchmark case"""
+    size = len(catalog)
+    rng = random.Random(7)
+    played_half = {g["app_id"] for g in rng.sample(catalog, size // 2)}
+    played_small = {g["app_id"] for g in rng.sample(catalog, min(size, 500))}
+
+    cases = {
+        "empty_query_page1": dict(limit=50),
+        "substring_query": dict(query="dark", limit=50),
+        "substring_query_rare": dict(query="hollow knight", limit=50),
+        "tight_ranges": dict(playtime_min=5, playtime_max=10, score_min=80, score_max=90, limit=50),
+        "query_and_ranges": dict(query="star", playtime_min=1, playtime_max=20, score_min=70, limit=50),
+        "unplayed_only_half_played": dict(show_played_games=False, played_game_ids=played_half, limit=50),
+        "played_only_half_played": dict(show_unplayed_games=False, played_game_ids=played_half, limit=50),
+        "unplayed_only_500_played": dict(show_played_games=False, played_game_ids=played_small, limit=50),
+        "deep_offset_90pct": dict(offset=int(size * 0.9), limit=50),
+    }
+    for sort_by in ("name", "playtime_hours", "score"):
+        for sort_order in ("asc", "desc"):
+            cases[f"sort_{sort_by}_{sort_order}"] = dict(sort_by=sort_by, sort_order=sort_order, limit=50)
+    return cases
+
+
+def peak_memory_kb(fn: Callable[[], object]) -> float:
+    """Peak memory allocated while running fn() once, in KiB"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def measure(fn: Callable[[int], object], iterations: int) -> dict:
+    fn(0)  # warm-up
+    result = summarize(time_calls(fn, iterations))
+    result["peak_memory_kb"] = peak_memory_kb(lambda: fn(0))
+    return result
+
+
+def iterations_for(size: int, budget: int) -> int:
+    """Fewer iterations for bigger catalogs so each case takes roughly the same time"""
+    return max(3, min(200, budget // size))
+
+
+def bench_in_memory(service, catalog: List[dict], budget: int) -> dict:
+    size = len(catalog)
+    service.games = catalog
+    iterations = iterations_for(size, budget)
+    report = {}
+    for name, kwargs in search_cases(catalog).items():
+        report[name] = measure(lambda _i, kw=kwargs: service.search_games(**kw), iterations)
+
+    rng = random.Random(3)
+    hit_ids = [rng.choice(catalog)["app_id"] for _ in range(1000)]
+    report["get_game_by_id_hit"] = measure(lambda i: service.get_game_by_id(hit_ids[i % len(hit_ids)]), iterations * 5)
+    report["get_game_by_id_miss"] = measure(lambda i: service.get_game_by_id(-1), iterations * 5)
+
+    # Paging through a per-user materialized view (built by the warm-up call)
+    from app.services.library_views import LibraryFilter, LibraryViews
+    views = LibraryViews(service)
+    played = {g["app_id"] for g in random.Random(7).sample(catalog, min(size, 500))}
+    view_cases = {
+        "view_page_unplayed_name": LibraryFilter(show_played_games=False),
+        "view_page_score_desc": LibraryFilter(sort_by="score", sort_order="desc"),
+    }
+    for name, view_filter in view_cases.items():
+        report[name] = measure(
+            lambda i, f=view_filter: views.page(1, f, played, (i * 50) % size, 50), iterations * 5
+        )
+    return report
+
+
+def bench_database(service, catalog: List[dict], engine) -> dict:
+    """load_games and add_games against a SQLite database holding the catalog"""
+    from app.models import Base, Game
+
+    Base.metadata.drop_all(bind=engine, tables=[Game.__table__])
+    Base.metadata.create_all(bind=engine, tables=[Game.__table__])
+    columns = ("app_id", "name", "header_image", "playtime_hours", "score", "total_reviews")
+    with engine.begin() as conn:
+        for start in range(0, len(catalog), 50000):
+            conn.execute(Game.__table__.insert(), [
+                {column: game[column] for column in columns} for game in catalog[start:start + 50000]
+            ])
+
+    iterations = 1 if len(catalog) >= 100000 else 3
+    report = {"load_games": measure(lambda _i: service.load_games(), iterations)}
+
+    next_app_id = [catalog[-1]["app_id"] + 10]
+
+    def add_batch(_i):
+        batch = []
+        for _ in range(50):
+            batch.append({"app_id": next_app_id[0], "name": f"New Game {next_app_id[0]}", "score": 50})
+            next_app_id[0] += 10
+        service.add_games(batch)
+
+    report["add_games_50"] = measure(add_batch, iterations)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GameService search and catalog operations")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="comma-separated catalog sizes")
+    parser.add_argument("--budget", type=int, default=1_000_000,
+                        help="games scanned per case; iterations = budget / size (3..200)")
+    parser.add_argument("--db-max-size", type=int, default=100_000,
+                        help="skip load_games/add_games for catalogs larger than this")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # GameService reads from app.database, so point it at a throwaway database before importing
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench_search.db')}"
+        from app.database import engine
+        from app.models import Base
+        Base.metadata.create_all(bind=engine)
+        from app.services.game_service import GameService
+
+        service = GameService()
+
+        report = {}
+        for size in sizes:
+            print(f"⏱️ Catalog of {size} games...")
+            tracemalloc.start()
+            catalog = make_catalog(size)
+            catalog_kb = round(tracemalloc.get_traced_memory()[0] / 1024, 1)
+            tracemalloc.stop()
+
+            report[str(size)] = {
+                "catalog_memory_kb": catalog_kb,
+                "in_memory": bench_in_memory(service, catalog, args.budget),
+            }
+            if size <= args.db_max_size:
+                report[str(size)]["database"] = bench_database(service, catalog, engine)
+            service.games = []
+            if service.db_session is not None:
+                service.db_session.close()
+                service.db_session = None
+            del catalog
+            gc.collect()
+
+        engine.dispose()
+
+    print_report("GameService benchmarks", report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
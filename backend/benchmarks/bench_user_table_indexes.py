@@ -0,0 +1,115 @@
+"""
+Benchmark (user_id, app_id) lookups and played toggles before and after the
+unique composite indexes from migration_user_game_uniqueness.
+
+Builds a throwaway SQLite database with the per-user tables, fills them with
+`--rows` rows (plus a few duplicates for the migration to clean up), measures
+lookup and toggle latency with only the old user_id index, runs the migration
+and measures again.
+
+Usage (from backend/):
+    python -m benchmarks.bench_user_table_indexes --rows 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+from app.models import Base, UserGame, UserPlayedGame
+from app.db.migration_user_game_uniqueness import UNIQUE_INDEXES, migrate_user_game_uniqueness
+from .common import summarize, time_calls, print_report
+
+
+def populate(engine, rows: int, games_per_user: int, duplicate_ratio: float, chunk_size: int = 50000):
+    """Fill user_games and user_played_games with `rows` rows each"""
+    duplicates = int(rows * duplicate_ratio)
+    with engine.begin() as conn:
+        for table in ("user_games", "user_played_games"):
+            batch = []
+            for i in range(rows + duplicates):
+                # The tail re-inserts early pairs to create duplicates
+                n = i if i < rows else (i - rows) * 7 % rows
+                batch.append((n // games_per_user + 1, n % games_per_user + 1))
+                if len(batch) >= chunk_size:
+                    conn.exec_driver_sql(f"INSERT INTO {table} (user_id, app_id) VALUES (?, ?)", batch)
+                    batch = []
+            if batch:
+                conn.exec_driver_sql(f"INSERT INTO {table} (user_id, app_id) VALUES (?, ?)", batch)
+
+
+def measure(engine, users: int, games_per_user: int, iterations: int, seed: int) -> dict:
+    """Measure point lookups on both tables and played toggles"""
+    rng = random.Random(seed)
+    pairs = [(rng.randint(1, users), rng.randint(1, games_per_user)) for _ in range(iterations)]
+    results = {}
+
+    with engine.connect() as conn:
+        for table in ("user_games", "user_played_games"):
+            lookup = text(f"SELECT id FROM {table} WHERE user_id = :u AND app_id = :a")
+            results[f"{table}_lookup"] = summarize(time_calls(
+                lambda i: conn.execute(lookup, {"u": pairs[i][0], "a": pairs[i][1]}).first(),
+                iterations
+            ))
+
+    find = text("SELECT id FROM user_played_games WHERE user_id = :u AND app_id = :a")
+    remove = text("DELETE FROM user_played_games WHERE id = :id")
+    add = text("INSERT INTO user_played_games (user_id, app_id) VALUES (:u, :a)")
+
+    def toggle(i):
+        # Same statements as toggle_played_game, each in its own transaction
+        u, a = pairs[i]
+        with engine.begin() as conn:
+            row = conn.execute(find, {"u": u, "a": a}).first()
+            if row:
+                conn.execute(remove, {"id": row.id})
+            else:
+                conn.execute(add, {"u": u, "a": a})
+
+    # Toggle each pair twice so the table ends where it started
+    samples = time_calls(toggle, iterations) + time_calls(toggle, iterations)
+    results["played_toggle"] = summarize(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows per table")
+    parser.add_argument("--games-per-user", type=int, default=500)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.001)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    users = args.rows // args.games_per_user
+    workdir = tempfile.mkdtemp(prefix="bench_indexes_")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+
+    Base.metadata.create_all(engine, tables=[UserGame.__table__, UserPlayedGame.__table__])
+    with engine.begin() as conn:
+        for _, index_name in UNIQUE_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+
+    start = time.perf_counter()
+    populate(engine, args.rows, args.games_per_user, args.duplicate_ratio)
+    print(f"Populated {args.rows:,} rows per table in {time.perf_counter() - start:.1f}s")
+
+    before = measure(engine, users, args.games_per_user, args.iterations, args.seed)
+
+    start = time.perf_counter()
+    migration = migrate_user_game_uniqueness(engine)
+    migration_seconds = time.perf_counter() - start
+
+    after = measure(engine, users, args.games_per_user, args.iterations, args.seed)
+
+    print_report("user table indexes", {
+        "rows_per_table": args.rows,
+        "iterations": args.iterations,
+        "before": before,
+        "migration": {"seconds": round(migration_seconds, 2), **migration},
+        "after": after,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import json
+import math
+import time
+from typing import Callable, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> dict:
+    """p50/p99/mean of latency samples given in seconds, reported in milliseconds"""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def time_calls(fn: Callable[[int], object], iterations: int) -> List[float]:
+    """Call fn(i) `iterations` times and return per-call latencies in seconds"""
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def print_report(title: str, report) -> None:
+    """Print a benchmark report as indented JSON"""
+    print(f"\n=== {title} ===")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,392 @@
+"""
+Load test of the whole API with scripted user scenarios
+
+Drives the real FastAPI app (auth dependency, DB sessions, middleware,
+serialization) with concurrent virtual users, either in-process through
+httpx's ASGI transport or over HTTP against a local uvicorn started for the
+run. Steam, the Store, HLTB and the OpenID check go to the local stub
+upstream (benchmarks/stub_upstream.py), so logins and /my-games work offline.
+
+Each virtual user logs in through /auth/callback, then keeps picking a
+scenario (weighted by --mix) until --duration runs out or it has run
+--iterations scenarios:
+
+    login        GET /auth/login, GET /auth/callback, GET /auth/user
+    my_games     GET /api/my-games
+    browse       3 pages of /api/search, 2 of /api/search-with-preferences
+    played       3 toggles, PATCH /api/played-games/, GET /api/played-games/
+    preferences  GET + POST /api/preferences/
+
+The database is a throwaway SQLite file unless --database-url is given (e.g.
+a scratch PostgreSQL database); an empty games table is seeded with
+--catalog-size synthetic games whose app_ids match the stub's libraries, so
+/my-games only enriches the --unknown-fraction of each library that is not
+in the catalog. Reports per-endpoint throughput, latency percentiles and
+error rates as JSON.
+
+In-process runs share one event loop between the app and the virtual users,
+so latencies include time spent waiting behind other requests' synchronous
+DB work - use --target uvicorn --workers N to measure a multi-process setup.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --users 20 --duration 30
+    python -m benchmarks.load_test --mix browse=1 --users 50 --iterations 20 --json load.json
+    python -m benchmarks.load_test --target uvicorn --workers 4 --database-url postgresql://localhost/loadtest
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from urllib.parse import parse_qs, urlencode, urlparse
+from .bench_enrichment import _free_port, start_stub
+from .bench_search import WORDS, make_catalog
+from .common import percentile, print_report
+from .stub_upstream import StubConfig
+
+PAGE_SIZE = 24
+DEFAULT_MIX = "login=1,my_games=2,browse=5,played=3,preferences=2"
+
+
+class Recorder:
+    """Latency samples and outcomes per endpoint"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+
+    async def request(self, client, endpoint: str, method: str, url: str, expect=(200,), **kwargs):
+        """Send one request, record it under `endpoint`; returns the response or None on a transport error"""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception as e:
+            self.samples[endpoint].append(time.perf_counter() - started)
+            self.statuses[endpoint][type(e).__name__] += 1
+            self.errors[endpoint] += 1
+            return None
+        self.samples[endpoint].append(time.perf_counter() - started)
+        self.statuses[endpoint][str(response.status_code)] += 1
+        if response.status_code not in expect:
+            self.errors[endpoint] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint in sorted(self.samples):
+            samples = self.samples[endpoint]
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "errors": self.errors[endpoint],
+                "error_rate": round(self.errors[endpoint] / len(samples), 4),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p90_ms": round(percentile(samples, 90) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        total = sum(len(samples) for samples in self.samples.values())
+        errors = sum(self.errors.values())
+        return {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+class VirtualUser:
+    """One simulated browser session"""
+
+    def __init__(self, index: int, client, recorder: Recorder, seed: int):
+        self.steam_id = f"7656119{index:010d}"
+        self.client = client
+        self.recorder = recorder
+        self.rng = random.Random(f"{seed}:{index}")
+        self.token = None
+        self.owned = []
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def login(self):
+        await self.recorder.request(self.client, "GET /auth/login", "GET", "/auth/login")
+        claimed_id = f"https://steamcommunity.com/openid/id/{self.steam_id}"
+        params = {
+            "openid.ns": "http://specs.openid.net/auth/2.0",
+            "openid.mode": "id_res",
+            "openid.op_endpoint": "https://steamcommunity.com/openid/login",
+            "openid.claimed_id": claimed_id,
+            "openid.identity": claimed_id,
+            "openid.return_to": "http://loadtest/auth/callback",
+            "openid.response_nonce": f"{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}{self.rng.getrandbits(32):x}",
+            "openid.assoc_handle": "1234567890",
+            "openid.signed": "signed,op_endpoint,claimed_id,identity,return_to,response_nonce,assoc_handle",
+            "openid.sig": "loadtest",
+        }
+        response = await self.recorder.request(
+            self.client, "GET /auth/callback", "GET", f"/auth/callback?{urlencode(params)}", expect=(302, 307)
+        )
+        if response is not None:
+            token = parse_qs(urlparse(response.headers.get("location", "")).query).get("token")
+            if token:
+                self.token = token[0]
+            else:
+                # Redirected to ?error=... - count it against the callback
+                self.recorder.errors["GET /auth/callback"] += 1
+        await self.recorder.request(self.client, "GET /auth/user", "GET", "/auth/user", headers=self.headers)
+
+    async def my_games(self):
+        response = await self.recorder.request(
+            self.client, "GET /api/my-games", "GET", "/api/my-games", headers=self.headers
+        )
+        if response is not None and response.status_code == 200:
+            self.owned = [game["app_id"] for game in response.json().get("games", [])] or self.owned
+
+    async def browse(self):
+        query = {"q": self.rng.choice(WORDS)} if self.rng.random() < 0.6 else {}
+        if self.rng.random() < 0.5:
+            query.update(playtime_min=1, playtime_max=self.rng.choice([5, 10, 20, 50]))
+        for page in range(3):
+            await self.recorder.request(
+                self.client, "GET /api/search", "GET", "/api/search",
+                params={**query, "limit": PAGE_SIZE, "offset": page * PAGE_SIZE}
+            )
+        for page in range(2):
+            await self.recorder.request(
+                self.client, "GET /api/search-with-preferences", "GET", "/api/search-with-preferences",
+                params={**query, "offset": page * PAGE_SIZE}, headers=self.headers
+            )
+
+    async def played(self):
+        if not self.owned:
+            await self.my_games()
+        candidates = self.owned or [10 + i * 10 for i in range(1000)]
+        for app_id in self.rng.sample(candidates, min(3, len(candidates))):
+            await self.recorder.request(
+                self.client, "POST /api/played-games/toggle/{app_id}", "POST",
+                f"/api/played-games/toggle/{app_id}", headers=self.headers
+            )
+        await self.recorder.request(
+            self.client, "PATCH /api/played-games/", "PATCH", "/api/played-games/", headers=self.headers,
+            json={"add": self.rng.sample(candidates, min(5, len(candidates))),
+                  "remove": self.rng.sample(candidates, min(2, len(candidates)))}
+        )
+        await self.recorder.request(
+            self.client, "GET /api/played-games/", "GET", "/api/played-games/", headers=self.headers
+        )
+
+    async def preferences(self):
+        await self.recorder.request(
+            self.client, "GET /api/preferences/", "GET", "/api/preferences/", headers=self.headers
+        )
+        await self.recorder.request(
+            self.client, "POST /api/preferences/", "POST", "/api/preferences/", headers=self.headers,
+            json={
+                "show_played_games": self.rng.random() < 0.5,
+                "playtime_min": self.rng.choice([0, 1, 2]),
+                "playtime_max": self.rng.choice([10, 20, 50, 1000]),
+                "score_min": self.rng.choice([0, 50, 70, 80]),
+                "sort_by": self.rng.choice(["name", "playtime_hours", "score"]),
+                "sort_order": self.rng.choice(["asc", "desc"]),
+                "items_per_page": PAGE_SIZE,
+                "last_search_query": self.rng.choice(WORDS),
+            }
+        )
+
+
+SCENARIOS = ("login", "my_games", "browse", "played", "preferences")
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def run_user(user: VirtualUser, weights: dict, deadline: float, iterations: int, start_delay: float,
+                   scenario_runs: Counter):
+    await asyncio.sleep(start_delay)
+    await user.login()
+    names, scenario_weights = list(weights), list(weights.values())
+    done = 0
+    while time.perf_counter() < deadline and (not iterations or done < iterations):
+        name = user.rng.choices(names, weights=scenario_weights)[0]
+        await getattr(user, name)()
+        scenario_runs[name] += 1
+        done += 1
+
+
+def seed_database(catalog_size: int, seed: int) -> int:
+    """Fill an empty games table with the synthetic catalog; returns the number of games in the table"""
+    from app.database import engine, SessionLocal
+    from app.models import Base, Game
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        existing = db.query(Game).count()
+    finally:
+        db.close()
+    if existing:
+        print(f"📦 Using the {existing} games already in the database")
+        return existing
+
+    columns = ("app_id", "name", "header_image", "playtime_hours", "score", "total_reviews")
+    catalog = make_catalog(catalog_size, seed)
+    with engine.begin() as conn:
+        for start in range(0, len(catalog), 50000):
+            conn.execute(Game.__table__.insert(), [
+                {column: game[column] for column in columns} for game in catalog[start:start + 50000]
+            ])
+    print(f"📦 Seeded {len(catalog)} games")
+    return len(catalog)
+
+
+async def wait_until_healthy(base_url: str, process: subprocess.Popen, timeout: float = 60.0):
+    import httpx
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"uvicorn exited with code {process.returncode}")
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"uvicorn did not become healthy within {timeout:.0f}s")
+
+
+async def run(args, stub_url: str) -> dict:
+    import httpx
+
+    process = None
+    if args.target == "asgi":
+        from app.main import app
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        base_url = "http://loadtest"
+    else:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        log = open(os.path.join(args.workdir, "uvicorn.log"), "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env=os.environ.copy(), stdout=log, stderr=subprocess.STDOUT
+        )
+        await wait_until_healthy(base_url, process)
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.users))
+
+    recorder = Recorder()
+    scenario_runs = Counter()
+    weights = parse_mix(args.mix)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+            users = [VirtualUser(i + 1, client, recorder, args.seed) for i in range(args.users)]
+            started = time.perf_counter()
+            deadline = started + args.ramp_up + args.duration if not args.iterations else float("inf")
+            await asyncio.gather(*[
+                run_user(user, weights, deadline, args.iterations, args.ramp_up * i / args.users, scenario_runs)
+                for i, user in enumerate(users)
+            ])
+            elapsed = time.perf_counter() - started
+            logged_in = sum(1 for user in users if user.token)
+
+        async with httpx.AsyncClient() as client:
+            upstream_requests = (await client.get(f"{stub_url}/__stats")).json()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        else:
+            from app.services.http_client import http_client_pool
+            await http_client_pool.aclose()
+
+    return {
+        "target": args.target if args.target == "asgi" else f"uvicorn x{args.workers}",
+        "users": args.users,
+        "logged_in": logged_in,
+        "wall_seconds": round(elapsed, 3),
+        "scenario_runs": dict(scenario_runs),
+        **recorder.report(elapsed),
+        "upstream_requests": upstream_requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="asgi", choices=["asgi", "uvicorn"])
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (--target uvicorn)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run after ramp-up")
+    parser.add_argument("--iterations", type=int, default=0,
+                        help="scenarios per user instead of a fixed duration")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="seconds over which users start")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. browse=5,played=1")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite database")
+    parser.add_argument("--catalog-size", type=int, default=20000)
+    parser.add_argument("--library-size", type=int, default=200, help="games owned by each virtual user")
+    parser.add_argument("--unknown-fraction", type=float, default=0.0,
+                        help="fraction of library games missing from the catalog (enriched by /my-games)")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(
+        latency_dist="lognormal", latency_ms=args.upstream_latency_ms, library_size=args.library_size,
+        catalog_size=max(args.library_size, int(args.catalog_size / (1 - min(args.unknown_fraction, 0.99)))),
+        seed=args.seed,
+    )
+    stub_url, stub_server = start_stub(stub_config)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.workdir = tmp
+        # Read by app.config at import time here and by the uvicorn workers' environment
+        os.environ.update({
+            "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(tmp, 'load_test.db')}",
+            "STEAM_API_KEY": "stub",
+            "STEAM_API_BASE_URL": stub_url,
+            "STEAM_STORE_BASE_URL": stub_url,
+            "HLTB_BASE_URL": stub_url,
+            "STEAM_OPENID_URL": f"{stub_url}/openid/login",
+            "CACHE_DIR": os.path.join(tmp, "cache"),
+            "RATE_LIMIT_INITIAL_RPS": "200",
+            "RATE_LIMIT_MAX_RPS": "200",
+            "RATE_LIMIT_BURST": "200",
+            "CATALOG_REFRESH_ENABLED": "false",
+        })
+        catalog = seed_database(args.catalog_size, args.seed)
+
+        report = asyncio.run(run(args, stub_url))
+        report["catalog_size"] = catalog
+        report["database"] = os.environ["DATABASE_URL"].split("://")[0]
+
+    stub_server.should_exit = True
+    print_report("API load test", report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
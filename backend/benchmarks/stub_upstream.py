@@ -0,0 +1,223 @@
+"""
+Local stand-in for the Steam Web API, Steam Store and HowLongToBeat
+
+Serves deterministic synthetic data so /my-games and fetch_unknown_games_info
+can be benchmarked end to end without touching the real upstreams:
+
+    GET  /ISteamUser/GetPlayerSummaries/v0002/   (steamids=...)
+    GET  /IPlayerService/GetOwnedGames/v1/       (steamid=...)
+    GET  /api/appdetails                         (appids=...)
+    GET  /appreviews/{app_id}
+    POST /api/search                             (HLTB search, {"searchTerms": [...]})
+    POST /openid/login                           (OpenID check_authentication, always valid)
+    GET  /__stats                                request counts per endpoint
+    POST /__reset                                reset the counters
+
+Every endpoint waits a latency drawn from the configured distribution and can
+answer 500 or 429 (with Retry-After) at the configured rates. A fraction of
+app_ids is delisted. Libraries are random but stable per steam_id.
+
+Usage (from backend/):
+    python -m benchmarks.stub_upstream --port 8081 --latency-ms 80 --latency-dist lognormal \\
+        --error-rate 0.01 --throttle-rate 0.02 --delisted-rate 0.05 --library-size 500
+
+Then point the backend at it:
+    STEAM_API_BASE_URL=http://127.0.0.1:8081 STEAM_STORE_BASE_URL=http://127.0.0.1:8081 \\
+    HLTB_BASE_URL=http://127.0.0.1:8081 STEAM_OPENID_URL=http://127.0.0.1:8081/openid/login \\
+    STEAM_API_KEY=stub
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+# Synthetic app_ids are FIRST_APP_ID, FIRST_APP_ID + APP_ID_STEP, ...
+FIRST_APP_ID = 10
+APP_ID_STEP = 10
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub server"""
+    latency_dist: str = "fixed"  # fixed, uniform or lognormal
+    latency_ms: float = 50.0  # fixed value, uniform midpoint or lognormal median
+    latency_spread: float = 0.5  # uniform: +/- fraction of latency_ms; lognormal: sigma
+    hltb_latency_ms: Optional[float] = None  # defaults to latency_ms
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+    throttle_rate: float = 0.0  # fraction of requests answered with HTTP 429
+    retry_after: float = 1.0  # Retry-After seconds sent with 429s
+    delisted_rate: float = 0.05  # fraction of app_ids that are delisted
+    no_reviews_rate: float = 0.1  # fraction of listed apps without reviews
+    hltb_miss_rate: float = 0.2  # fraction of titles HLTB has no match for
+    library_size: int = 200  # games per synthetic library
+    library_size_from_steamid: bool = False  # use the last 6 digits of the steam_id as library size
+    catalog_size: int = 200000  # app_ids libraries are drawn from
+    seed: int = 42
+
+
+def _unit(seed: int, *parts) -> float:
+    """Stable pseudo-random number in [0, 1) for the given key"""
+    digest = hashlib.blake2b(":".join(str(p) for p in (seed, *parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def app_name(app_id: int) -> str:
+    return f"Synthetic Game {app_id}"
+
+
+def is_delisted(config: StubConfig, app_id: int) -> bool:
+    return _unit(config.seed, "delisted", app_id) < config.delisted_rate
+
+
+def library_app_ids(config: StubConfig, steam_id: str) -> list:
+    """Stable list of app_ids owned by a synthetic user"""
+    size = config.library_size
+    if config.library_size_from_steamid and steam_id[-6:].isdigit() and int(steam_id[-6:]):
+        size = int(steam_id[-6:])
+    size = min(size, config.catalog_size)
+    rng = random.Random(f"{config.seed}:{steam_id}")
+    return [FIRST_APP_ID + i * APP_ID_STEP for i in rng.sample(range(config.catalog_size), size)]
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    """Build the stub ASGI app for `config`"""
+    app = FastAPI(title="Steam/HLTB stub upstream")
+    rng = random.Random(config.seed)
+    stats = Counter()
+
+    def sample_latency(base_ms: float) -> float:
+        if config.latency_dist == "uniform":
+            return max(0.0, rng.uniform(base_ms * (1 - config.latency_spread), base_ms * (1 + config.latency_spread))) / 1000
+        if config.latency_dist == "lognormal":
+            return rng.lognormvariate(0, config.latency_spread) * base_ms / 1000
+        return base_ms / 1000
+
+    async def upstream(endpoint: str, base_ms: float = None):
+        """Simulate latency and injected failures; returns an error response or None"""
+        stats[endpoint] += 1
+        await asyncio.sleep(sample_latency(config.latency_ms if base_ms is None else base_ms))
+        roll = rng.random()
+        if roll < config.error_rate:
+            stats[f"{endpoint}:500"] += 1
+            return JSONResponse({"error": "injected"}, status_code=500)
+        if roll < config.error_rate + config.throttle_rate:
+            stats[f"{endpoint}:429"] += 1
+            return JSONResponse({}, status_code=429, headers={"Retry-After": str(config.retry_after)})
+        return None
+
+    @app.get("/ISteamUser/GetPlayerSummaries/v0002/")
+    async def player_summaries(steamids: str = ""):
+        error = await upstream("GetPlayerSummaries")
+        if error:
+            return error
+        players = [
+            {
+                "steamid": steam_id,
+                "personaname": f"stub-{steam_id[-6:]}",
+                "avatarfull": f"https://avatars.example/{steam_id}.jpg",
+                "profileurl": f"https://steamcommunity.com/profiles/{steam_id}/",
+            }
+            for steam_id in steamids.split(",") if steam_id
+        ]
+        return {"response": {"players": players}}
+
+    @app.get("/IPlayerService/GetOwnedGames/v1/")
+    async def owned_games(steamid: str = ""):
+        error = await upstream("GetOwnedGames")
+        if error:
+            return error
+        games = [
+            {"appid": app_id, "name": app_name(app_id),
+             "playtime_forever": int(_unit(config.seed, "playtime", steamid, app_id) * 6000)}
+            for app_id in library_app_ids(config, steamid)
+        ]
+        return {"response": {"game_count": len(games), "games": games}}
+
+    @app.get("/api/appdetails")
+    async def appdetails(appids: str):
+        error = await upstream("appdetails")
+        if error:
+            return error
+        app_id = int(appids)
+        if is_delisted(config, app_id):
+            return {appids: {"success": False}}
+        return {appids: {"success": True, "data": {
+            "name": app_name(app_id),
+            "header_image": f"https://cdn.example/apps/{app_id}/header.jpg",
+        }}}
+
+    @app.get("/appreviews/{app_id}")
+    async def appreviews(app_id: int):
+        error = await upstream("appreviews")
+        if error:
+            return error
+        if is_delisted(config, app_id) or _unit(config.seed, "no_reviews", app_id) < config.no_reviews_rate:
+            return {"success": 1, "query_summary": {"total_reviews": 0, "total_positive": 0, "total_negative": 0}}
+        total = int(10 ** (1 + _unit(config.seed, "reviews", app_id) * 5))
+        positive = int(total * _unit(config.seed, "positive", app_id))
+        return {"success": 1, "query_summary": {
+            "total_reviews": total, "total_positive": positive, "total_negative": total - positive,
+        }}
+
+    @app.post("/api/search")
+    async def hltb_search(request: Request):
+        error = await upstream("hltb_search", config.hltb_latency_ms)
+        if error:
+            return error
+        body = await request.json()
+        title = " ".join(body.get("searchTerms", []))
+        if _unit(config.seed, "hltb_miss", title.lower()) < config.hltb_miss_rate:
+            return {"data": []}
+        game_id = int(_unit(config.seed, "hltb_id", title.lower()) * 10 ** 6)
+        hours = 1 + _unit(config.seed, "hltb_hours", title.lower()) * 80
+        return {"data": [{"game_id": game_id, "game_name": title, "comp_main": int(hours * 3600)}]}
+
+    @app.post("/openid/login")
+    async def openid_check_authentication():
+        error = await upstream("openid")
+        if error:
+            return error
+        return PlainTextResponse("ns:http://specs.openid.net/auth/2.0\nis_valid:true\n")
+
+    @app.get("/__stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/__reset")
+    async def reset_stats():
+        stats.clear()
+        return {"ok": True}
+
+    return app
+
+
+def parse_config(argv=None) -> tuple:
+    parser = argparse.ArgumentParser(description="Local Steam/HLTB stub upstream server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    defaults = StubConfig()
+    for field, value in vars(defaults).items():
+        flag = "--" + field.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(flag, action="store_true", default=value)
+        else:
+            parser.add_argument(flag, type=type(value) if value is not None else float, default=value)
+    args = vars(parser.parse_args(argv))
+    host, port = args.pop("host"), args.pop("port")
+    return StubConfig(**args), host, port
+
+
+def main():
+    import uvicorn
+    config, host, port = parse_config()
+    print(f"🧪 Stub upstream on http://{host}:{port} - {config}")
+    uvicorn.run(create_stub_app(config), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,8 @@ Usage: python add_games_by_steamid.py <steam_id>
 import asyncio
 import os
 import sys
-import re
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from howlongtobeatpy import HowLongToBeat
-import httpx
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -18,6 +15,9 @@ load_dotenv()
 # Import models
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 from app.models import Game, User, UserGame
+from app.services.http_client import get_http_client, http_client_pool
+from app.services.hltb_cache import get_hltb_info
+from app.services.steam_store import store_get, appdetails_is_negative, appreviews_is_negative
 
 # Configuration
 DATABASE_URL = os.getenv('DATABASE_URL_PROD')
@@ -35,6 +35,10 @@ if not STEAM_API_KEY:
 
 print(f"🔗 Connecting to: {DATABASE_URL[:50]}...")
 
+# Max concurrent Steam Store / HLTB calls while enriching new games
+STORE_CONCURRENCY = 10
+HLTB_CONCURRENCY = 5
+
 # Create engine and session
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
@@ -44,19 +48,18 @@ async def get_steam_user_info(steam_id: str):
     url = f"http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?key={STEAM_API_KEY}&steamids={steam_id}"
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                players = data.get("response", {}).get("players", [])
-                if players:
-                    player = players[0]
-                    return {
-                        "steam_id": player.get("steamid"),
-                        "username": player.get("personaname"),
-                        "avatar": player.get("avatarfull"),
-                        "profile_url": player.get("profileurl")
-                    }
+        response = await get_http_client(url).get(url, timeout=30)
+        if response.status_code == 200:
+            data = response.json()
+            players = data.get("response", {}).get("players", [])
+            if players:
+                player = players[0]
+                return {
+                    "steam_id": player.get("steamid"),
+                    "username": player.get("personaname"),
+                    "avatar": player.get("avatarfull"),
+                    "profile_url": player.get("profileurl")
+                }
     except Exception as e:
         print(f"❌ Error fetching Steam user info: {e}")
     
@@ -67,12 +70,11 @@ async def get_steam_user_games(steam_id: str):
     url = f"http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/?key={STEAM_API_KEY}&steamid={steam_id}&format=json&include_appinfo=1&include_played_free_games=1"
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("response") and data["response"].get("games"):
-                    return data["response"]["games"]
+        response = await get_http_client(url).get(url, timeout=30)
+        if response.status_code == 200:
+            data = response.json()
+            if data.get("response") and data["response"].get("games"):
+                return data["response"]["games"]
     except Exception as e:
         print(f"❌ Error fetching Steam library: {e}")
     
@@ -83,28 +85,38 @@ async def get_steam_game_info(app_id: int):
     url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get(str(app_id), {}).get("success"):
-                    game_data = data[str(app_id)]["data"]
-                    return {
-                        "name": game_data.get("name"),
-                        "header_image": game_data.get("header_image")
-                    }
+        response = await store_get(
+            url,
+            timeout=10,
+            cache_endpoint="appdetails",
+            cache_id=app_id,
+            is_negative=appdetails_is_negative(app_id)
+        )
+        if response.status_code == 200:
+            data = response.json()
+            if data.get(str(app_id), {}).get("success"):
+                game_data = data[str(app_id)]["data"]
+                return {
+                    "name": game_data.get("name"),
+                    "header_image": game_data.get("header_image")
+                }
     except Exception as e:
         print(f"  ⚠️ Error fetching Steam info for {app_id}: {e}")
     
     return None
 
-def get_steam_review_score(app_id: int):
+async def get_steam_review_score(app_id: int):
     """Get Steam review score and total reviews"""
-    import requests
     url = f"https://store.steampowered.com/appreviews/{app_id}?json=1&language=all&purchase_type=all"
     
     try:
-        response = requests.get(url, timeout=5)
+        response = await store_get(
+            url,
+            timeout=5,
+            cache_endpoint="appreviews",
+            cache_id=app_id,
+            is_negative=appreviews_is_negative
+        )
         if response.status_code == 200:
             data = response.json()
             if data.get("success") == 1:
@@ -120,39 +132,6 @@ def get_steam_review_score(app_id: int):
     
     return {"score": 0, "total_reviews": 0}
 
-def normalize_game_name(name: str) -> str:
-    """Normalize game name for better HLTB search results"""
-    # Remove trademark symbols
-    name = re.sub(r'[™®©]', '', name)
-    # Remove common patterns that cause issues
-    name = re.sub(r'\s*:\s*', ' ', name)  # Replace colons with space
-    name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
-    # Title case (better matching than all caps)
-    name = name.title()
-    return name.strip()
-
-async def get_hltb_info(game_name: str):
-    """Get HLTB info for a game"""
-    try:
-        # Try with normalized name first
-        normalized_name = normalize_game_name(game_name)
-        results = await HowLongToBeat().async_search(normalized_name)
-        
-        # If no results, try with original name
-        if not results or len(results) == 0:
-            results = await HowLongToBeat().async_search(game_name)
-        
-        if results and len(results) > 0:
-            best_match = results[0]
-            return {
-                "playtime": best_match.main_story if best_match.main_story else 0,
-                "url": f"https://howlongtobeat.com/game/{best_match.game_id}" if best_match.game_id else None
-            }
-    except Exception as e:
-        print(f"  ⚠️ Error fetching HLTB for {game_name}: {e}")
-    
-    return {"playtime": None, "url": None}
-
 async def main():
     if len(sys.argv) < 2:
         print("❌ Usage: python add_games_by_steamid.py <steam_id>")
@@ -239,26 +218,42 @@ async def main():
         added = 0
         failed = 0
         
-        for i, game in enumerate(new_games, 1):
+        # Fetch Steam info, reviews and HLTB for all new games concurrently
+        semaphore = asyncio.Semaphore(STORE_CONCURRENCY)
+        hltb_semaphore = asyncio.Semaphore(HLTB_CONCURRENCY)
+        
+        async def fetch_game_data(app_id: int):
+            async with semaphore:
+                steam_info = await get_steam_game_info(app_id)
+            if not steam_info:
+                return None, None, None
+            async with semaphore:
+                review_data = await get_steam_review_score(app_id)
+            async with hltb_semaphore:
+                hltb_info = await get_hltb_info(steam_info["name"])
+            return steam_info, review_data, hltb_info
+        
+        fetched = await asyncio.gather(
+            *[fetch_game_data(game["appid"]) for game in new_games],
+            return_exceptions=True
+        )
+        
+        for i, (game, result) in enumerate(zip(new_games, fetched), 1):
             app_id = game["appid"]
             name = game.get("name", "Unknown")
             
             print(f"[{i}/{len(new_games)}] Processing: {name}")
             
             try:
-                # Get detailed Steam info
-                steam_info = await get_steam_game_info(app_id)
+                if isinstance(result, Exception):
+                    raise result
+                
+                steam_info, review_data, hltb_info = result
                 if not steam_info:
                     print(f"  ⚠️ Could not fetch Steam info, skipping")
                     failed += 1
                     continue
                 
-                # Get HLTB info
-                hltb_info = await get_hltb_info(steam_info["name"])
-                
-                # Get review score
-                review_data = get_steam_review_score(app_id)
-                
                 # Create game record
                 new_game = Game(
                     app_id=app_id,
@@ -278,9 +273,6 @@ async def main():
                 print(f"  ✅ Added: {steam_info['name']} - {hltb_display:.1f}h - {score_display:.1f}%")
                 added += 1
                 
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.5)
-                
             except Exception as e:
                 print(f"  ❌ Error: {e}")
                 db.rollback()
@@ -338,6 +330,7 @@ async def main():
         db.rollback()
     finally:
         db.close()
+        await http_client_pool.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
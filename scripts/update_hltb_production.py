@@ -6,7 +6,6 @@ import asyncio
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from howlongtobeatpy import HowLongToBeat
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -16,6 +15,7 @@ load_dotenv()
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 from app.models import Game
+from app.services.hltb_cache import get_hltb_info
 
 # Get database URL from environment
 DATABASE_URL = os.getenv('DATABASE_URL_PROD')
@@ -31,40 +31,6 @@ print(f"🔗 Connecting to: {DATABASE_URL[:50]}...")
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
-def normalize_game_name(name: str) -> str:
-    """Normalize game name for better HLTB search results"""
-    import re
-    # Remove trademark symbols
-    name = re.sub(r'[™®©]', '', name)
-    # Remove common patterns that cause issues
-    name = re.sub(r'\s*:\s*', ' ', name)  # Replace colons with space
-    name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
-    # Title case (better matching than all caps)
-    name = name.title()
-    return name.strip()
-
-async def get_hltb_info(game_name: str) -> dict:
-    """Get HLTB info for a game"""
-    try:
-        # Try with normalized name first
-        normalized_name = normalize_game_name(game_name)
-        results = await HowLongToBeat().async_search(normalized_name)
-        
-        # If no results, try with original name
-        if not results or len(results) == 0:
-            results = await HowLongToBeat().async_search(game_name)
-        
-        if results and len(results) > 0:
-            best_match = results[0]
-            return {
-                "playtime": best_match.main_story if best_match.main_story else 0,
-                "url": f"https://howlongtobeat.com/game/{best_match.game_id}" if best_match.game_id else None
-            }
-    except Exception as e:
-        print(f"  ⚠️ Error fetching HLTB for {game_name}: {e}")
-    
-    return {"playtime": None, "url": None}
-
 async def update_games_batch(games_to_update, db):
     """Update a batch of games with HLTB data"""
     updated = 0
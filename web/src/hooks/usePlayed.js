@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import { useAuthContext } from '../context/AuthContext'
 
 export function usePlayed() {
@@ -22,6 +22,8 @@ export function usePlayed() {
   })
 
   const [isLoading, setIsLoading] = useState(false)
+  // Último estado confirmado por el servidor (null = nunca sincronizado)
+  const lastSynced = useRef(null)
 
   // Cargar juegos jugados desde el backend cuando se autentica
   useEffect(() => {
@@ -60,6 +62,7 @@ export function usePlayed() {
       if (response.ok) {
         const data = await response.json()
         const serverPlayed = new Set(data.played_games.map(id => parseInt(id)))
+        lastSynced.current = serverPlayed
         setPlayed(serverPlayed)
         console.log('📥 Loaded played games from server:', serverPlayed.size)
       }
@@ -76,16 +79,36 @@ export function usePlayed() {
     try {
       const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api'
       
-      const response = await fetch(`${API_URL}/played-games/`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({
-          app_ids: Array.from(played)
+      const snapshot = new Set(played)
+      let response
+      if (lastSynced.current) {
+        // Enviar solo los cambios desde la última sincronización
+        const add = Array.from(snapshot).filter(id => !lastSynced.current.has(id))
+        const remove = Array.from(lastSynced.current).filter(id => !snapshot.has(id))
+        if (add.length === 0 && remove.length === 0) return
+
+        response = await fetch(`${API_URL}/played-games/`, {
+          method: 'PATCH',
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          },
+          body: JSON.stringify({ add, remove })
         })
-      })
+        if (response.ok) lastSynced.current = snapshot
+      } else {
+        response = await fetch(`${API_URL}/played-games/`, {
+          method: 'POST',
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          },
+          body: JSON.stringify({
+            app_ids: Array.from(snapshot)
+          })
+        })
+        if (response.ok) lastSynced.current = snapshot
+      }
 
       if (response.ok) {
         console.log('📤 Synced played games to server')